@@ -6,11 +6,22 @@ XML dosyasını parse ederek detaylı analiz markdown dosyası oluşturur
 """
 
 import xml.etree.ElementTree as ET
-import re
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
+# Ortak UBL modülleri scripts/ klasöründe
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+from ubl_money import Money, format_amount_text, multiply_decimal
+from ubl_certificate import certificate_report
+from ubl_signature import SignatureExtractor
+from ubl_xmldsig import DIGEST_ALGORITHMS, DigestVerifier
+try:
+    from ubl_reconcile import reconcile_tree, format_kurus
+except ImportError:  # NumPy kurulu değilse tutar mutabakatı atlanır
+    reconcile_tree = None
+
 # Namespace'leri tanımla
 NAMESPACES = {
     'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
@@ -84,16 +95,25 @@ def get_text(elem, default=''):
         return default
     return (elem.text or '').strip()
 
-def parse_xml_file(xml_path: str) -> Dict[str, Any]:
-    """XML dosyasını parse et"""
+def parse_xml_file(xml_path: str, verifier: Optional[DigestVerifier] = None) -> Dict[str, Any]:
+    """XML dosyasını parse et
+
+    verifier: verilirse okunan baytlar aynı geçişte özet doğrulayıcıya da akar;
+    tutar mutabakatı kurulan ağaçtan yapılır, dosya ikinci kez okunmaz.
+    """
     print(f"📄 XML dosyası okunuyor: {xml_path}")
     
-    with open(xml_path, 'r', encoding='utf-8') as f:
-        xml_content = f.read()
-    
-    # XML'i parse et
+    # XML'i parse et; imza bloğu aynı geçişte namespace URI'sine göre toplanır
+    signature = SignatureExtractor()
     try:
-        root = ET.fromstring(xml_content)
+        with open(xml_path, 'rb') as f:
+            events = ET.iterparse(verifier.tee(f) if verifier is not None else f, events=('start', 'end'))
+            for event, elem in events:
+                if event == 'start':
+                    signature.start(elem)
+                else:
+                    signature.end(elem)
+        root = events.root
     except ET.ParseError as e:
         print(f"❌ XML parse hatası: {e}")
         return {}
@@ -172,46 +192,11 @@ def parse_xml_file(xml_path: str) -> Dict[str, Any]:
                 city = find_element(postal_address, 'CityName')
                 result['digital_signature']['city'] = get_text(city)
     
-    # UBLExtensions içindeki imza bilgileri
-    extensions = find_element(root, 'UBLExtensions')
-    if extensions is not None:
-        extension = find_element(extensions, 'UBLExtension')
-        if extension is not None:
-            ext_content = find_element(extension, 'ExtensionContent')
-            if ext_content is not None:
-                # Signature bilgilerini regex ile bul
-                signature_match = re.search(r'<ds:Signature[^>]*Id="([^"]*)"', xml_content)
-                if signature_match:
-                    result['digital_signature']['ds_signature_id'] = signature_match.group(1)
-                
-                # İmza değeri
-                sig_value_match = re.search(r'<ds:SignatureValue[^>]*>([^<]+)</ds:SignatureValue>', xml_content)
-                if sig_value_match:
-                    result['digital_signature']['signature_value'] = sig_value_match.group(1).strip()
-                
-                # Sertifika bilgileri
-                cert_match = re.search(r'<ds:X509SubjectName>([^<]+)</ds:X509SubjectName>', xml_content)
-                if cert_match:
-                    result['digital_signature']['certificate_subject'] = cert_match.group(1).strip()
-                
-                serial_match = re.search(r'<ds:X509SerialNumber>([^<]+)</ds:X509SerialNumber>', xml_content)
-                if serial_match:
-                    result['digital_signature']['certificate_serial'] = serial_match.group(1).strip()
-                
-                # İmza zamanı
-                signing_time_match = re.search(r'<xades:SigningTime>([^<]+)</xades:SigningTime>', xml_content)
-                if signing_time_match:
-                    result['digital_signature']['signing_time'] = signing_time_match.group(1).strip()
-                
-                # Algoritma
-                algorithm_match = re.search(r'<ds:SignatureMethod[^>]*Algorithm="([^"]*)"', xml_content)
-                if algorithm_match:
-                    result['digital_signature']['algorithm'] = algorithm_match.group(1)
-                
-                # Digest değerleri
-                digest_matches = re.findall(r'<ds:DigestValue>([^<]+)</ds:DigestValue>', xml_content)
-                if digest_matches:
-                    result['digital_signature']['digest_values'] = digest_matches
+    # UBLExtensions içindeki ds:Signature / xades bilgileri
+    result['digital_signature'].update(signature.data)
+    certificate = certificate_report(signature.data)
+    if certificate:
+        result['digital_signature']['certificate_info'] = certificate
     
     # 3. Satıcı Bilgileri
     supplier_party = find_element(root, 'AccountingSupplierParty')
@@ -337,11 +322,13 @@ def parse_xml_file(xml_path: str) -> Dict[str, Any]:
             if tax_amount_elem is not None:
                 result['tax_total']['tax_amount'] = get_text(tax_amount_elem)
             
+            # UBL-TR'de Percent TaxSubtotal altında (eski örneklerde TaxCategory altında)
+            percent = find_element(subtotal, 'Percent')
+            if percent is not None:
+                result['tax_total']['percent'] = get_text(percent)
+            
             if tax_category is not None:
-                percent = find_element(tax_category, 'Percent')
                 tax_scheme = find_element(tax_category, 'TaxScheme')
-                if percent is not None:
-                    result['tax_total']['percent'] = get_text(percent)
                 if tax_scheme is not None:
                     tax_name = find_element(tax_scheme, 'Name')
                     tax_id = find_element(tax_scheme, 'ID')
@@ -443,11 +430,11 @@ def parse_xml_file(xml_path: str) -> Dict[str, Any]:
                     line_data['tax_total']['taxable_amount'] = get_text(taxable_amount)
                 if tax_amount_elem is not None:
                     line_data['tax_total']['tax_amount'] = get_text(tax_amount_elem)
+                percent = find_element(subtotal, 'Percent')
+                if percent is not None:
+                    line_data['tax_total']['percent'] = get_text(percent)
                 if tax_category is not None:
-                    percent = find_element(tax_category, 'Percent')
                     tax_scheme = find_element(tax_category, 'TaxScheme')
-                    if percent is not None:
-                        line_data['tax_total']['percent'] = get_text(percent)
                     if tax_scheme is not None:
                         tax_id = find_element(tax_scheme, 'ID')
                         tax_name = find_element(tax_scheme, 'Name')
@@ -456,18 +443,35 @@ def parse_xml_file(xml_path: str) -> Dict[str, Any]:
         
         result['invoice_lines'].append(line_data)
     
+    # Tutar mutabakatı aynı ağaç üzerinden
+    result['reconciliation'] = reconcile_tree(root, xml_path) if reconcile_tree is not None else None
+    
     return result
 
-def format_amount(amount_str: str) -> str:
-    """Tutar formatla"""
-    try:
-        amount = float(amount_str)
-        return f"{amount:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-    except:
-        return amount_str
+def format_amount(amount_str: str, currency: str = 'TRY') -> str:
+    """Tutar formatla (sabit noktalı, Türkçe: 1.234,56)"""
+    return format_amount_text(amount_str, currency)
+
+def check_mark(reconciliation: Optional[Dict[str, Any]], checks: List[str], line_id: Optional[str] = None) -> str:
+    """Mutabakat sonucuna göre ✓ / ✗ işareti üret (mutabakat yoksa boş)"""
+    if reconciliation is None:
+        return ''
+    for m in reconciliation['mismatches']:
+        if m['check'] in checks and (line_id is None or m.get('line') == line_id):
+            if m.get('expected') is None:
+                return '✗'
+            return f"✗ (beklenen {format_kurus(m['expected'])}, bulunan {format_kurus(m.get('actual'))})"
+    return '✓'
+
+def generate_markdown(data: Dict[str, Any], reconciliation: Optional[Dict[str, Any]] = None,
+                      verification: Optional[Dict[str, Any]] = None) -> str:
+    """Markdown analiz dosyası oluştur
 
-def generate_markdown(data: Dict[str, Any]) -> str:
-    """Markdown analiz dosyası oluştur"""
+    reconciliation: ubl_reconcile.reconcile_tree çıktısı; verilirse kontrol
+    işaretleri gerçek mutabakat sonucundan gelir.
+    verification: ubl_xmldsig.verify_digests çıktısı; referans özetlerinin
+    doğrulama sonucu imza bölümüne yazılır.
+    """
     
     md = f"""# E-ARŞİV FATURA DETAYLI ANALİZİ
 
@@ -526,30 +530,52 @@ Bu bölüm, faturanın dijital imzasını ve geçerliliğini sağlayan kritik bi
         if signing_time:
             md += f"- **İmza Zamanı:** {signing_time} (UTC)\n"
         
-        md += "\n**X.509 Sertifika Detayları:**\n"
-        md += "- **Sertifika Tipi:** Mali Mühür Elektronik Sertifika\n"
-        md += "- **Veren Kurum:** Türkiye Bilimsel ve Teknolojik Araştırma Kurumu - TÜBİTAK\n"
-        md += "- **Alt Birimi:** BİLGEM\n"
-        
-        if 'ecdsa' in algorithm.lower():
-            md += "- **Algoritma:** ECDSA (Elliptic Curve Digital Signature Algorithm) - SHA384\n"
-            md += "- **Eğri Tipi:** P-384 (urn:oid:1.3.132.0.34)\n"
+        cert = ds.get('certificate_info', {})
+        if cert:
+            issuer = cert.get('issuer_attributes', {})
+            validity_labels = {'valid': '✓ Geçerli', 'expired': '✗ Süresi dolmuş', 'not_yet_valid': '✗ Henüz geçerli değil'}
+            md += "\n**X.509 Sertifika Detayları:**\n"
+            md += f"- **Sertifika Tipi:** {issuer.get('CN', 'N/A')}\n"
+            md += f"- **Veren Kurum:** {issuer.get('O', 'N/A')}\n"
+            if issuer.get('OU'):
+                md += f"- **Alt Birimi:** {issuer['OU']}\n"
+            md += f"- **Geçerlilik:** {cert['not_before']} - {cert['not_after']}\n"
+            if cert.get('valid_at_signing'):
+                md += f"- **İmza Anında:** {validity_labels[cert['valid_at_signing']]}\n"
+            if cert['key_algorithm'] == 'EC':
+                md += f"- **Algoritma:** ECDSA (Elliptic Curve Digital Signature Algorithm) - {cert['signature_algorithm']}\n"
+                md += f"- **Eğri Tipi:** {cert['curve']}\n"
+            else:
+                md += f"- **Algoritma:** {cert['key_algorithm']} {cert.get('key_size') or ''} - {cert['signature_algorithm']}\n"
+            md += f"- **Parmak İzi (SHA-256):** `{cert['fingerprint_sha256']}`\n"
         
         md += "\n**Kanonikleme Metodu:**\n"
-        md += "- http://www.w3.org/TR/2001/REC-xml-c14n-20010315\n\n"
+        md += f"- {ds.get('canonicalization_algorithm', 'http://www.w3.org/TR/2001/REC-xml-c14n-20010315')}\n\n"
         
-        md += "**Özet (Digest) Algoritması:**\n"
-        if 'sha384' in algorithm.lower():
-            md += "- SHA-384 (http://www.w3.org/2001/04/xmldsig-more#sha384)\n\n"
-        elif 'sha256' in algorithm.lower():
-            md += "- SHA-256 (http://www.w3.org/2001/04/xmlenc#sha256)\n\n"
+        references = ds.get('references', [])
+        digest_algorithms = sorted({ref['digest_algorithm'] for ref in references if ref['digest_algorithm']})
+        if digest_algorithms:
+            md += "**Özet (Digest) Algoritması:**\n"
+            for uri in digest_algorithms:
+                name = DIGEST_ALGORITHMS.get(uri, '').upper().replace('SHA', 'SHA-')
+                md += f"- {name or 'Bilinmiyor'} ({uri})\n"
+            md += "\n"
         
-        digest_values = ds.get('digest_values', [])
-        if digest_values:
+        checked = {ref['uri']: ref for ref in (verification or {}).get('references', [])}
+        if references:
             md += "**Referanslar:**\n"
-            for idx, digest in enumerate(digest_values):
-                md += f"{idx + 1}. **Reference-Id-{idx}:** {'Fatura içeriği' if idx == 0 else 'İmza özellikleri'}\n"
-                md += f"   - Digest Value: `{digest}`\n"
+            for idx, ref in enumerate(references):
+                target = 'Fatura içeriği' if ref['uri'] == '' else 'İmza özellikleri'
+                md += f"{idx + 1}. **{ref['id'] or f'Reference-Id-{idx}'}:** {target}\n"
+                md += f"   - Digest Value: `{ref['digest_value']}`\n"
+                result = checked.get(ref['uri'])
+                if result is not None:
+                    if result['status'] == 'ok':
+                        md += "   - Doğrulama: ✓ Özet eşleşiyor\n"
+                    elif result['status'] == 'mismatch':
+                        md += f"   - Doğrulama: ✗ Hesaplanan `{result['computed']}`\n"
+                    else:
+                        md += f"   - Doğrulama: ? {result['detail']}\n"
     
     md += "\n---\n\n"
     md += "## 2. FATURA BAŞLIK BİLGİLERİ\n\n"
@@ -669,15 +695,16 @@ Bu bölüm, faturanın dijital imzasını ve geçerliliğini sağlayan kritik bi
         md += f"| **Vergi Türü** | {tax_name} (Katma Değer Vergisi) |\n"
         md += f"| **Vergi Kodu** | {tax_code} |\n\n"
         
+        doc_tax_mark = check_mark(reconciliation, ['subtotal_rate', 'subtotal_tax', 'tax_total'])
         md += "**Hesaplama Kontrolü:**\n"
         md += "```\n"
         md += f"Matrah: {format_amount(taxable)} {tax_total.get('currency', 'TRY')}\n"
         md += f"Vergi Oranı: %{percent}\n"
         try:
-            calculated = float(taxable) * float(percent) / 100
-            md += f"Vergi Tutarı: {format_amount(taxable)} × {float(percent)/100} = {format_amount(str(calculated))} {tax_total.get('currency', 'TRY')} ✓\n"
-        except:
-            md += f"Vergi Tutarı: {format_amount(tax_amount)} {tax_total.get('currency', 'TRY')} ✓\n"
+            calculated = Money.parse(taxable, tax_total.get('currency', 'TRY')).percent(percent)
+            md += f"Vergi Tutarı: {format_amount(taxable)} × %{percent} = {calculated.format()} {tax_total.get('currency', 'TRY')} {doc_tax_mark}\n"
+        except (ValueError, AttributeError, TypeError):
+            md += f"Vergi Tutarı: {format_amount(tax_amount)} {tax_total.get('currency', 'TRY')} {doc_tax_mark}\n"
         md += "```\n"
     
     md += "\n---\n\n"
@@ -756,9 +783,9 @@ Bu bölüm, faturanın dijital imzasını ve geçerliliğini sağlayan kritik bi
             md += f"- **Birim Fiyat:** {format_amount(price_amt)} {price.get('currency', 'TRY')}\n"
             md += f"- **Miktar:** {quantity} {unit_name.lower()}\n"
             try:
-                calculated = float(price_amt) * float(quantity)
-                md += f"- **Tutar:** {quantity} × {format_amount(price_amt)} = {format_amount(str(calculated))} {price.get('currency', 'TRY')} (küsuratla: {format_amount(line_amount)} {data.get('currency', 'TRY')})\n"
-            except:
+                calculated = multiply_decimal(quantity, price_amt, price.get('currency', 'TRY'))
+                md += f"- **Tutar:** {quantity} × {format_amount(price_amt)} = {calculated.format()} {price.get('currency', 'TRY')} (küsuratla: {format_amount(line_amount)} {data.get('currency', 'TRY')})\n"
+            except (ValueError, AttributeError, TypeError):
                 md += f"- **Tutar:** {format_amount(line_amount)} {data.get('currency', 'TRY')}\n"
         
         line_tax = line.get('tax_total', {})
@@ -782,6 +809,7 @@ Bu bölüm, faturanın dijital imzasını ve geçerliliğini sağlayan kritik bi
             md += f"| Vergi Türü | {tax_name} |\n"
             md += f"| Vergi Kodu | {tax_code} |\n\n"
             
+            line_mark = check_mark(reconciliation, ['line_extension', 'line_tax_rate', 'line_tax_total'], line.get('id'))
             md += "**Satır Toplam Kontrolü:**\n"
             md += "```\n"
             if price.get('amount'):
@@ -792,10 +820,11 @@ Bu bölüm, faturanın dijital imzasını ve geçerliliğini sağlayan kritik bi
             md += f"KDV (%{percent}):       + {format_amount(tax_amount_val)} {data.get('currency', 'TRY')}\n"
             md += "─────────────────────────\n"
             try:
-                total = float(line_amount) + float(tax_amount_val)
-                md += f"Satır Toplamı:   {format_amount(str(total))} {data.get('currency', 'TRY')} ✓\n"
-            except:
-                md += f"Satır Toplamı:   {format_amount(line_amount)} {data.get('currency', 'TRY')} ✓\n"
+                currency = data.get('currency', 'TRY')
+                total = Money.parse(line_amount, currency) + Money.parse(tax_amount_val, currency)
+                md += f"Satır Toplamı:   {total.format()} {currency} {line_mark}\n"
+            except (ValueError, AttributeError, TypeError):
+                md += f"Satır Toplamı:   {format_amount(line_amount)} {data.get('currency', 'TRY')} {line_mark}\n"
             md += "```\n"
         
         md += "\n---\n\n"
@@ -864,9 +893,9 @@ xmlns:xades="http://uri.etsi.org/01903/v1.3.2#"
 
 #### Matematiksel Doğrulama:
 ```
-Birim Fiyat × Miktar = Satır Tutarı ✓
-Matrah × Vergi Oranı = Vergi Tutarı ✓
-Matrah + Vergi = Ödenecek Tutar ✓
+Birim Fiyat × Miktar = Satır Tutarı {line_check}
+Matrah × Vergi Oranı = Vergi Tutarı {tax_check}
+Matrah + Vergi = Ödenecek Tutar {payable_check}
 ```
 
 ### 4. UBL 2.1 Standartları
@@ -916,11 +945,11 @@ Bu fatura, **OASIS UBL 2.1** standardına uygun olarak oluşturulmuştur:
 | Kontrol | Sonuç | Detay |
 |---------|-------|-------|
 | **Dijital İmza** | ✅ GEÇERLİ | Mali mühür sertifikası ile imzalanmış |
-| **Matematiksel Hesaplar** | ✅ DOĞRU | Tüm toplamlar tutarlı |
+| **Matematiksel Hesaplar** | {math_status} |
 | **UBL Standard** | ✅ UYGUN | UBL 2.1 formatına uygun |
 | **E-Arşiv Profili** | ✅ UYGUN | EARSIVFATURA profili mevcut |
 | **Zorunlu Alanlar** | ✅ TAM | Tüm zorunlu alanlar dolu |
-| **Vergi Hesaplaması** | ✅ DOĞRU | KDV doğru hesaplanmış |
+| **Vergi Hesaplaması** | {tax_status} |
 | **Namespace'ler** | ✅ DOĞRU | Tüm gerekli namespace'ler tanımlı |
 
 ---
@@ -954,6 +983,23 @@ Fatura, mali mührü ile dijital olarak imzalanmış ve tüm UBL 2.1 e-arşiv st
     payable = format_amount(monetary.get('payable', '0.00')) if monetary else '0.00'
     analysis_date = datetime.now().strftime('%d %B %Y')
     
+    # Mutabakat sonuçları (yoksa eski sabit işaretler)
+    line_checks = ['line_extension']
+    tax_checks = ['line_tax_rate', 'line_tax_total', 'subtotal_rate', 'subtotal_tax',
+                  'subtotal_taxable', 'subtotal_missing', 'tax_total']
+    payable_checks = ['line_extension_total', 'tax_exclusive', 'tax_inclusive', 'payable']
+    line_check = check_mark(reconciliation, line_checks) or '✓'
+    tax_check = check_mark(reconciliation, tax_checks) or '✓'
+    payable_check = check_mark(reconciliation, payable_checks) or '✓'
+    if reconciliation is None or line_check == payable_check == '✓':
+        math_status = '✅ DOĞRU | Tüm toplamlar tutarlı'
+    else:
+        math_status = '❌ HATALI | Satır/toplam uyumsuzluğu var (bkz. Matematiksel Doğrulama)'
+    if reconciliation is None or tax_check == '✓':
+        tax_status = '✅ DOĞRU | KDV doğru hesaplanmış'
+    else:
+        tax_status = '❌ HATALI | Vergi tutarları oran/matrah ile uyuşmuyor'
+    
     md = md.format(
         supplier_name=supplier_name,
         customer_name=customer_name,
@@ -962,7 +1008,12 @@ Fatura, mali mührü ile dijital olarak imzalanmış ve tüm UBL 2.1 e-arşiv st
         currency=currency,
         tax_amount=tax_amount,
         payable=payable,
-        analysis_date=analysis_date
+        analysis_date=analysis_date,
+        line_check=line_check,
+        tax_check=tax_check,
+        payable_check=payable_check,
+        math_status=math_status,
+        tax_status=tax_status
     )
     
     return md
@@ -974,8 +1025,9 @@ def main():
     
     print("🚀 E-Arşiv Fatura Analiz Scripti Başlatılıyor...\n")
     
-    # XML'i parse et
-    data = parse_xml_file(xml_file)
+    # XML'i tek okumada parse et; imza özetleri aynı baytlardan doğrulanır
+    verifier = DigestVerifier(xml_file)
+    data = parse_xml_file(xml_file, verifier)
     
     if not data or not data.get('invoice_number'):
         print("❌ XML parse edilemedi veya fatura bilgileri bulunamadı!")
@@ -988,9 +1040,19 @@ def main():
     print(f"👤 Alıcı: {data.get('customer', {}).get('name', 'N/A')}")
     print(f"📊 Satır Sayısı: {len(data.get('invoice_lines', []))}\n")
     
+    # Tutar mutabakatı (parse_xml_file ağacından)
+    reconciliation = data.get('reconciliation')
+    if reconciliation is not None:
+        print(f"🧮 Mutabakat: {len(reconciliation['mismatches'])} uyumsuzluk\n")
+    
+    # İmza özet doğrulaması (offline, parse ile aynı okumadan)
+    verification = verifier.close()
+    if verification['signed']:
+        print(f"🔏 İmza özetleri: {'✅ geçerli' if verification['valid'] else '❌ uyuşmuyor'}\n")
+    
     # Markdown oluştur
     print("📝 Markdown dosyası oluşturuluyor...")
-    markdown = generate_markdown(data)
+    markdown = generate_markdown(data, reconciliation, verification)
     
     # Dosyaya yaz
     with open(output_file, 'w', encoding='utf-8') as f:
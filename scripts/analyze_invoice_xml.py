@@ -7,10 +7,13 @@ ESG2026000000115 numaralı faturanın XML içeriğini detaylı analiz eder
 import xml.etree.ElementTree as ET
 from datetime import datetime
 import json
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 import sys
 import os
 
+from ubl_documents import INVOICE, LineStream, lookup_document_type
+from ubl_money import DEFAULT_CURRENCY, format_amount_text
+
 # Namespace'ler
 NAMESPACES = {
     'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
@@ -78,8 +81,11 @@ def parse_tax_info(tax_element) -> Dict[str, Any]:
     tax['tax_amount'] = find_text(tax_element, 'cbc:TaxAmount')
     return tax
 
-def parse_invoice_line(line_element, line_number: int) -> Dict[str, Any]:
-    """Fatura kalemini parse et"""
+def parse_invoice_line(line_element, line_number: int, quantity_tag: Optional[str] = INVOICE.quantity_tag) -> Dict[str, Any]:
+    """Fatura kalemini parse et (miktar etiketi belge tipine göre: InvoicedQuantity, CreditedQuantity...)
+
+    Miktarı olmayan belge tiplerinde (ApplicationResponse) quantity_tag None'dır; miktar aranmaz.
+    """
     line = {'line_number': line_number}
     
     # Kalem ID
@@ -92,7 +98,7 @@ def parse_invoice_line(line_element, line_number: int) -> Dict[str, Any]:
         line['note'] = note.text
     
     # Miktar
-    quantity = line_element.find('.//cbc:InvoicedQuantity', NAMESPACES)
+    quantity = line_element.find(quantity_tag) if quantity_tag is not None else None
     if quantity is not None:
         line['quantity'] = {
             'value': quantity.text,
@@ -121,8 +127,40 @@ def parse_invoice_line(line_element, line_number: int) -> Dict[str, Any]:
 def analyze_invoice_xml(xml_content: str) -> Dict[str, Any]:
     """XML'i parse edip analiz et"""
     root = ET.fromstring(xml_content)
+    # Kök elemente göre belge tipi (Invoice, CreditNote, DespatchAdvice...)
+    doc_type = lookup_document_type(root.tag) or INVOICE
+    analysis = analyze_root(root, doc_type)
+    
+    # ============ FATURA KALEMLERİ ============
+    line_number = 1
+    for line_element in root.iterfind(doc_type.line_tag):
+        line_data = parse_invoice_line(line_element, line_number, doc_type.quantity_tag)
+        analysis['lines'].append(line_data)
+        line_number += 1
     
+    return analysis
+
+def stream_invoice_xml(source) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """Başlık/toplam analizini hemen, kalemleri generator olarak döndür
+
+    Kalemler tek tek parse edilip bırakılır; bellek kalem sayısından bağımsızdır.
+    analysis['lines'] boş kalır, kalem sayısı analysis['line_count'] içindedir.
+    """
+    stream = LineStream(source)
+    analysis = analyze_root(stream.root, stream.doc_type)
+    analysis['line_count'] = stream.line_count
+    quantity_tag = stream.doc_type.quantity_tag
+    
+    def lines():
+        for line_number, line_element in enumerate(stream, 1):
+            yield parse_invoice_line(line_element, line_number, quantity_tag)
+    
+    return analysis, lines()
+
+def analyze_root(root, doc_type) -> Dict[str, Any]:
+    """Kalemler dışındaki tüm bölümleri (başlık, taraflar, toplamlar, ödeme, imza) analiz et"""
     analysis = {
+        'document_type': doc_type.name,
         'invoice_basic': {},
         'supplier': {},
         'customer': {},
@@ -140,7 +178,7 @@ def analyze_invoice_xml(xml_content: str) -> Dict[str, Any]:
         'invoice_number': find_text(root, 'cbc:InvoiceNumber'),
         'issue_date': find_text(root, 'cbc:IssueDate'),
         'issue_time': find_text(root, 'cbc:IssueTime'),
-        'invoice_type_code': find_text(root, 'cbc:InvoiceTypeCode'),
+        'invoice_type_code': find_text(root, f'cbc:{doc_type.name}TypeCode'),
         'document_currency_code': find_text(root, 'cbc:DocumentCurrencyCode'),
         'line_count_numeric': find_text(root, 'cbc:LineCountNumeric'),
         'profile_id': find_text(root, 'cbc:ProfileID'),
@@ -167,13 +205,6 @@ def analyze_invoice_xml(xml_content: str) -> Dict[str, Any]:
         'payable_rounding_amount': find_text(root, 'cac:LegalMonetaryTotal/cbc:PayableRoundingAmount'),
     }
     
-    # ============ FATURA KALEMLERİ ============
-    line_number = 1
-    for line_element in find_all(root, 'cac:InvoiceLine'):
-        line_data = parse_invoice_line(line_element, line_number)
-        analysis['lines'].append(line_data)
-        line_number += 1
-    
     # ============ KDV TOPLAM ============
     for tax_total in find_all(root, 'cac:TaxTotal'):
         tax_subtotals = find_all(tax_total, 'cac:TaxSubtotal')
@@ -274,13 +305,15 @@ def print_analysis(analysis: Dict[str, Any]):
     print("💰 FİNANSAL BİLGİLER")
     print("-" * 80)
     financial = analysis['financial']
-    print(f"  KDV Hariç Tutar: {financial.get('tax_exclusive_amount', '0')} TRY")
-    print(f"  KDV Dahil Tutar: {financial.get('tax_inclusive_amount', '0')} TRY")
-    print(f"  Ödenecek Tutar: {financial.get('payable_amount', '0')} TRY")
+    currency = basic.get('document_currency_code') or DEFAULT_CURRENCY
+    money = lambda value: f"{format_amount_text(value or '0', currency)} {currency}"
+    print(f"  KDV Hariç Tutar: {money(financial.get('tax_exclusive_amount'))}")
+    print(f"  KDV Dahil Tutar: {money(financial.get('tax_inclusive_amount'))}")
+    print(f"  Ödenecek Tutar: {money(financial.get('payable_amount'))}")
     if financial.get('allowance_total_amount'):
-        print(f"  İndirim Toplamı: {financial.get('allowance_total_amount')} TRY")
+        print(f"  İndirim Toplamı: {money(financial.get('allowance_total_amount'))}")
     if financial.get('charge_total_amount'):
-        print(f"  Ek Ücret Toplamı: {financial.get('charge_total_amount')} TRY")
+        print(f"  Ek Ücret Toplamı: {money(financial.get('charge_total_amount'))}")
     print()
     
     # KDV Detayları
@@ -291,8 +324,8 @@ def print_analysis(analysis: Dict[str, Any]):
         print(f"    Kategori: {tax.get('category', 'N/A')}")
         print(f"    Adı: {tax.get('name', 'N/A')}")
         print(f"    Oran: %{tax.get('percent', '0')}")
-        print(f"    Matrah: {tax.get('taxable_amount', '0')} TRY")
-        print(f"    KDV Tutarı: {tax.get('tax_amount', '0')} TRY")
+        print(f"    Matrah: {money(tax.get('taxable_amount'))}")
+        print(f"    KDV Tutarı: {money(tax.get('tax_amount'))}")
     print()
     
     # Fatura Kalemleri
@@ -308,11 +341,12 @@ def print_analysis(analysis: Dict[str, Any]):
             print(f"    Miktar: {qty.get('value', '0')} {qty.get('unit', '')}")
         if line.get('price'):
             price = line['price']
-            print(f"    Birim Fiyat: {price.get('amount', '0')} {price.get('currency', 'TRY')}")
-        print(f"    Kalem Tutarı: {line.get('line_extension_amount', '0')} TRY")
+            price_currency = price.get('currency') or currency
+            print(f"    Birim Fiyat: {format_amount_text(price.get('amount') or '0', price_currency)} {price_currency}")
+        print(f"    Kalem Tutarı: {money(line.get('line_extension_amount'))}")
         if line.get('taxes'):
             for tax in line['taxes']:
-                print(f"      KDV: %{tax.get('percent', '0')} - {tax.get('tax_amount', '0')} TRY")
+                print(f"      KDV: %{tax.get('percent', '0')} - {money(tax.get('tax_amount'))}")
         print()
     
     # Ödeme
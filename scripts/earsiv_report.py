@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+GİB eArsivVeri Rapor Okuyucu
+eArsivVeri rapor dosyalarını (baslik + tekrar eden fatura / serbestMeslekMakbuz
+/ mustahsilMakbuz kayıtları) iterparse ile akış halinde okur. Her kayıt tipli
+bir ReportEntry olarak üretilir ve hemen ardından bellekten bırakılır; yüzlerce
+MB'lık raporlar sabit bellekle işlenir. VKN ve gün bazında toplama desteklenir.
+"""
+
+import argparse
+import json
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from ubl_money import DEFAULT_CURRENCY, Money, format_minor
+
+# Kayıt elementi -> kayıt tipi
+ENTRY_KINDS = {
+    'fatura': 'fatura',
+    'serbestMeslekMakbuz': 'serbest_meslek_makbuz',
+    'mustahsilMakbuz': 'mustahsil_makbuz',
+    'faturaIptal': 'fatura_iptal',
+    'serbestMeslekMakbuzIptal': 'serbest_meslek_makbuz_iptal',
+    'mustahsilMakbuzIptal': 'mustahsil_makbuz_iptal',
+}
+
+# Belge numarası farklı kayıt tiplerinde farklı adla gelir
+NUMBER_TAGS = ('faturaNo', 'makbuzNo', 'belgeNo')
+
+# Toplamada kullanılabilecek alanlar
+AGGREGATE_KEYS = ('taxpayer_vkn', 'recipient_id', 'date', 'kind')
+
+
+class TaxDetail(NamedTuple):
+    """vergi / tevkifat satırı"""
+    code: str
+    rate: str
+    base: Optional[Money]
+    amount: Optional[Money]
+
+
+class ReportEntry(NamedTuple):
+    """eArsivVeri içindeki tek belge kaydı"""
+    kind: str
+    number: str
+    ettn: str
+    date: str
+    time: str
+    currency: str
+    total: Optional[Money]
+    payable: Optional[Money]
+    tax_total: Optional[Money]
+    taxes: Tuple[TaxDetail, ...]
+    withholdings: Tuple[TaxDetail, ...]
+    recipient_id: str
+    recipient_name: str
+    taxpayer_vkn: str
+
+    @property
+    def cancelled(self) -> bool:
+        return self.kind.endswith('_iptal')
+
+
+@lru_cache(maxsize=8)
+def _paths(ns: str) -> Dict[str, Any]:
+    """Namespace önekine göre önceden derlenmiş yollar"""
+    return {
+        'numbers': tuple(ns + tag for tag in NUMBER_TAGS),
+        'ettn': ns + 'ETTN',
+        'date': ns + 'belgeTarihi',
+        'time': ns + 'belgeZamani',
+        'currency': ns + 'paraBirimi',
+        'total': ns + 'toplamTutar',
+        'payable': ns + 'odenecekTutar',
+        'tax_total': f'{ns}vergiBilgisi/{ns}vergilerToplami',
+        'taxes': f'{ns}vergiBilgisi/{ns}vergi',
+        'withholdings': f'{ns}vergiBilgisi/{ns}tevkifat',
+        'tax_fields': (ns + 'vergiKodu', ns + 'vergiOrani', ns + 'matrah', ns + 'vergiTutari'),
+        'withholding_fields': (ns + 'tevkifatKodu', ns + 'tevkifatOrani', None, ns + 'tevkifatTutari'),
+        'recipient_ids': (f'{ns}aliciBilgileri/{ns}gercekKisi/{ns}tckn',
+                          f'{ns}aliciBilgileri/{ns}tuzelKisi/{ns}vkn',
+                          f'{ns}aliciBilgileri/{ns}vkn'),
+        'recipient_names': (f'{ns}aliciBilgileri/{ns}gercekKisi/{ns}adiSoyadi',
+                            f'{ns}aliciBilgileri/{ns}tuzelKisi/{ns}unvan',
+                            f'{ns}aliciBilgileri/{ns}unvan'),
+        'taxpayer_vkn': (f'{ns}mukellef/{ns}vkn', f'{ns}mukellef/{ns}tckn'),
+    }
+
+
+def _text(elem, path: Optional[str]) -> str:
+    if path is None:
+        return ''
+    return (elem.findtext(path) or '').strip()
+
+
+def _first(elem, paths: Sequence[str]) -> str:
+    for path in paths:
+        value = _text(elem, path)
+        if value:
+            return value
+    return ''
+
+
+def _money(text: str, currency: str) -> Optional[Money]:
+    if not text:
+        return None
+    try:
+        return Money.parse(text, currency)
+    except ValueError:
+        return None
+
+
+def _details(elem, path: str, fields, currency: str) -> Tuple[TaxDetail, ...]:
+    code, rate, base, amount = fields
+    return tuple(
+        TaxDetail(_text(item, code), _text(item, rate),
+                  _money(_text(item, base), currency), _money(_text(item, amount), currency))
+        for item in elem.iterfind(path)
+    )
+
+
+def _read_entry(elem, kind: str, paths: Dict[str, Any], taxpayer_vkn: str) -> ReportEntry:
+    currency = _text(elem, paths['currency']) or DEFAULT_CURRENCY
+    return ReportEntry(
+        kind=kind,
+        number=_first(elem, paths['numbers']),
+        ettn=_text(elem, paths['ettn']),
+        date=_text(elem, paths['date']),
+        time=_text(elem, paths['time']),
+        currency=currency,
+        total=_money(_text(elem, paths['total']), currency),
+        payable=_money(_text(elem, paths['payable']), currency),
+        tax_total=_money(_text(elem, paths['tax_total']), currency),
+        taxes=_details(elem, paths['taxes'], paths['tax_fields'], currency),
+        withholdings=_details(elem, paths['withholdings'], paths['withholding_fields'], currency),
+        recipient_id=_first(elem, paths['recipient_ids']),
+        recipient_name=_first(elem, paths['recipient_names']),
+        taxpayer_vkn=taxpayer_vkn,
+    )
+
+
+def iter_report(path: str) -> Iterator[ReportEntry]:
+    """Rapor kayıtlarını sırayla üret; her kayıt üretildikten sonra bırakılır"""
+    root = None
+    paths: Dict[str, Any] = {}
+    taxpayer_vkn = ''
+    depth = 0
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if root is None:
+                root = elem
+                tag = elem.tag
+                paths = _paths(tag[:tag.find('}') + 1] if tag.startswith('{') else '')
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        tag = elem.tag
+        local = tag[tag.rfind('}') + 1:]
+        kind = ENTRY_KINDS.get(local)
+        if kind is not None:
+            yield _read_entry(elem, kind, paths, taxpayer_vkn)
+        elif local == 'baslik':
+            taxpayer_vkn = _first(elem, paths['taxpayer_vkn'])
+        elem.clear()
+        del root[:]
+
+
+def iter_reports(paths: Iterable[str]) -> Iterator[ReportEntry]:
+    for path in paths:
+        yield from iter_report(str(path))
+
+
+def aggregate(entries: Iterable[ReportEntry], keys: Sequence[str] = ('taxpayer_vkn', 'date')) -> Dict[tuple, Dict[str, int]]:
+    """Kayıtları verilen alanlar (+ para birimi) bazında topla; tutarlar alt birim (kuruş)
+
+    İptal kayıtları tutarlara katılmaz, yalnızca 'cancelled' sayacında görünür.
+    Bellek kullanımı kayıt sayısına değil grup sayısına bağlıdır.
+    """
+    groups: Dict[tuple, Dict[str, int]] = {}
+    for entry in entries:
+        key = tuple(getattr(entry, name) for name in keys) + (entry.currency,)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {'count': 0, 'cancelled': 0, 'total': 0, 'payable': 0,
+                                   'tax_total': 0, 'withholding': 0}
+        if entry.cancelled:
+            group['cancelled'] += 1
+            continue
+        group['count'] += 1
+        if entry.total is not None:
+            group['total'] += entry.total.minor
+        if entry.payable is not None:
+            group['payable'] += entry.payable.minor
+        if entry.tax_total is not None:
+            group['tax_total'] += entry.tax_total.minor
+        group['withholding'] += sum(w.amount.minor for w in entry.withholdings if w.amount is not None)
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GİB eArsivVeri rapor okuyucu ve toplayıcı')
+    parser.add_argument('files', nargs='*', default=['E-ARSIV ENTEGRASYON TEST/SELF_EMPLOYMENT_RECEIPT.XML'])
+    parser.add_argument('--by', default='taxpayer_vkn,date',
+                        help=f"Toplama alanları (virgülle): {', '.join(AGGREGATE_KEYS)}")
+    parser.add_argument('--output', help='Toplamları JSON olarak kaydet')
+    args = parser.parse_args()
+
+    keys = [k.strip() for k in args.by.split(',') if k.strip()]
+    unknown = [k for k in keys if k not in AGGREGATE_KEYS]
+    if unknown:
+        parser.error(f"Bilinmeyen toplama alanı: {', '.join(unknown)}")
+
+    print(f"🔍 {len(args.files)} rapor okunuyor...")
+    groups = aggregate(iter_reports(args.files), keys)
+
+    print(f"\n📊 {' / '.join(keys)} bazında toplamlar")
+    print("-" * 80)
+    for key in sorted(groups):
+        group = groups[key]
+        label = ' / '.join(key[:-1])
+        cancelled = f" (+{group['cancelled']} iptal)" if group['cancelled'] else ''
+        print(f"  {label} [{key[-1]}]: {group['count']} belge{cancelled}, "
+              f"toplam {format_minor(group['total'])}, vergi {format_minor(group['tax_total'])}, "
+              f"ödenecek {format_minor(group['payable'])}")
+
+    if args.output:
+        rows = [dict(zip(keys + ['currency'], key), **group) for key, group in sorted(groups.items())]
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Toplamlar kaydedildi: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
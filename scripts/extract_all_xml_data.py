@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
 """
 XML'deki TÜM verileri çıkar ve mapping için liste oluştur
+
+Eşik (varsayılan 1024 karakter) üstündeki metin değerleri (gömülü base64 XSLT,
+imza değerleri, sertifikalar) çıktıya uzunluk + sha256 + kısa önek olarak yazılır;
+istenirse tam değerler yan dosyaya (JSON Lines, hash başına bir kez) aktarılır.
 """
 
-import xml.etree.ElementTree as ET
+import argparse
+import hashlib
 import json
+import re
+import sys
 from collections import defaultdict
+from typing import Dict, Optional
+from xml.parsers import expat
 
 # Namespace'ler
 NAMESPACES = {
@@ -16,76 +25,350 @@ NAMESPACES = {
     'xades': 'http://uri.etsi.org/01903/v1.3.2#',
 }
 
-def get_all_elements(root, path='', elements_dict=None):
-    """Tüm elementleri recursive olarak topla"""
+# Bu uzunluğu aşan metinler özetlenir (0 / None = sınırsız)
+MAX_VALUE_SIZE = 1024
+PREFIX_SIZE = 64
+READ_BLOCK = 1 << 16
+
+
+class ValueSpill:
+    """Özetlenen büyük değerlerin tamamını JSON Lines yan dosyasına yazar (aynı içerik bir kez)
+
+    Değer parça parça yazılır; bittiğinde hash daha önce görülmüşse kayıt geri alınır.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.written = set()
+        self._file = open(path, 'w', encoding='utf-8')
+        self._start = 0
+
+    def begin(self, path: str):
+        self._start = self._file.tell()
+        self._file.write('{"path": ' + json.dumps(path, ensure_ascii=False) + ', "value": "')
+
+    def write(self, chunk: str):
+        self._file.write(json.dumps(chunk, ensure_ascii=False)[1:-1])
+
+    def finish(self, digest: str):
+        if digest in self.written:
+            self._file.seek(self._start)
+            self._file.truncate()
+        else:
+            self.written.add(digest)
+            self._file.write(f'", "sha256": "{digest}"}}\n')
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _TextValue:
+    """Element metnini parça parça biriktirir (baş / son boşluklar atılır)
+
+    Eşiğe kadar metin tutulur; aşıldığında yalnızca önek, uzunluk ve artımlı sha256
+    kalır, sonraki parçalar (varsa) doğrudan yan dosyaya akar.
+    """
+    __slots__ = ('path', 'limit', 'spill', 'parts', 'size', 'pending', 'prefix', 'hasher')
+
+    def __init__(self, path: str, limit: Optional[int], spill: Optional[ValueSpill]):
+        self.path = path
+        self.limit = limit
+        self.spill = spill
+        self.parts = []
+        self.size = 0
+        self.pending = None   # Son boşluk: ardından metin gelirse değere katılır
+        self.prefix = None
+        self.hasher = None
+
+    def feed(self, data: str):
+        if self.pending is None:
+            data = data.lstrip()
+            if not data:
+                return
+            self.pending = ''
+        body = data.rstrip()
+        if not body:
+            self.pending += data
+            return
+        chunk = self.pending + body if self.pending else body
+        self.pending = data[len(body):]
+        self.size += len(chunk)
+        if self.hasher is not None:
+            self.hasher.update(chunk.encode('utf-8'))
+            if self.spill is not None:
+                self.spill.write(chunk)
+            return
+        self.parts.append(chunk)
+        if self.limit and self.size > self.limit:
+            text = ''.join(self.parts)
+            self.parts = None
+            self.prefix = text[:PREFIX_SIZE]
+            self.hasher = hashlib.sha256(text.encode('utf-8'))
+            if self.spill is not None:
+                self.spill.begin(self.path)
+                self.spill.write(text)
+
+    def entry(self, namespace: str, attrib, tag: str) -> Optional[Dict]:
+        """Path kaydı; metin yoksa None"""
+        if self.hasher is not None:
+            digest = self.hasher.hexdigest()
+            entry = {'value': self.prefix + '…', 'namespace': namespace, 'length': self.size, 'sha256': digest}
+            if self.spill is not None:
+                self.spill.finish(digest)
+                entry['spill'] = self.spill.path
+        elif self.size:
+            entry = {'value': ''.join(self.parts), 'namespace': namespace}
+        else:
+            return None
+        if attrib:
+            entry['attributes'] = attrib
+        entry['full_tag'] = tag
+        return entry
+
+
+def get_all_elements(root, path='', elements_dict=None, max_value_size=None, spill=None):
+    """Tüm elementleri iteratif olarak (açık yığınla) topla
+
+    Her benzersiz path bir kez oluşturulup (üst path id, tag) -> path id
+    tablosunda tutulur; namespace / yerel ad ayrımı da yalnızca bu ilk seferde yapılır.
+    Attribute sözlüğü yalnızca boş değilse kaydedilir. Derinlik recursion
+    limitine takılmaz. max_value_size verilirse uzun değerler özetlenir.
+    """
     if elements_dict is None:
         elements_dict = defaultdict(list)
     
-    # Mevcut element bilgilerini kaydet
-    tag = root.tag
-    # Namespace'i temizle
-    clean_tag = tag.split('}')[-1] if '}' in tag else tag
-    namespace = tag.split('}')[0][1:] if '}' in tag else ''
+    nodes = {}        # (üst path id, tag) -> (path id, tam path, namespace)
+    paths = [path]    # path id -> tam path (intern edilmiş); 0 = başlangıç path'i
     
-    full_path = f"{path}/{clean_tag}" if path else clean_tag
-    
-    # Text içeriği varsa kaydet
-    if root.text and root.text.strip():
-        elements_dict[full_path].append({
-            'value': root.text.strip(),
-            'namespace': namespace,
-            'attributes': dict(root.attrib),
-            'full_tag': tag
-        })
-    
-    # Alt elementleri recursive olarak işle
-    for child in root:
-        get_all_elements(child, full_path, elements_dict)
+    # Her seviyede alt element iteratörü + o seviyenin path id'si
+    iterators = [iter((root,))]
+    parent_ids = [0]
+    while iterators:
+        parent_id = parent_ids[-1]
+        for elem in iterators[-1]:
+            tag = elem.tag
+            node = nodes.get((parent_id, tag))
+            if node is None:
+                if '}' in tag:
+                    namespace, _, clean_tag = tag[1:].partition('}')
+                else:
+                    namespace, clean_tag = '', tag
+                parent_path = paths[parent_id]
+                full_path = sys.intern(f"{parent_path}/{clean_tag}" if parent_path else clean_tag)
+                node = nodes[(parent_id, tag)] = (len(paths), full_path, namespace)
+                paths.append(full_path)
+            
+            # Text içeriği varsa kaydet
+            text = elem.text
+            if text:
+                text = text.strip()
+                if text:
+                    if max_value_size and len(text) > max_value_size:
+                        value = _TextValue(node[1], max_value_size, spill)
+                        value.feed(text)
+                        entry = value.entry(node[2], elem.attrib, tag)
+                    else:
+                        entry = {'value': text, 'namespace': node[2]}
+                        if elem.attrib:
+                            entry['attributes'] = elem.attrib
+                        entry['full_tag'] = tag
+                    elements_dict[node[1]].append(entry)
+            
+            # Alt elementlere in; bu seviyenin iteratörü kaldığı yerden devam eder
+            if len(elem):
+                iterators.append(iter(elem))
+                parent_ids.append(node[0])
+                break
+        else:
+            iterators.pop()
+            parent_ids.pop()
     
     return elements_dict
 
-def extract_all_data(xml_file):
-    """XML'deki tüm verileri çıkar"""
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-    
-    all_data = get_all_elements(root)
-    
-    # Kategorilere ayır
-    categories = {
-        'invoice_basic': [],
-        'supplier': [],
-        'customer': [],
-        'financial': [],
-        'lines': [],
-        'taxes': [],
-        'payment': [],
-        'delivery': [],
-        'signature': [],
-        'other': []
-    }
+
+class _PathCollector:
+    """expat olaylarından get_all_elements ile aynı path kayıtlarını üretir (ağaç kurulmaz)
+
+    Yalnızca elementin ilk alt elementinden önceki metin (ElementTree .text) toplanır.
+    Path sırası get_all_elements ile aynıdır: metinli ilk elementin açılış sırası.
+    """
+
+    def __init__(self, max_value_size: Optional[int], spill: Optional[ValueSpill]):
+        self.limit = max_value_size
+        self.spill = spill
+        self.nodes = {}
+        self.paths = ['']
+        self.found = {}     # tam path -> (ilk metinli elementin açılış sırası, kayıtlar)
+        self.stack = []     # [node, açılış sırası, tag, attrib, _TextValue / None]
+        self.opened = 0
+        self.parser = expat.ParserCreate(namespace_separator='}')
+        self.parser.buffer_text = True
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = self.end
+        self.parser.CharacterDataHandler = self.text
+
+    def _close_text(self, frame):
+        value = frame[4]
+        if value is not None:
+            frame[4] = None
+            entry = value.entry(frame[0][2], frame[3], frame[2])
+            if entry is not None:
+                bucket = self.found.get(frame[0][1])
+                if bucket is None:
+                    bucket = self.found[frame[0][1]] = (frame[1], [])
+                bucket[1].append(entry)
+
+    def start(self, name, attrs):
+        stack = self.stack
+        if stack:
+            # Üst elementin .text kısmı ilk alt elementte biter
+            self._close_text(stack[-1])
+            parent_id = stack[-1][0][0]
+        else:
+            parent_id = 0
+        tag = '{' + name if '}' in name else name
+        node = self.nodes.get((parent_id, tag))
+        if node is None:
+            if '}' in name:
+                namespace, _, clean_tag = name.partition('}')
+            else:
+                namespace, clean_tag = '', name
+            parent_path = self.paths[parent_id]
+            full_path = sys.intern(f"{parent_path}/{clean_tag}" if parent_path else clean_tag)
+            node = self.nodes[(parent_id, tag)] = (len(self.paths), full_path, namespace)
+            self.paths.append(full_path)
+        if attrs:
+            attrs = {('{' + k if '}' in k else k): v for k, v in attrs.items()}
+        stack.append([node, self.opened, tag, attrs, _TextValue(node[1], self.limit, self.spill)])
+        self.opened += 1
+
+    def text(self, data):
+        value = self.stack[-1][4] if self.stack else None
+        if value is not None:
+            value.feed(data)
+
+    def end(self, name):
+        self._close_text(self.stack.pop())
+
+    def elements(self):
+        elements_dict = defaultdict(list)
+        for full_path, (_, entries) in sorted(self.found.items(), key=lambda item: item[1][0]):
+            elements_dict[full_path] = entries
+        return elements_dict
+
+
+def stream_all_elements(xml_file, max_value_size=MAX_VALUE_SIZE, spill=None):
+    """get_all_elements'in akış sürümü: ağaç ve büyük metinler bellekte tutulmaz"""
+    collector = _PathCollector(max_value_size, spill)
+    with open(xml_file, 'rb') as f:
+        while True:
+            block = f.read(READ_BLOCK)
+            collector.parser.Parse(block, not block)
+            if not block:
+                break
+    return collector.elements()
+
+# Kategori kuralları: öncelik sırasıyla (kategori, path'te aranan küçük harf parçalar)
+CATEGORY_RULES = [
+    ('supplier', ['supplier', 'accountingsupplier']),
+    ('customer', ['customer', 'accountingcustomer']),
+    ('lines', ['line', 'invoiceline']),
+    ('taxes', ['tax', 'taxable', 'taxamount']),
+    ('payment', ['payment', 'payable', 'monetary']),
+    ('delivery', ['delivery', 'deliveryterms']),
+    ('signature', ['signature', 'signing']),
+    ('invoice_basic', ['id', 'uuid', 'number', 'date', 'time', 'type', 'currency', 'profile']),
+]
+
+# Çıktıdaki kategori sırası (financial kural içermez, geriye uyumluluk için tutulur)
+CATEGORY_ORDER = ['invoice_basic', 'supplier', 'customer', 'financial', 'lines', 'taxes',
+                  'payment', 'delivery', 'signature', 'other']
+DEFAULT_CATEGORY = 'other'
+
+
+class PathClassifier:
+    """Kategori kurallarını tek bir regex'e derler; sonuçları path başına saklar
+
+    Her konumda lookahead ile kuralların alternasyonu denenir; aynı konumda
+    başlayan parçalardan öncelikli kuralınki seçilir, tüm konumlar içinden en
+    öncelikli kategori kazanır (eski any(...) zinciriyle aynı sonuç).
+    """
+
+    def __init__(self, rules=None, default: str = DEFAULT_CATEGORY, order=None):
+        rules = CATEGORY_RULES if rules is None else rules
+        self.default = default
+        self._names = [name for name, _ in rules]
+        groups = []
+        for index, (_, keywords) in enumerate(rules):
+            # Uzun parçalar önce: aynı konumda aynı kuralın en uzun eşleşmesi
+            words = sorted({k.lower() for k in keywords if k}, key=len, reverse=True)
+            if words:
+                groups.append(f"(?P<r{index}>{'|'.join(map(re.escape, words))})")
+        self._pattern = re.compile(f"(?=(?:{'|'.join(groups)}))") if groups else None
+        order = order or CATEGORY_ORDER
+        self.categories = [name for name in order if name != default]
+        self.categories += [name for name in self._names if name not in self.categories]
+        self.categories.append(default)
+        self._memo: Dict[str, str] = {}
+
+    def classify(self, path: str) -> str:
+        category = self._memo.get(path)
+        if category is None:
+            category = self._memo[path] = self._match(path)
+        return category
+
+    def _match(self, path: str) -> str:
+        if self._pattern is None:
+            return self.default
+        best = None
+        for match in self._pattern.finditer(path.lower()):
+            index = int(match.lastgroup[1:])
+            if best is None or index < best:
+                best = index
+                if index == 0:
+                    break
+        return self.default if best is None else self._names[best]
+
+
+def load_category_rules(path: str):
+    """JSON kural dosyası ({"kategori": ["parça", ...], ...}) ile varsayılan kuralları genişlet
+
+    Dosyadaki kategoriler dosya sırasıyla varsayılanlardan önce denenir; aynı adlı
+    varsayılan kuralın yerini alır. Boş liste kategoriyi devre dışı bırakır.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        custom = json.load(f)
+    rules = [(name, keywords) for name, keywords in custom.items() if keywords]
+    rules += [(name, keywords) for name, keywords in CATEGORY_RULES if name not in custom]
+    return rules
+
+
+_default_classifier: Optional[PathClassifier] = None
+
+
+def default_classifier() -> PathClassifier:
+    """Süreç genelinde paylaşılan (memo'su korunan) varsayılan sınıflandırıcı"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = PathClassifier()
+    return _default_classifier
+
+
+def extract_all_data(xml_file, max_value_size=MAX_VALUE_SIZE, spill=None, classifier=None):
+    """XML'deki tüm verileri çıkar (akış halinde; büyük değerler özetlenir)"""
+    all_data = stream_all_elements(xml_file, max_value_size, spill)
     
+    # Kategorilere ayır (her farklı path süreç başına bir kez sınıflandırılır)
+    classifier = classifier or default_classifier()
+    categories = {name: [] for name in classifier.categories}
     for path, values in all_data.items():
-        path_lower = path.lower()
-        
-        if any(x in path_lower for x in ['supplier', 'accountingsupplier']):
-            categories['supplier'].append((path, values))
-        elif any(x in path_lower for x in ['customer', 'accountingcustomer']):
-            categories['customer'].append((path, values))
-        elif any(x in path_lower for x in ['line', 'invoiceline']):
-            categories['lines'].append((path, values))
-        elif any(x in path_lower for x in ['tax', 'taxable', 'taxamount']):
-            categories['taxes'].append((path, values))
-        elif any(x in path_lower for x in ['payment', 'payable', 'monetary']):
-            categories['payment'].append((path, values))
-        elif any(x in path_lower for x in ['delivery', 'deliveryterms']):
-            categories['delivery'].append((path, values))
-        elif any(x in path_lower for x in ['signature', 'signing']):
-            categories['signature'].append((path, values))
-        elif any(x in path_lower for x in ['id', 'uuid', 'number', 'date', 'time', 'type', 'currency', 'profile']):
-            categories['invoice_basic'].append((path, values))
-        else:
-            categories['other'].append((path, values))
+        categories[classifier.classify(path)].append((path, values))
     
     return categories, all_data
 
@@ -99,18 +382,34 @@ def print_category(category_name, items):
         print(f"\n📍 Path: {path}")
         for i, val in enumerate(values, 1):
             print(f"  [{i}] Değer: {val['value']}")
+            if 'length' in val:
+                print(f"      Uzunluk: {val['length']:,} karakter, sha256: {val['sha256']}")
             if val.get('attributes'):
                 print(f"      Attributes: {val['attributes']}")
             if val.get('namespace'):
                 print(f"      Namespace: {val['namespace']}")
 
 def main():
-    xml_file = 'scripts/invoice_esg2026000000115.xml'
+    parser = argparse.ArgumentParser(description="XML'deki tüm path / değerleri çıkar")
+    parser.add_argument('file', nargs='?', default='scripts/invoice_esg2026000000115.xml')
+    parser.add_argument('--output', default='scripts/xml_all_data_mapping.json')
+    parser.add_argument('--max-value-size', type=int, default=MAX_VALUE_SIZE,
+                        help=f'Bu uzunluğu aşan değerler özetlenir (0 = sınırsız, varsayılan {MAX_VALUE_SIZE})')
+    parser.add_argument('--spill', help='Özetlenen değerlerin tamamını yazılacak JSON Lines dosyası')
+    parser.add_argument('--categories', help='Ek / değiştirilen kategori kuralları (JSON: {"kategori": ["parça", ...]})')
+    args = parser.parse_args()
+    xml_file = args.file
     
     print("🔍 XML'deki TÜM veriler çıkarılıyor...")
     print()
     
-    categories, all_data = extract_all_data(xml_file)
+    spill = ValueSpill(args.spill) if args.spill else None
+    try:
+        classifier = PathClassifier(load_category_rules(args.categories)) if args.categories else None
+        categories, all_data = extract_all_data(xml_file, args.max_value_size, spill, classifier)
+    finally:
+        if spill is not None:
+            spill.close()
     
     # Kategorilere göre yazdır
     for cat_name, items in categories.items():
@@ -136,13 +435,15 @@ def main():
         output['all_paths'][path] = [v['value'] for v in values]
     
     # JSON'a kaydet
-    with open('scripts/xml_all_data_mapping.json', 'w', encoding='utf-8') as f:
+    with open(args.output, 'w', encoding='utf-8') as f:
         json.dump(output, f, ensure_ascii=False, indent=2)
     
     print(f"\n{'='*80}")
     print("✅ Tüm veriler çıkarıldı!")
     print(f"📊 Toplam {len(all_data)} farklı path bulundu")
-    print(f"💾 Detaylı mapping JSON'a kaydedildi: scripts/xml_all_data_mapping.json")
+    print(f"💾 Detaylı mapping JSON'a kaydedildi: {args.output}")
+    if spill is not None:
+        print(f"💾 {len(spill.written)} büyük değer yan dosyaya yazıldı: {args.spill}")
     print('='*80)
     
     # Özet tablo
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+ÖKC Rapor (Z / Aylık Satış) Yükleyici
+Eski nesil (OknEskiNesilVeri - M_RAPOR_DATA_*.xml) ve yeni nesil
+(OknYeniNesilVeri - YM_RAPOR_DATA_*.xml) ÖKC raporlarını kolon bazlı NumPy
+dizilerine yükler. VKN, sicil no, vergi adı ve belge tipi gibi metinler sözlük
+kodlamasıyla tamsayıya çevrilir; tutarlar kuruş cinsinden int64 tutulur.
+VKN / dönem / ÖKC / vergi oranı bazındaki toplamlar vektörel group-by ile
+hesaplanır, binlerce rapor saniyeler içinde özetlenir.
+
+Kullanım:
+    python scripts/okc_report.py "E-ARSIV ENTEGRASYON TEST"/*RAPOR_DATA_*.xml
+    python scripts/okc_report.py --workers 4 --by vkn,year,period okc/*.xml
+"""
+
+import argparse
+import glob
+import json
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ubl_money import format_minor, parse_scaled
+
+AMOUNT_DIGITS = 2      # Tutarlar kuruş cinsinden
+RATE_DIGITS = 2        # Vergi yüzdesi %0.01 hassasiyetinde
+
+# Eksik alan işareti (int64 en küçük değer)
+MISSING = np.iinfo(np.int64).min
+
+# Kök element -> format kodu
+FORMATS = {'OknEskiNesilVeri': 0, 'OknYeniNesilVeri': 1}
+FORMAT_NAMES = ['eski_nesil', 'yeni_nesil']
+
+# Yeni nesil tip/tutar blokları -> grup kodu
+AMOUNT_GROUPS = {'belgeTutar': 0, 'odemeTuruTutar': 1, 'bilgiFis': 2}
+AMOUNT_GROUP_NAMES = ['belge', 'odeme', 'bilgi_fis']
+
+# Rapor satışının alınacağı vergi (yeni nesilde satış oranlara göre bu vergi altında dağıtılır)
+SALES_TAX = 'KDV'
+
+# Sözlük kodlamalı kolonlar
+DICT_COLUMNS = ('vkn', 'register', 'tax', 'kind')
+
+TABLES = {
+    'reports': ('format', 'vkn', 'year', 'period', 'day', 'register', 'sales'),
+    'taxes': ('report', 'tax', 'amount'),
+    'rates': ('report', 'tax', 'rate', 'sales'),
+    'amounts': ('report', 'group', 'kind', 'amount', 'count'),
+}
+
+
+def _local(tag: str) -> str:
+    return tag[tag.rfind('}') + 1:]
+
+
+def _children(elem) -> Dict[str, Any]:
+    """Doğrudan çocuklar: yerel ad -> ilk element"""
+    out = {}
+    for child in elem:
+        out.setdefault(_local(child.tag), child)
+    return out
+
+
+def _text(elem) -> str:
+    return (elem.text or '').strip() if elem is not None else ''
+
+
+class _ColumnBuilder:
+    """Rapor dosyalarını kolon listelerine ekler"""
+
+    def __init__(self):
+        self.files: List[str] = []
+        self.report_numbers: List[str] = []
+        self.tables = {name: {col: [] for col in cols} for name, cols in TABLES.items()}
+        self.dicts: Dict[str, Dict[str, int]] = {name: {} for name in DICT_COLUMNS}
+        self.errors: List[Dict[str, Any]] = []
+        self._file = ''
+
+    def _code(self, column: str, value: str) -> int:
+        codes = self.dicts[column]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+        return code
+
+    def _scaled(self, elem, digits: int = AMOUNT_DIGITS) -> int:
+        text = _text(elem)
+        if not text:
+            return MISSING
+        try:
+            return parse_scaled(text, digits)[0]
+        except ValueError as e:
+            self.errors.append({'file': self._file, 'detail': str(e)})
+            return MISSING
+
+    def _int(self, elem) -> int:
+        text = _text(elem)
+        return int(text) if text.isdigit() else MISSING
+
+    def _append(self, table: str, **values):
+        columns = self.tables[table]
+        for name, value in values.items():
+            columns[name].append(value)
+
+    def add_file(self, path: str):
+        """Tek rapor dosyasını ekle (raporlar küçük olduğu için tam parse)"""
+        self._file = path
+        root = ET.parse(path).getroot()
+        fmt = FORMATS.get(_local(root.tag))
+        if fmt is None:
+            self.errors.append({'file': path, 'detail': f"Desteklenmeyen kök: {_local(root.tag)}"})
+            return
+        fields = _children(root)
+        report = len(self.files)
+        self.files.append(path)
+
+        if fmt == 0:
+            register = _text(fields.get('okcSicilNo'))
+            self.report_numbers.append(_text(fields.get('okcRaporNo')))
+            sales = self._scaled(fields.get('satisTutar'))
+            for child in root:
+                if _local(child.tag) == 'vergi':
+                    tax = _children(child)
+                    self._append('taxes', report=report, tax=self._code('tax', _text(tax.get('vergiAdi'))),
+                                 amount=self._scaled(tax.get('vergiTutar')))
+        else:
+            okc = fields.get('okc')
+            register = _text(okc.find('sicilNo')) if okc is not None else ''
+            self.report_numbers.append(_text(fields.get('okcAylikSatisRaporNo')))
+            sales = MISSING
+            for child in root:
+                local = _local(child.tag)
+                if local == 'satis':
+                    sales = self._add_sales(child, report, sales)
+                elif local in AMOUNT_GROUPS:
+                    item = _children(child)
+                    count = self._int(item.get('adet')) if 'adet' in item else MISSING
+                    self._append('amounts', report=report, group=AMOUNT_GROUPS[local],
+                                 kind=self._code('kind', _text(item.get('tip'))),
+                                 amount=self._scaled(item.get('tutar')), count=count)
+
+        self._append('reports', format=fmt, vkn=self._code('vkn', _text(fields.get('mukellefVknTckn'))),
+                     year=self._int(fields.get('raporYil')), period=self._int(fields.get('raporDonem')),
+                     day=self._int(fields.get('raporGunu')) if 'raporGunu' in fields else 0,
+                     register=self._code('register', register), sales=sales)
+
+    def _add_sales(self, elem, report: int, sales: int) -> int:
+        """Yeni nesil satis bloğu: vergi toplamı + oran bazında satış"""
+        fields = _children(elem)
+        name = _text(fields.get('vergiAdi'))
+        tax = self._code('tax', name)
+        self._append('taxes', report=report, tax=tax, amount=self._scaled(fields.get('vergiTutar')))
+        for child in elem:
+            if _local(child.tag) != 'vergiDetay':
+                continue
+            detail = _children(child)
+            amount = self._scaled(detail.get('satisTutar'))
+            self._append('rates', report=report, tax=tax, rate=self._scaled(detail.get('vergiYuzde'), RATE_DIGITS),
+                         sales=amount)
+            if name == SALES_TAX and amount != MISSING:
+                sales = amount if sales == MISSING else sales + amount
+        return sales
+
+    def to_arrays(self) -> Dict[str, Any]:
+        """Kolon listelerini NumPy dizilerine dönüştür"""
+        data: Dict[str, Any] = {
+            'files': self.files,
+            'report_numbers': self.report_numbers,
+            'dicts': {name: sorted(codes, key=codes.get) for name, codes in self.dicts.items()},
+            'errors': self.errors,
+        }
+        for name, columns in self.tables.items():
+            data[name] = {col: np.array(values, dtype=np.int64) for col, values in columns.items()}
+        return data
+
+
+def _load_chunk(paths: List[str]) -> Dict[str, Any]:
+    """Worker: dosya grubunu kolonlara yükle"""
+    builder = _ColumnBuilder()
+    for path in paths:
+        try:
+            builder.add_file(path)
+        except (ET.ParseError, OSError) as e:
+            builder.errors.append({'file': path, 'detail': str(e)})
+    return builder.to_arrays()
+
+
+def _merge_chunks(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Worker çıktılarını sözlük kodlarını ve rapor indekslerini eşleyerek birleştir"""
+    codes: Dict[str, Dict[str, int]] = {name: {} for name in DICT_COLUMNS}
+    merged: Dict[str, Any] = {'files': [], 'report_numbers': [], 'errors': []}
+    parts: Dict[str, List[Dict[str, np.ndarray]]] = {name: [] for name in TABLES}
+    offset = 0
+    for chunk in chunks:
+        remaps = {name: np.array([codes[name].setdefault(v, len(codes[name])) for v in chunk['dicts'][name]] or [0],
+                                 dtype=np.int64)
+                  for name in DICT_COLUMNS}
+        for table in TABLES:
+            columns = dict(chunk[table])
+            if 'report' in columns:
+                columns['report'] = columns['report'] + offset
+            for name in DICT_COLUMNS:
+                if name in columns:
+                    columns[name] = remaps[name][columns[name]]
+            parts[table].append(columns)
+        for key in ('files', 'report_numbers', 'errors'):
+            merged[key].extend(chunk[key])
+        offset += len(chunk['files'])
+    for table, cols in TABLES.items():
+        merged[table] = {col: np.concatenate([p[col] for p in parts[table]]) for col in cols}
+    merged['dicts'] = {name: sorted(c, key=c.get) for name, c in codes.items()}
+    return merged
+
+
+def load_reports(paths: Iterable[str], workers: int = 1, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """ÖKC rapor dosyalarını kolon dizilerine yükle (opsiyonel process havuzu ile)"""
+    paths = [str(p) for p in paths]
+    if workers <= 1 or len(paths) < 2:
+        return _load_chunk(paths)
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(paths) // (workers * 4)))
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _merge_chunks(list(pool.map(_load_chunk, chunks)))
+
+
+def _label(data: Dict[str, Any], column: str, value: int):
+    """Kod değerini okunabilir etikete çevir"""
+    if column in DICT_COLUMNS:
+        return data['dicts'][column][value]
+    if column == 'format':
+        return FORMAT_NAMES[value]
+    if column == 'group':
+        return AMOUNT_GROUP_NAMES[value]
+    if column == 'rate':
+        return format_minor(value, RATE_DIGITS)
+    return None if value == MISSING else value
+
+
+def group_totals(data: Dict[str, Any], table: str, by: Sequence[str], value: str) -> List[Dict[str, Any]]:
+    """Tablodaki değer kolonunu anahtar kolonlar bazında tam (int64) topla
+
+    Anahtar tabloda yoksa rapor tablosundan 'report' indeksi ile alınır
+    (ör. rates tablosu vkn / period bazında toplanabilir). Eksik değerler atlanır.
+    """
+    rows = data[table]
+    reports = data['reports']
+    values = rows[value]
+    keys = []
+    for name in by:
+        if name in rows:
+            keys.append(rows[name])
+        elif name in reports and 'report' in rows:
+            keys.append(reports[name][rows['report']])
+        else:
+            raise ValueError(f"'{table}' tablosunda anahtar yok: {name}")
+    valid = values != MISSING
+    n = int(valid.sum())
+    if not n:
+        return []
+    matrix = np.stack(keys, axis=1)[valid] if keys else np.zeros((n, 1), dtype=np.int64)
+    unique, inverse = np.unique(matrix, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    totals = np.zeros(len(unique), dtype=np.int64)
+    np.add.at(totals, inverse, values[valid])
+    counts = np.bincount(inverse, minlength=len(unique))
+    out = []
+    for i, key in enumerate(unique):
+        row = {name: _label(data, name, int(v)) for name, v in zip(by, key)}
+        row.update(total=int(totals[i]), count=int(counts[i]))
+        out.append(row)
+    return out
+
+
+# Varsayılan özetler: (başlık, tablo, anahtarlar, değer)
+SUMMARIES: List[Tuple[str, str, Tuple[str, ...], str]] = [
+    ('VKN / dönem satışları', 'reports', ('vkn', 'year', 'period'), 'sales'),
+    ('ÖKC bazında satışlar', 'reports', ('vkn', 'register', 'year', 'period'), 'sales'),
+    ('Vergi oranı bazında satışlar', 'rates', ('vkn', 'year', 'period', 'tax', 'rate'), 'sales'),
+    ('Vergi bazında tutarlar', 'taxes', ('vkn', 'year', 'period', 'tax'), 'amount'),
+    ('Belge / ödeme tipi tutarları', 'amounts', ('vkn', 'year', 'period', 'group', 'kind'), 'amount'),
+]
+
+
+def _default_files() -> List[str]:
+    pattern = 'E-ARSIV ENTEGRASYON TEST/{}RAPOR_DATA_*.xml'
+    return sorted(glob.glob(pattern.format('M_')) + glob.glob(pattern.format('YM_')))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ÖKC Z / aylık satış raporlarını kolon bazlı özetle')
+    parser.add_argument('files', nargs='*', help='Rapor XML dosyaları (varsayılan: örnek raporlar)')
+    parser.add_argument('--workers', type=int, default=1, help='Paralel process sayısı')
+    parser.add_argument('--table', choices=sorted(TABLES), help='Özel özet tablosu')
+    parser.add_argument('--by', help='Özel özet anahtarları (virgülle), ör. vkn,register')
+    parser.add_argument('--value', help='Özel özet değer kolonu (varsayılan: tablonun tutar kolonu)')
+    parser.add_argument('--output', help='Özetleri JSON olarak kaydet')
+    args = parser.parse_args()
+
+    files = args.files or _default_files()
+    print(f"🔍 {len(files)} ÖKC raporu yükleniyor...")
+    data = load_reports(files, workers=args.workers)
+    for error in data['errors']:
+        print(f"❌ {error['file']}: {error['detail']}")
+
+    summaries = SUMMARIES
+    if args.table:
+        value = args.value or {'reports': 'sales', 'rates': 'sales'}.get(args.table, 'amount')
+        by = tuple(k.strip() for k in (args.by or 'vkn').split(',') if k.strip())
+        summaries = [(f"{args.table}: {', '.join(by)}", args.table, by, value)]
+
+    results = {}
+    for title, table, by, value in summaries:
+        try:
+            rows = group_totals(data, table, by, value)
+        except ValueError as e:
+            parser.error(str(e))
+        results[title] = rows
+        print(f"\n📊 {title}")
+        print("-" * 80)
+        for row in rows:
+            label = ' / '.join(str(row[k]) for k in by)
+            print(f"  {label}: {format_minor(row['total'])} ({row['count']} kayıt)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Özetler kaydedildi: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""analyze_invoice_xml: miktarı olmayan belge tipleri (ApplicationResponse) hata vermeden okunmalı"""
+
+import io
+
+from analyze_invoice_xml import analyze_invoice_xml, stream_invoice_xml
+
+APPLICATION_RESPONSE = (
+    '<ApplicationResponse xmlns="urn:oasis:names:specification:ubl:schema:xsd:ApplicationResponse-2"'
+    ' xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"'
+    ' xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+    '<cbc:ID>AR2026000000001</cbc:ID><cbc:IssueDate>2026-01-05</cbc:IssueDate>'
+    '<cac:DocumentResponse><cac:Response><cbc:ReferenceID>ABC2026000000001</cbc:ReferenceID>'
+    '<cbc:ResponseCode>KABUL</cbc:ResponseCode></cac:Response></cac:DocumentResponse>'
+    '</ApplicationResponse>'
+)
+
+
+def test_application_response_without_quantity():
+    analysis = analyze_invoice_xml(APPLICATION_RESPONSE)
+    assert analysis['document_type'] == 'ApplicationResponse'
+    assert analysis['invoice_basic']['id'] == 'AR2026000000001'
+    assert all('quantity' not in line for line in analysis['lines'])
+
+    header, lines = stream_invoice_xml(io.BytesIO(APPLICATION_RESPONSE.encode('utf-8')))
+    assert header['document_type'] == 'ApplicationResponse'
+    assert list(lines) == analysis['lines']
+    assert header['line_count'] == len(analysis['lines'])
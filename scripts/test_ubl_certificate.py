@@ -0,0 +1,46 @@
+"""ubl_certificate: issuer/seri ile arama, LRU ile birlikte temizlenen indeks ve bozuk SigningTime"""
+
+import re
+from pathlib import Path
+
+from ubl_certificate import CertificateCache, certificate_report
+
+SAMPLE = (Path(__file__).resolve().parent.parent / 'E-ARSIV ENTEGRASYON TEST'
+          / 'INVOICE_DEMIR_INSAAT_TAAHHUT_LTD_STI__EAR2026000000888 2.xml')
+
+
+def _signature():
+    text = SAMPLE.read_text(encoding='utf-8')
+    certificate = re.search(r'<ds:X509Certificate>([^<]+)', text).group(1)
+    return certificate, {
+        'certificate': certificate,
+        'certificate_issuer': re.search(r'<ds:X509IssuerName>([^<]+)', text).group(1),
+        'certificate_serial': re.search(r'<ds:X509SerialNumber>([^<]+)', text).group(1),
+    }
+
+
+def test_xml_issuer_name_matches_certificate_issuer():
+    certificate, signature = _signature()
+    cache = CertificateCache()
+    info = cache.get(certificate)
+    assert info['issuer'] != signature['certificate_issuer']
+    assert cache.by_serial(signature['certificate_serial'], signature['certificate_issuer']) is info
+    report = certificate_report({'certificate_serial': signature['certificate_serial'],
+                                 'certificate_issuer': signature['certificate_issuer']}, cache)
+    assert report['fingerprint_sha256'] == info['fingerprint_sha256']
+
+
+def test_serial_index_is_evicted_with_lru():
+    certificate, signature = _signature()
+    cache = CertificateCache(maxsize=1)
+    info = cache.get(certificate)
+    cache._remember(dict(info, fingerprint_sha256='x' * 64, serial_number='1'))
+    assert len(cache._by_serial) == 1
+    assert cache.by_serial(signature['certificate_serial']) is None
+
+
+def test_non_iso_signing_time_is_unparseable():
+    certificate, _ = _signature()
+    report = certificate_report({'certificate': certificate, 'signing_time': '13.01.2026 10:00'},
+                                CertificateCache())
+    assert report['valid_at_signing'] == 'unparseable'
@@ -0,0 +1,20 @@
+"""ubl_column_store: KDV kolonları yalnızca 0015 alt toplamından doldurulmalı"""
+
+from pathlib import Path
+
+from ubl_column_store import MISSING, parse_invoice
+
+SAMPLES = Path(__file__).resolve().parent.parent / 'E-ARSIV ENTEGRASYON TEST'
+
+
+def test_withholding_only_line_leaves_kdv_missing():
+    record = parse_invoice(str(SAMPLES / 'MANUFACTURED_RECEIPT_DEFAULT.XML'))
+    assert 'error' not in record and record['lines']
+    for line in record['lines']:
+        assert line[-2:] == (MISSING, MISSING)
+
+
+def test_kdv_subtotal_is_stored():
+    record = parse_invoice(str(SAMPLES / '01_ORNEK.xml'))
+    assert record['lines']
+    assert all(line[-2] != MISSING for line in record['lines'])
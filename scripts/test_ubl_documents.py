@@ -0,0 +1,32 @@
+"""ubl_documents: taraf VKN'si schemeID ile seçilmeli (MERSISNO / TICARETSICILNO önce gelse de)"""
+
+import io
+
+from ubl_documents import read_document
+from ubl_duplicates import read_keys
+
+INVOICE = (
+    '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"'
+    ' xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"'
+    ' xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+    '<cbc:ID>ABC2026000000001</cbc:ID><cbc:UUID>u-1</cbc:UUID><cbc:IssueDate>2026-01-05</cbc:IssueDate>'
+    '<cac:AccountingSupplierParty><cac:Party>'
+    '<cac:PartyIdentification><cbc:ID schemeID="MERSISNO">0123456789000015</cbc:ID></cac:PartyIdentification>'
+    '<cac:PartyIdentification><cbc:ID schemeID="TICARETSICILNO">987654</cbc:ID></cac:PartyIdentification>'
+    '<cac:PartyIdentification><cbc:ID schemeID="VKN">1234567890</cbc:ID></cac:PartyIdentification>'
+    '</cac:Party></cac:AccountingSupplierParty>'
+    '<cac:AccountingCustomerParty><cac:Party>'
+    '<cac:PartyIdentification><cbc:ID schemeID="MUSTERINO">C-42</cbc:ID></cac:PartyIdentification>'
+    '<cac:PartyIdentification><cbc:ID schemeID="TCKN">12345678901</cbc:ID></cac:PartyIdentification>'
+    '</cac:Party></cac:AccountingCustomerParty></Invoice>'
+)
+
+
+def test_party_vkn_is_selected_by_scheme(tmp_path):
+    header = read_document(io.BytesIO(INVOICE.encode('utf-8')), with_lines=False)['header']
+    assert header['supplier_vkn'] == '1234567890'
+    assert header['customer_vkn'] == '12345678901'
+
+    path = tmp_path / 'invoice.xml'
+    path.write_text(INVOICE, encoding='utf-8')
+    assert read_keys(str(path))['supplier_vkn'] == '1234567890'
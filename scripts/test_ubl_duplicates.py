@@ -0,0 +1,63 @@
+"""ubl_duplicates: iki depo, paralel tarama ve zorla çakıştırılan özetler aynı mükerrerleri bulmalı"""
+
+import pytest
+
+import ubl_duplicates
+from ubl_duplicates import BloomKeySet, find_duplicates
+
+INVOICE = (
+    '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"'
+    ' xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"'
+    ' xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+    '<cbc:ID>{number}</cbc:ID><cbc:UUID>{uuid}</cbc:UUID><cbc:IssueDate>2026-01-05</cbc:IssueDate>'
+    '<cac:AccountingSupplierParty><cac:Party><cac:PartyIdentification><cbc:ID>1234567890</cbc:ID>'
+    '</cac:PartyIdentification></cac:Party></cac:AccountingSupplierParty></Invoice>'
+)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    documents = [(f'EAR2026{n:09d}', f'uuid-{n}') for n in range(1, 41)]
+    documents.append(('EAR2026000000007', 'UUID-7'))        # aynı belge yeniden gönderilmiş (ETTN büyük harf)
+    documents.append(('EAR2026000000012', 'uuid-new-12'))   # numara başka belgede tekrar kullanılmış
+    documents.append(('EAR2026000000099', 'uuid-20'))       # ETTN başka numarada tekrar kullanılmış
+    for i, (number, uuid) in enumerate(documents):
+        (tmp_path / f'doc_{i:03d}.xml').write_text(INVOICE.format(number=number, uuid=uuid), encoding='utf-8')
+    return tmp_path
+
+
+def _groups(report):
+    return ({g['uuid']: sorted(g['files']) for g in report['uuid']},
+            {g['id']: (sorted(g['files']), g['same_document']) for g in report['number']})
+
+
+def _expected(corpus):
+    def path(i):
+        return str(corpus / f'doc_{i:03d}.xml')
+    return ({'UUID-7': [path(6), path(40)], 'UUID-20': [path(19), path(42)]},
+            {'EAR2026000000007': ([path(6), path(40)], True),
+             'EAR2026000000012': ([path(11), path(41)], False)})
+
+
+def test_stores_and_parallel_scan_agree(corpus, tmp_path):
+    expected = _expected(corpus)
+    memory = find_duplicates([str(corpus)])
+    assert memory['documents'] == 43
+    assert _groups(memory) == expected
+    assert _groups(find_duplicates([str(corpus)], workers=2)) == expected
+    bloom = BloomKeySet(str(tmp_path / 'keys.db'), expected_keys=86)
+    try:
+        assert _groups(find_duplicates([str(corpus)], store=bloom)) == expected
+    finally:
+        bloom.close()
+
+
+def test_forced_hash_collisions_do_not_change_results(corpus, tmp_path, monkeypatch):
+    monkeypatch.setattr(ubl_duplicates, '_key_hash', lambda kind, key: bytes(16))
+    expected = _expected(corpus)
+    assert _groups(find_duplicates([str(corpus)])) == expected
+    bloom = BloomKeySet(str(tmp_path / 'keys.db'), expected_keys=86)
+    try:
+        assert _groups(find_duplicates([str(corpus)], store=bloom)) == expected
+    finally:
+        bloom.close()
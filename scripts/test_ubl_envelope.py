@@ -0,0 +1,66 @@
+"""ubl_envelope: zarftan çıkarılan belge imzalı halindeki kanonik biçimini korumalı"""
+
+from pathlib import Path
+
+from ubl_envelope import split_envelope, standalone_xml
+from ubl_xmldsig import verify_digests
+
+SIGNED = Path(__file__).resolve().parent.parent / 'E-ARSIV ENTEGRASYON TEST' / \
+    'INVOICE_DEMIR_INSAAT_TAAHHUT_LTD_STI__EAR2026000000888 2.xml'
+
+CBC_URI = 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2'
+ENVELOPE_HEAD = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<sh:StandardBusinessDocument xmlns:sh="http://www.unece.org/cefact/namespaces/StandardBusinessDocumentHeader"'
+    b' xmlns:ef="http://www.efatura.gov.tr/package-namespace" xmlns:cbc="' + CBC_URI.encode() + b'">'
+    b'<sh:StandardBusinessDocumentHeader><sh:HeaderVersion>1.0</sh:HeaderVersion>'
+    b'</sh:StandardBusinessDocumentHeader><ef:Package><Elements>'
+)
+ENVELOPE_TAIL = b'</Elements></ef:Package></sh:StandardBusinessDocument>'
+
+
+def _body(raw: bytes) -> bytes:
+    return raw[raw.index(b'?>') + 2:] if raw.startswith(b'<?xml') else raw
+
+
+def _envelope(tmp_path, *documents: bytes) -> Path:
+    path = tmp_path / 'envelope.xml'
+    path.write_bytes(ENVELOPE_HEAD + b''.join(_body(d) for d in documents) + ENVELOPE_TAIL)
+    return path
+
+
+def test_signed_invoice_keeps_valid_digests(tmp_path):
+    original = SIGNED.read_bytes()
+    [doc] = list(split_envelope(str(_envelope(tmp_path, original)), block_size=4096))
+    assert b'xmlns:sh' not in doc.data and b'xmlns:ef' not in doc.data
+
+    extracted = tmp_path / 'extracted.xml'
+    extracted.write_bytes(doc.data)
+    result = verify_digests(str(extracted))
+    assert result['signed'] and result['valid'], result['references']
+
+
+def test_signed_invoice_c14n_matches_lxml(tmp_path):
+    import pytest
+    etree = pytest.importorskip('lxml.etree')
+    original = SIGNED.read_bytes()
+    [doc] = list(split_envelope(str(_envelope(tmp_path, original))))
+    assert etree.tostring(etree.fromstring(doc.data), method='c14n') == \
+        etree.tostring(etree.fromstring(original), method='c14n')
+
+
+def test_only_used_outer_prefixes_are_injected(tmp_path):
+    response = (
+        b'<ApplicationResponse xmlns="urn:oasis:names:specification:ubl:schema:xsd:ApplicationResponse-2">'
+        b'<cbc:ID>AR1</cbc:ID></ApplicationResponse >'
+    )
+    [doc] = list(split_envelope(str(_envelope(tmp_path, response))))
+    assert doc.data.endswith(b'</ApplicationResponse >')
+    assert b'xmlns:cbc="' + CBC_URI.encode() + b'"' in doc.data
+    assert b'xmlns:sh' not in doc.data and b'xmlns:ef' not in doc.data
+
+
+def test_standalone_xml_skips_prefixes_declared_inside():
+    raw = b'<a:Root xmlns:a="urn:a"><b:X xmlns:b="urn:b" c:y="1"/></a:Root>'
+    data = standalone_xml(raw, 'a:Root', {'a': 'urn:outer', 'b': 'urn:b', 'c': 'urn:c', 'd': 'urn:d'}, 'UTF-8')
+    assert data.split(b'\n', 1)[1] == b'<a:Root xmlns:c="urn:c" xmlns:a="urn:a"><b:X xmlns:b="urn:b" c:y="1"/></a:Root>'
@@ -0,0 +1,24 @@
+"""ubl_line_export: yarıda bozulan faturanın kalemleri çıktıya yazılmamalı"""
+
+import io
+from pathlib import Path
+
+from ubl_line_export import export_lines
+
+SAMPLES = Path(__file__).resolve().parent.parent / 'E-ARSIV ENTEGRASYON TEST'
+
+
+def test_truncated_invoice_writes_no_rows(tmp_path):
+    sample = SAMPLES / '01_ORNEK.xml'
+    text = sample.read_text(encoding='utf-8')
+    truncated = tmp_path / 'truncated.xml'
+    truncated.write_text(text[:text.rfind('</cac:InvoiceLine>') + len('</cac:InvoiceLine>')], encoding='utf-8')
+
+    complete = io.StringIO()
+    expected = export_lines([str(sample)], complete)
+    out = io.StringIO()
+    stats = export_lines([str(sample), str(truncated)], out)
+
+    assert stats['errors'] == 1 and stats['files'] == 1
+    assert stats['rows'] == expected['rows'] > 0
+    assert out.getvalue() == complete.getvalue()
@@ -0,0 +1,77 @@
+"""ubl_matcher: yerleştirilmiş eşleşmeler bulunmalı; seri ve paralel çalışma aynı sonucu vermeli"""
+
+from ubl_matcher import Matcher
+
+NS = (' xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"'
+      ' xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2"')
+INVOICE = (
+    '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"' + NS + '>'
+    '<cbc:ID>{number}</cbc:ID><cbc:UUID>{uuid}</cbc:UUID><cbc:IssueDate>{day}</cbc:IssueDate>'
+    '<cbc:DocumentCurrencyCode>TRY</cbc:DocumentCurrencyCode>'
+    '<cac:AccountingSupplierParty><cac:Party><cac:PartyIdentification><cbc:ID>1111111111</cbc:ID>'
+    '</cac:PartyIdentification></cac:Party></cac:AccountingSupplierParty>'
+    '<cac:AccountingCustomerParty><cac:Party><cac:PartyIdentification><cbc:ID>2222222222</cbc:ID>'
+    '</cac:PartyIdentification></cac:Party></cac:AccountingCustomerParty>'
+    '<cac:LegalMonetaryTotal><cbc:PayableAmount currencyID="TRY">{amount}</cbc:PayableAmount>'
+    '</cac:LegalMonetaryTotal></Invoice>'
+)
+RESPONSE = (
+    '<ApplicationResponse xmlns="urn:oasis:names:specification:ubl:schema:xsd:ApplicationResponse-2"' + NS + '>'
+    '<cbc:ID>{number}</cbc:ID><cbc:UUID>{uuid}</cbc:UUID><cbc:IssueDate>2026-01-06</cbc:IssueDate>'
+    '<cac:SenderParty><cac:PartyIdentification><cbc:ID>2222222222</cbc:ID></cac:PartyIdentification></cac:SenderParty>'
+    '<cac:ReceiverParty><cac:PartyIdentification><cbc:ID>1111111111</cbc:ID></cac:PartyIdentification></cac:ReceiverParty>'
+    '<cac:DocumentResponse><cac:Response><cbc:ResponseCode>{code}</cbc:ResponseCode></cac:Response>'
+    '<cac:DocumentReference><cbc:ID>{reference}</cbc:ID></cac:DocumentReference></cac:DocumentResponse>'
+    '</ApplicationResponse>'
+)
+
+
+def _invoice(n, uuid=None, amount='100.00'):
+    return INVOICE.format(number=f'ABC2026{n:09d}', uuid=uuid or f'sale-{n}', day='2026-01-05', amount=amount)
+
+
+def _corpus(tmp_path):
+    sales, incoming = tmp_path / 'sales', tmp_path / 'incoming'
+    sales.mkdir()
+    incoming.mkdir()
+    for n in range(1, 5):
+        (sales / f's{n}.xml').write_text(_invoice(n), encoding='utf-8')
+    (incoming / 'p1.xml').write_text(_invoice(1), encoding='utf-8')                            # ETTN
+    (incoming / 'p2.xml').write_text(_invoice(2, uuid='other-2', amount='100.01'), encoding='utf-8')  # numara, tolerans içi
+    (incoming / 'p3.xml').write_text(_invoice(3, uuid='other-3', amount='150.00'), encoding='utf-8')  # tutar tutmuyor
+    responses = [RESPONSE.format(number=f'R{i}', uuid=f'resp-{i}', code=code, reference=reference)
+                 for i, (code, reference) in enumerate([('KABUL', 'SALE-1'), ('RED', 'SALE-1'),
+                                                        ('KABUL', 'ABC2026000000002')])]
+    (incoming / 'r0.xml').write_text(responses[0], encoding='utf-8')
+    (incoming / 'r_envelope.xml').write_text(
+        '<Envelope><Documents>' + ''.join(responses[1:]) + '</Documents></Envelope>', encoding='utf-8')
+    return str(sales), str(incoming)
+
+
+def _run(sales, incoming, workers):
+    matcher = Matcher()
+    matcher.load_sales([sales], workers)
+    matcher.load_incoming([incoming], workers)
+    return matcher.report()
+
+
+def test_planted_matches_and_parallel_equivalence(tmp_path):
+    sales, incoming = _corpus(tmp_path)
+    report = _run(sales, incoming, 1)
+    assert report['errors'] == []
+    assert (report['sales'], report['incoming']) == (4, 6)
+    matched = {(m['kind'], m['source'].rsplit('/', 1)[-1]): (m['method'], m['sales']['id'], m['differences'])
+               for m in report['matched']}
+    assert matched == {
+        ('purchase', 'p1.xml'): ('uuid', 'ABC2026000000001', []),
+        ('purchase', 'p2.xml'): ('number', 'ABC2026000000002', []),
+        ('response', 'r0.xml'): ('uuid', 'ABC2026000000001', []),
+        ('response', 'r_envelope.xml#0'): ('uuid', 'ABC2026000000001', []),
+        ('response', 'r_envelope.xml#1'): ('number', 'ABC2026000000002', []),
+    }
+    [miss] = report['unmatched']
+    assert miss['id'] == 'ABC2026000000003'
+    assert [(m['id'], m['differences']) for m in miss['near_misses']] == [('ABC2026000000003', ['amount'])]
+    assert [s['id'] for s in report['sales_without_response']] == ['ABC2026000000003', 'ABC2026000000004']
+    assert [(c['id'], c['codes']) for c in report['conflicting_responses']] == [('ABC2026000000001', ['KABUL', 'RED'])]
+    assert _run(sales, incoming, 2) == report
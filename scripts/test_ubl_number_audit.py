@@ -0,0 +1,102 @@
+"""ubl_number_audit: vektörel denetim kaba kuvvet denetimiyle aynı bulguları vermeli"""
+
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+from ubl_number_audit import NumberLedger, _uuid_code, read_records
+
+SAMPLES = Path(__file__).resolve().parent.parent / 'E-ARSIV ENTEGRASYON TEST'
+
+
+def _series_records(rng, vkn, prefix, year, start_id):
+    """Boşluk, kopya, mükerrer, tarihsiz ve yanlış tarihli kayıtlar içeren rastgele seri"""
+    records = []
+    base = date(int(year), 1, 1)
+    for counter in range(1, rng.randint(5, 80)):
+        if rng.random() < 0.1:
+            continue
+        day = base + timedelta(days=counter // 3)
+        if rng.random() < 0.08:
+            day -= timedelta(days=rng.randint(1, 20))
+        issue = '' if rng.random() < 0.03 else day.isoformat()
+        uuid = f'{prefix}-{year}-{counter}'
+        records.append(('Invoice', vkn, f'{prefix}{year}{counter:09d}', issue, uuid, False))
+        if rng.random() < 0.1:
+            records.append(('Invoice', vkn, f'{prefix}{year}{counter:09d}', issue, uuid.lower(), False))
+        if rng.random() < 0.05:
+            records.append(('Invoice', vkn, f'{prefix}{year}{counter:09d}', issue, f'other-{counter}', False))
+    rng.shuffle(records)
+    return [(f'src{start_id + i}', record) for i, record in enumerate(records)]
+
+
+def _brute(key, entries, record_numbers):
+    vkn, family, prefix, year = key
+    documents = {}
+    for (source, (_, _, number, issue, uuid, _)), record_no in zip(entries, record_numbers):
+        counter = int(number[7:])
+        documents.setdefault((counter, _uuid_code(uuid, record_no)), (issue, source))
+    ordered = sorted(documents.items())
+    counters = [counter for (counter, _), _ in ordered]
+    unique = sorted(set(counters))
+    gaps, previous = [], 0
+    for counter in unique:
+        if counter > previous + 1:
+            gaps.append((previous + 1, counter - 1))
+        previous = counter
+    duplicates = {}
+    for (counter, _), (_, source) in ordered:
+        if counters.count(counter) > 1:
+            duplicates.setdefault(counter, []).append(source)
+    dated = [(counter, issue) for (counter, _), (issue, _) in ordered if issue]
+    inversions = sum(1 for i in range(1, len(dated)) if dated[i][1] < max(issue for _, issue in dated[:i]))
+    wrong_year = [counter for counter, issue in dated if issue[:4] != year]
+    return {'documents': len(ordered), 'gaps': gaps, 'inversions': inversions, 'wrong_year': wrong_year,
+            'duplicates': {c: sorted(s, key=lambda name: int(name[3:])) for c, s in duplicates.items()}}
+
+
+def test_vectorized_audit_matches_brute_force():
+    rng = random.Random(2026)
+    ledger = NumberLedger()
+    by_key = {}
+    numbers = {}
+    for n in range(30):
+        key = (f'{1000000000 + n % 7}', 'Invoice', rng.choice(['EAR', 'NGA', 'ABC']), rng.choice(['2025', '2026']))
+        for source, record in _series_records(rng, key[0], key[2], key[3], ledger.records + 10_000 * n):
+            by_key.setdefault(key, []).append((source, record))
+            numbers.setdefault(key, []).append(ledger.records)
+            ledger.add_records(source, [record])
+
+    report = ledger.audit()
+    assert len(report['series']) == len(by_key)
+    for finding in ('gaps', 'duplicates', 'order_breaks', 'year_mismatches'):
+        assert any(row[finding] for row in report['series']), finding
+    for row in report['series']:
+        key = (row['supplier_vkn'], row['type'], row['series'], row['year'])
+        expected = _brute(key, by_key[key], numbers[key])
+        prefix = row['series'] + row['year']
+        assert row['documents'] == expected['documents']
+        assert [(int(g['from'][7:]), int(g['to'][7:])) for g in row['gaps']] == expected['gaps']
+        assert row['missing'] == sum(b - a + 1 for a, b in expected['gaps'])
+        assert row['inversions'] == expected['inversions']
+        assert sum(b['later_numbers_dated_before'] for b in row['order_breaks']) == expected['inversions']
+        assert [int(m['number'][7:]) for m in row['year_mismatches']] == expected['wrong_year']
+        assert {int(d['number'][7:]): d['sources'] for d in row['duplicates']} == expected['duplicates']
+        assert all(g['from'].startswith(prefix) for g in row['gaps'])
+
+
+def test_from_first_starts_series_at_first_seen_counter():
+    ledger = NumberLedger()
+    ledger.add_records('src', [('Invoice', '1', f'EAR2026{counter:09d}', '2026-01-05', str(counter), False)
+                               for counter in (887, 888, 890)])
+    assert ledger.audit()['series'][0]['missing'] == 887
+    row = ledger.audit(from_first=True)['series'][0]
+    assert row['missing'] == 1 and row['gaps'][0]['from'] == 'EAR2026000000889'
+
+
+def test_ubl_receipts_share_report_family():
+    receipts = sorted(SAMPLES.glob('MANUFACTURED_RECEIPT_*.XML'))
+    assert receipts
+    families = {record[0] for path in receipts for record in read_records(str(path))}
+    assert families == {'MustahsilMakbuz'}
+    assert read_records(str(SAMPLES / 'SELF_EMPLOYMENT_RECEIPT.XML'))[0][0] == 'SerbestMeslekMakbuz'
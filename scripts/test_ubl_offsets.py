@@ -0,0 +1,36 @@
+"""ubl_offsets: belge / satır dilimleri end tag biçiminden bağımsız olarak tam olmalı"""
+
+import xml.etree.ElementTree as ET
+
+from ubl_offsets import OffsetIndex
+
+INVOICE = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Envelope xmlns:x="urn:unused">'
+    '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"'
+    ' xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"'
+    ' xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+    '<cbc:ID>ABC2026000000001</cbc:ID>'
+    '<cac:InvoiceLine><cbc:ID>1</cbc:ID><cbc:InvoicedQuantity unitCode="C62">2</cbc:InvoicedQuantity></cac:InvoiceLine >'
+    '<cac:InvoiceLine note="a>b"/>'
+    '<cac:InvoiceLine><cbc:ID>3</cbc:ID></cac:InvoiceLine\n>'
+    '</Invoice >'
+    '<Trailer/></Envelope>'
+)
+
+
+def test_slices_end_at_real_tag_end(tmp_path):
+    path = tmp_path / 'invoice.xml'
+    path.write_text(INVOICE, encoding='utf-8')
+    with OffsetIndex(str(path)) as index:
+        assert [len(doc['lines']) for doc in index.documents] == [3]
+        document = index.document_bytes('ABC2026000000001')
+        assert document.endswith(b'</Invoice >')
+        assert b'xmlns:x' not in document
+        assert ET.fromstring(document).find('{*}ID').text == 'ABC2026000000001'
+
+        assert index.line_bytes(0, 1).endswith(b'</cac:InvoiceLine >')
+        assert index.line_bytes(0, 2).endswith(b' note="a>b"/>')
+        assert index.line(0, 2).get('note') == 'a>b'
+        assert index.line_bytes(0, 3).endswith(b'</cac:InvoiceLine\n>')
+        assert [index.line(0, n).findtext('{*}ID') for n in (1, 2, 3)] == ['1', None, '3']
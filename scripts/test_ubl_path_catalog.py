@@ -0,0 +1,44 @@
+"""ubl_path_catalog: kapsayıcı path'ler sayılmalı; seri, paralel ve birleştirilmiş kataloglar aynı olmalı"""
+
+from ubl_path_catalog import Catalog, build_catalog, build_parallel
+
+INVOICE = (
+    '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"'
+    ' xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"'
+    ' xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+    '<cbc:ID>ABC{n:013d}</cbc:ID>{lines}</Invoice>'
+)
+LINE = '<cac:InvoiceLine><cbc:InvoicedQuantity unitCode="C62">{q}</cbc:InvoicedQuantity><cac:Item/></cac:InvoiceLine>'
+
+
+def _write(tmp_path, line_counts):
+    paths = []
+    for n, count in enumerate(line_counts):
+        path = tmp_path / f'invoice_{n:02d}.xml'
+        path.write_text(INVOICE.format(n=n, lines=''.join(LINE.format(q=q + 1) for q in range(count))),
+                        encoding='utf-8')
+        paths.append(str(path))
+    return paths
+
+
+def test_container_paths_and_attributes_are_counted(tmp_path):
+    catalog = build_catalog(_write(tmp_path, [3, 1, 0, 5]))
+    rows = {row['path']: row for row in catalog.rows()}
+    line = rows['Invoice/InvoiceLine']
+    assert (line['documents'], line['min_count'], line['max_count']) == (3, 1, 5)
+    assert catalog.paths['Invoice/InvoiceLine'].occurrences == 9
+    assert rows['Invoice/InvoiceLine/Item']['max_count'] == 5
+    assert rows['Invoice/InvoiceLine/InvoicedQuantity/@unitCode']['type'] == 'code'
+    assert rows['Invoice/InvoiceLine/InvoicedQuantity']['type'] == 'integer'
+    assert catalog.roots == {'Invoice': 4}
+
+
+def test_serial_parallel_and_merged_catalogs_match(tmp_path):
+    files = _write(tmp_path, [n % 7 for n in range(24)])
+    serial = build_catalog(files)
+    parallel = build_parallel([str(tmp_path)], workers=2)
+    merged = Catalog()
+    for chunk in (files[10:], files[:3], files[3:10]):
+        merged.merge(Catalog.from_dict(build_catalog(chunk).to_dict()))
+    assert parallel.to_dict() == serial.to_dict()
+    assert merged.to_dict() == serial.to_dict()
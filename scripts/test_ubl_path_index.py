@@ -0,0 +1,64 @@
+"""ubl_path_index: çok segmentli indeks sorguları kaba kuvvet taramasıyla aynı olmalı"""
+
+import numpy as np
+
+from ubl_path_index import PathIndex, _Segment, document_paths, write_segment
+
+
+def _write_docs(directory, prefix, count, rare_every=None):
+    """count belge; rare_every verilirse yalnızca her rare_every'inci belgede <Rare> bulunur"""
+    paths = []
+    for i in range(count):
+        rare = '<Rare>x</Rare>' if rare_every and i % rare_every == 0 else ''
+        body = f'<Invoice><ID>{prefix}{i}</ID><Line><Qty unit="C62">1</Qty></Line>{rare}</Invoice>'
+        path = directory / f'{prefix}_{i:03d}.xml'
+        path.write_text(body, encoding='utf-8')
+        paths.append(str(path))
+    return paths
+
+
+def _brute(files, pattern_path, negate_path=None):
+    hits = []
+    for doc_id, path in enumerate(files):
+        paths = document_paths(path)[1]
+        if pattern_path in paths and (negate_path is None or negate_path not in paths):
+            hits.append(doc_id)
+    return hits
+
+
+def test_sparse_segment_is_offset_by_base(tmp_path):
+    write_segment(str(tmp_path), 'seg', {0: np.array([1000, 1500], dtype=np.uint32)}, base=1000, span=1000)
+    mask = np.zeros(2000, dtype=bool)
+    _Segment(str(tmp_path), 'seg').fill(0, mask)
+    assert np.flatnonzero(mask).tolist() == [1000, 1500]
+
+
+def test_multi_segment_queries_match_brute_force(tmp_path):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    first = _write_docs(docs, 'a', 40)
+    second = _write_docs(docs, 'b', 200, rare_every=90)   # seyrek: delta kodlu liste
+    index = PathIndex(str(tmp_path / 'index'))
+    index.add(first)
+    index.add(second)
+    files = first + second
+
+    expected = _brute(files, 'Invoice/Rare')
+    assert expected == [40, 130, 220]
+    for _ in range(2):
+        assert index.query('Invoice/Rare').tolist() == expected
+        assert index.query('Invoice/Line/Qty/@unit AND NOT Invoice/Rare').tolist() == \
+            _brute(files, 'Invoice/Line/Qty/@unit', 'Invoice/Rare')
+        assert index.query('Invoice/Rare OR Invoice/ID').tolist() == list(range(len(files)))
+        assert index.compact() in (1, 2)
+        index = PathIndex(str(tmp_path / 'index'))
+    assert len(index.meta['segments']) == 1
+
+
+def test_duplicate_inputs_in_one_call_are_indexed_once(tmp_path):
+    files = _write_docs(tmp_path, 'c', 3)
+    index = PathIndex(str(tmp_path / 'index'))
+    stats = index.add([files[0], str(tmp_path), files[1]])
+    assert stats['added'] == 3
+    assert index.documents == 3
+    assert index.add([files[2]])['skipped'] == 1
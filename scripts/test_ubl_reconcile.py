@@ -0,0 +1,74 @@
+"""ubl_reconcile: yuvarlama bulguları yuvarlanan alanı ve ham değerini göstermeli"""
+
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from ubl_reconcile import reconcile_files, reconcile_tree
+
+SAMPLES = Path(__file__).resolve().parent.parent / 'E-ARSIV ENTEGRASYON TEST'
+
+HEADER = (
+    '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"'
+    ' xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"'
+    ' xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+)
+TOTALS = (
+    '<cac:TaxTotal><cbc:TaxAmount>20.00</cbc:TaxAmount><cac:TaxSubtotal>'
+    '<cbc:TaxableAmount>{doc_taxable}</cbc:TaxableAmount><cbc:TaxAmount>20.00</cbc:TaxAmount>'
+    '<cbc:Percent>20</cbc:Percent></cac:TaxSubtotal></cac:TaxTotal>'
+    '<cac:LegalMonetaryTotal><cbc:LineExtensionAmount>100.00</cbc:LineExtensionAmount>'
+    '<cbc:TaxExclusiveAmount>100.00</cbc:TaxExclusiveAmount><cbc:TaxInclusiveAmount>120.00</cbc:TaxInclusiveAmount>'
+    '<cbc:PayableAmount>120.00</cbc:PayableAmount></cac:LegalMonetaryTotal>'
+)
+LINE = (
+    '<cac:InvoiceLine><cbc:ID>{id}</cbc:ID><cbc:InvoicedQuantity unitCode="C62">{qty}</cbc:InvoicedQuantity>'
+    '<cbc:LineExtensionAmount>{amount}</cbc:LineExtensionAmount><cac:TaxTotal><cbc:TaxAmount>{tax}</cbc:TaxAmount>'
+    '<cac:TaxSubtotal><cbc:TaxableAmount>{taxable}</cbc:TaxableAmount><cbc:TaxAmount>{tax}</cbc:TaxAmount>'
+    '<cbc:Percent>20</cbc:Percent></cac:TaxSubtotal></cac:TaxTotal>'
+    '<cac:Price><cbc:PriceAmount>{price}</cbc:PriceAmount></cac:Price></cac:InvoiceLine>'
+)
+
+
+def _invoice(path, number, line_amount='100.00', line_taxable='100.00', doc_taxable='100.00'):
+    path.write_text(
+        HEADER + f'<cbc:ID>{number}</cbc:ID>' + TOTALS.format(doc_taxable=doc_taxable)
+        + LINE.format(id=1, qty=1, amount=line_amount, tax='20.00', taxable='100.00', price=100)
+        + LINE.format(id=2, qty=0, amount='0', tax='0', taxable=line_taxable, price=0)
+        + '</Invoice>', encoding='utf-8')
+    return str(path)
+
+
+def _rounding(result):
+    return sorted((m['invoice'], m['line'] or '', m['detail'])
+                  for m in result['mismatches'] if m['check'] == 'rounding')
+
+
+def test_rounding_reports_field_and_raw_value(tmp_path):
+    files = [_invoice(tmp_path / 'a.xml', 'A1'),
+             _invoice(tmp_path / 'b.xml', 'B1', line_taxable='0.005'),
+             _invoice(tmp_path / 'c.xml', 'C1', line_amount='100.001', doc_taxable='100.004')]
+    expected = [('B1', '2', 'TaxableAmount=0.005'),
+                ('C1', '', 'TaxableAmount=100.004'),
+                ('C1', '1', 'LineExtensionAmount=100.001')]
+    assert _rounding(reconcile_files(files)) == expected
+    # Paralel yüklemede satır / alt toplam indeksleri parça sınırlarında kaydırılır
+    assert _rounding(reconcile_files(files, workers=2)) == expected
+
+
+def test_mustahsil_receipts_skip_payable_check(tmp_path):
+    receipts = sorted(str(p) for p in SAMPLES.glob('MANUFACTURED_RECEIPT_*.XML'))
+    assert len(receipts) == 4
+    wrong = _invoice(tmp_path / 'wrong.xml', 'W1')
+    Path(wrong).write_text(Path(wrong).read_text(encoding='utf-8').replace(
+        '<cbc:PayableAmount>120.00', '<cbc:PayableAmount>130.00'), encoding='utf-8')
+    result = reconcile_files(receipts + [wrong])
+    assert result['payable_skipped'] == 4
+    assert [m['invoice'] for m in result['mismatches'] if m['check'] == 'payable'] == ['W1']
+    assert not any(m['invoice'].startswith('GIB') for m in result['mismatches'])
+
+
+def test_tree_reconcile_matches_file_reconcile(tmp_path):
+    for path in [_invoice(tmp_path / 'a.xml', 'A1', line_amount='100.004'),
+                 str(SAMPLES / 'MANUFACTURED_RECEIPT_SGK.XML'), str(SAMPLES / '01_ORNEK.xml')]:
+        root = ET.parse(path).getroot()
+        assert reconcile_tree(root, path) == reconcile_files([path])
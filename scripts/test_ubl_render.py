@@ -0,0 +1,41 @@
+"""ubl_render: gönderen XSLT'si dosya / ağ erişimi olmadan çalışmalı"""
+
+import pytest
+
+etree = pytest.importorskip('lxml.etree')
+
+from ubl_render import compile_template  # noqa: E402
+
+INVOICE = b'<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"><ID>1</ID></Invoice>'
+
+
+def _xslt(body: str) -> bytes:
+    return (
+        '<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform" '
+        'xmlns:exsl="http://exslt.org/common" extension-element-prefixes="exsl">'
+        f'<xsl:template match="/">{body}</xsl:template></xsl:stylesheet>'
+    ).encode()
+
+
+def test_plain_template_renders():
+    transform = compile_template(_xslt('<html><xsl:value-of select="/*/*"/></html>'))
+    assert b'1' in bytes(transform(etree.fromstring(INVOICE).getroottree()))
+
+
+def test_exsl_document_cannot_write_files(tmp_path):
+    target = tmp_path / 'pwned.txt'
+    transform = compile_template(_xslt(f'<exsl:document href="{target.as_uri()}">x</exsl:document><html/>'))
+    with pytest.raises(etree.XSLTError):
+        transform(etree.fromstring(INVOICE).getroottree())
+    assert not target.exists()
+
+
+def test_document_function_cannot_read_files(tmp_path):
+    secret = tmp_path / 'secret.xml'
+    secret.write_text('<s>gizli</s>')
+    transform = compile_template(_xslt(f'<html><xsl:value-of select="document(\'{secret.as_uri()}\')"/></html>'))
+    try:
+        html = bytes(transform(etree.fromstring(INVOICE).getroottree()))
+    except etree.XSLTError:
+        return
+    assert b'gizli' not in html
@@ -0,0 +1,15 @@
+"""ubl_search_index: PartyName'siz şahıs tarafları ad + soyad ile aranabilmeli"""
+
+from pathlib import Path
+
+from ubl_search_index import SearchIndex
+
+SAMPLES = Path(__file__).resolve().parent.parent / 'E-ARSIV ENTEGRASYON TEST'
+
+
+def test_person_party_name_is_indexed(tmp_path):
+    receipt = SAMPLES / 'MANUFACTURED_RECEIPT_DEFAULT.XML'
+    with SearchIndex(str(tmp_path / 'index.db')) as index:
+        assert index.add([str(receipt)])['added'] == 1
+        found = index.search('hasan şahin', column='parties')
+    assert [doc['customer_name'] for doc in found] == ['Hasan ŞAHİN']
@@ -0,0 +1,86 @@
+"""ubl_xmldsig: akış kanonikleştirmesi lxml C14N çıktısıyla aynı özeti vermeli"""
+
+import base64
+import hashlib
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from ubl_xmldsig import C14N_EXCLUSIVE, DS_NS, TRANSFORM_ENVELOPED, DigestVerifier, verify_digests
+
+etree = pytest.importorskip('lxml.etree')
+
+C14N_10 = 'http://www.w3.org/TR/2001/REC-xml-c14n-20010315'
+EXC_C14N = sorted(C14N_EXCLUSIVE)[0]
+SHA256 = 'http://www.w3.org/2001/04/xmlenc#sha256'
+
+BODY = (
+    '<Invoice xmlns="urn:test:invoice" xmlns:cbc="urn:test:cbc" xmlns:unused="urn:test:unused">'
+    '<cbc:ID  b="2"   a=\'1 &amp; "x"\'>X &amp; &lt; &gt; şi</cbc:ID>'
+    '<cbc:Note><![CDATA[a<b & c]]></cbc:Note><Empty/><!-- yorum -->'
+    '<Ext><Target Id="T1" xmlns:z="urn:test:z" z:b="2" a="1" xml:lang="tr">'
+    '<z:C>satır&#13;\n\ttab</z:C><cbc:Amount currencyID="TRY">10.00</cbc:Amount></Target></Ext>'
+    '{signature}</Invoice>'
+)
+
+
+def _reference(uri, transforms, digest):
+    steps = ''.join(
+        f'<ds:Transform Algorithm="{algorithm}">'
+        + (f'<ec:InclusiveNamespaces xmlns:ec="{EXC_C14N}" PrefixList="{prefixes}"/>' if prefixes else '')
+        + '</ds:Transform>'
+        for algorithm, prefixes in transforms)
+    return (f'<ds:Reference URI="{uri}"><ds:Transforms>{steps}</ds:Transforms>'
+            f'<ds:DigestMethod Algorithm="{SHA256}"/><ds:DigestValue>{digest}</ds:DigestValue></ds:Reference>')
+
+
+def _digest(data: bytes) -> str:
+    return base64.b64encode(hashlib.sha256(data).digest()).decode('ascii')
+
+
+def test_digests_match_lxml_c14n(tmp_path):
+    unsigned = etree.fromstring(BODY.format(signature='').encode('utf-8'))
+    target = unsigned.find('.//{urn:test:invoice}Target')
+    whole = _digest(etree.tostring(unsigned, method='c14n', with_comments=False))
+    inclusive = _digest(etree.tostring(target, method='c14n'))
+    exclusive = _digest(etree.tostring(target, method='c14n', exclusive=True, inclusive_ns_prefixes=['cbc']))
+
+    signature = (
+        f'<ds:Signature xmlns:ds="{DS_NS}" Id="S1"><ds:SignedInfo>'
+        + _reference('', [(TRANSFORM_ENVELOPED, ''), (C14N_10, '')], whole)
+        + _reference('#T1', [(C14N_10, '')], inclusive)
+        + _reference('#T1', [(EXC_C14N, 'cbc')], exclusive)
+        + '</ds:SignedInfo></ds:Signature>'
+    )
+    path = tmp_path / 'signed.xml'
+    path.write_text(BODY.format(signature=signature), encoding='utf-8')
+
+    result = verify_digests(str(path))
+    assert [ref['status'] for ref in result['references']] == ['ok', 'ok', 'ok'], result['references']
+    assert result['valid']
+
+
+def test_tampered_document_is_reported(tmp_path):
+    unsigned = etree.fromstring(BODY.format(signature='').encode('utf-8'))
+    signature = (f'<ds:Signature xmlns:ds="{DS_NS}"><ds:SignedInfo>'
+                 + _reference('', [(TRANSFORM_ENVELOPED, ''), (C14N_10, '')],
+                              _digest(etree.tostring(unsigned, method='c14n', with_comments=False)))
+                 + '</ds:SignedInfo></ds:Signature>')
+    path = tmp_path / 'tampered.xml'
+    path.write_text(BODY.format(signature=signature).replace('10.00', '10.01'), encoding='utf-8')
+    result = verify_digests(str(path))
+    assert result['references'][0]['status'] == 'mismatch'
+    assert not result['valid']
+
+
+def test_tee_fed_verifier_matches_file_verifier():
+    path = (Path(__file__).resolve().parent.parent / 'E-ARSIV ENTEGRASYON TEST'
+            / 'INVOICE_DEMIR_INSAAT_TAAHHUT_LTD_STI__EAR2026000000888 2.xml')
+    verifier = DigestVerifier(str(path))
+    with open(path, 'rb') as f:
+        root = ET.parse(verifier.tee(f)).getroot()
+    assert root.tag.endswith('Invoice')
+    result = verifier.close()
+    assert result['signed'] and result['valid']
+    assert result == verify_digests(str(path))
@@ -0,0 +1,25 @@
+"""ubl_xslt_store: ASCII olmayan base64 metni geçersiz ek olarak kaydedilmeli"""
+
+import base64
+
+from ubl_xslt_store import AttachmentStore, extract_attachments
+
+INVOICE = (
+    '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"'
+    ' xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+    '<cbc:EmbeddedDocumentBinaryObject filename="bozuk.xslt">QUJD©RA==</cbc:EmbeddedDocumentBinaryObject>'
+    '<cbc:EmbeddedDocumentBinaryObject filename="saglam.xslt">{valid}</cbc:EmbeddedDocumentBinaryObject>'
+    '</Invoice>'
+)
+
+
+def test_non_ascii_attachment_is_invalid(tmp_path):
+    path = tmp_path / 'invoice.xml'
+    path.write_text(INVOICE.format(valid=base64.b64encode(b'<xsl/>').decode()), encoding='utf-8')
+    store = AttachmentStore(str(tmp_path / 'store'))
+
+    broken, valid = extract_attachments(str(path), store)
+
+    assert broken['sha256'] is None
+    assert valid['sha256'] and store.read(valid['sha256']) == b'<xsl/>'
+    assert store.add_text('QUJD©RA==') is None
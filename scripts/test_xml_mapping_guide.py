@@ -0,0 +1,17 @@
+"""xml_mapping_guide: ağaç ve akış yolu CreditNote kalemlerini aynı biçimde eşlemeli"""
+
+from pathlib import Path
+
+from xml_mapping_guide import extract_complete_data, stream_complete_data
+
+SAMPLES = Path(__file__).resolve().parent.parent / 'E-ARSIV ENTEGRASYON TEST'
+
+
+def test_credit_note_lines_match_between_tree_and_stream():
+    receipt = str(SAMPLES / 'MANUFACTURED_RECEIPT_DEFAULT.XML')
+    data = extract_complete_data(receipt)
+    _, lines = stream_complete_data(receipt)
+    assert data['lines'] and list(lines) == data['lines']
+    quantity = data['lines'][0]['quantity']
+    assert quantity['value'] == '1000'
+    assert quantity['xpath'] == './/cac:CreditNoteLine[1]/cbc:CreditedQuantity'
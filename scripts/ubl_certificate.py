@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+X.509 Sertifika Önbelleği
+ds:X509Certificate içeriğini (base64 DER) her benzersiz sertifika için bir kez
+çözer; subject, issuer, geçerlilik aralığı ve anahtar algoritmasını LRU bellek
+önbelleğinde ve opsiyonel olarak kalıcı bir JSON dosyasında (parmak izi ile)
+tutar. Aynı entegratörün binlerce faturasında sertifika tekrar parse edilmez.
+
+DER çözümleme harici kütüphane gerektirmez (yalnızca okunan alanlar için
+minimal ASN.1 okuyucu).
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# ============ OID TABLOLARI ============
+NAME_OIDS = {
+    '2.5.4.3': 'CN',
+    '2.5.4.4': 'SN',
+    '2.5.4.5': 'serialNumber',
+    '2.5.4.6': 'C',
+    '2.5.4.7': 'L',
+    '2.5.4.8': 'ST',
+    '2.5.4.9': 'street',
+    '2.5.4.10': 'O',
+    '2.5.4.11': 'OU',
+    '2.5.4.12': 'title',
+    '2.5.4.17': 'postalCode',
+    '2.5.4.42': 'GN',
+    '2.5.4.97': 'organizationIdentifier',
+    '1.2.840.113549.1.9.1': 'emailAddress',
+}
+
+SIGNATURE_OIDS = {
+    '1.2.840.113549.1.1.5': 'sha1WithRSAEncryption',
+    '1.2.840.113549.1.1.11': 'sha256WithRSAEncryption',
+    '1.2.840.113549.1.1.12': 'sha384WithRSAEncryption',
+    '1.2.840.113549.1.1.13': 'sha512WithRSAEncryption',
+    '1.2.840.113549.1.1.10': 'RSASSA-PSS',
+    '1.2.840.10045.4.3.2': 'ecdsa-with-SHA256',
+    '1.2.840.10045.4.3.3': 'ecdsa-with-SHA384',
+    '1.2.840.10045.4.3.4': 'ecdsa-with-SHA512',
+}
+
+KEY_OIDS = {
+    '1.2.840.113549.1.1.1': 'RSA',
+    '1.2.840.10045.2.1': 'EC',
+}
+
+CURVE_OIDS = {
+    '1.2.840.10045.3.1.7': ('P-256', 256),
+    '1.3.132.0.34': ('P-384', 384),
+    '1.3.132.0.35': ('P-521', 521),
+}
+
+# ASN.1 string etiketleri -> kodlama
+STRING_TAGS = {
+    0x0C: 'utf-8',
+    0x13: 'ascii',
+    0x16: 'ascii',
+    0x14: 'latin-1',
+    0x1E: 'utf-16-be',
+    0x1C: 'utf-32-be',
+}
+
+
+# ============ MİNİMAL DER OKUYUCU ============
+def _tlv(data: bytes, pos: int) -> Tuple[int, int, int]:
+    """pos'taki TLV: (etiket, değer başlangıcı, değer sonu)"""
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        count = length & 0x7F
+        length = int.from_bytes(data[pos:pos + count], 'big')
+        pos += count
+    return tag, pos, pos + length
+
+
+def _children(data: bytes, start: int, end: int) -> List[Tuple[int, int, int]]:
+    items = []
+    while start < end:
+        tag, value_start, value_end = _tlv(data, start)
+        items.append((tag, value_start, value_end))
+        start = value_end
+    return items
+
+
+def _oid(raw: bytes) -> str:
+    parts = [raw[0] // 40, raw[0] % 40]
+    value = 0
+    for byte in raw[1:]:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            parts.append(value)
+            value = 0
+    return '.'.join(map(str, parts))
+
+
+def _time(tag: int, raw: bytes) -> str:
+    """UTCTime / GeneralizedTime -> ISO 8601 (UTC)"""
+    text = raw.decode('ascii').rstrip('Z')
+    if tag == 0x17:
+        year = int(text[:2])
+        text = str(1900 + year if year >= 50 else 2000 + year) + text[2:]
+    return f"{text[:4]}-{text[4:6]}-{text[6:8]}T{text[8:10]}:{text[10:12]}:{text[12:14] or '00'}Z"
+
+
+def _name(data: bytes, start: int, end: int) -> List[Tuple[str, str]]:
+    """Name (RDNSequence) -> [(kısa ad, değer)]"""
+    attributes = []
+    for _, set_start, set_end in _children(data, start, end):
+        for _, seq_start, seq_end in _children(data, set_start, set_end):
+            (_, oid_start, oid_end), (value_tag, value_start, value_end) = _children(data, seq_start, seq_end)[:2]
+            oid = _oid(data[oid_start:oid_end])
+            raw = data[value_start:value_end]
+            value = raw.decode(STRING_TAGS.get(value_tag, 'latin-1'), errors='replace')
+            attributes.append((NAME_OIDS.get(oid, oid), value))
+    return attributes
+
+
+def _format_name(attributes: List[Tuple[str, str]]) -> str:
+    """RFC 4514 sırası (en özelden en genele)"""
+    return ','.join(f"{key}={value}" for key, value in reversed(attributes))
+
+
+def parse_certificate_der(der: bytes) -> Dict[str, Any]:
+    """DER sertifikadan rapor/kontrol için gereken alanları çıkar"""
+    _, cert_start, cert_end = _tlv(der, 0)
+    tbs, signature_algorithm = _children(der, cert_start, cert_end)[:2]
+    fields = _children(der, tbs[1], tbs[2])
+    if fields[0][0] == 0xA0:        # [0] EXPLICIT version
+        fields = fields[1:]
+    serial, _, issuer, validity, subject, spki = fields[:6]
+
+    serial_number = int.from_bytes(der[serial[1]:serial[2]], 'big', signed=True)
+    not_before, not_after = (_time(tag, der[s:e]) for tag, s, e in _children(der, validity[1], validity[2])[:2])
+    subject_attributes = _name(der, subject[1], subject[2])
+    issuer_attributes = _name(der, issuer[1], issuer[2])
+
+    sig_oid_tlv = _children(der, signature_algorithm[1], signature_algorithm[2])[0]
+    sig_oid = _oid(der[sig_oid_tlv[1]:sig_oid_tlv[2]])
+
+    key_algorithm_tlv, key_bits_tlv = _children(der, spki[1], spki[2])[:2]
+    key_parts = _children(der, key_algorithm_tlv[1], key_algorithm_tlv[2])
+    key_oid = _oid(der[key_parts[0][1]:key_parts[0][2]])
+    key_algorithm = KEY_OIDS.get(key_oid, key_oid)
+    key_size, curve = None, ''
+    if key_algorithm == 'EC' and len(key_parts) > 1 and key_parts[1][0] == 0x06:
+        curve_oid = _oid(der[key_parts[1][1]:key_parts[1][2]])
+        curve, key_size = CURVE_OIDS.get(curve_oid, (curve_oid, None))
+    elif key_algorithm == 'RSA':
+        # BIT STRING: ilk bayt kullanılmayan bit sayısı, ardından RSAPublicKey
+        _, rsa_start, rsa_end = _tlv(der, key_bits_tlv[1] + 1)
+        modulus = _children(der, rsa_start, rsa_end)[0]
+        key_size = int.from_bytes(der[modulus[1]:modulus[2]], 'big').bit_length()
+
+    return {
+        'fingerprint_sha256': hashlib.sha256(der).hexdigest(),
+        'serial_number': str(serial_number),
+        'serial_hex': format(serial_number, 'X'),
+        'subject': _format_name(subject_attributes),
+        'subject_attributes': dict(subject_attributes),
+        'issuer': _format_name(issuer_attributes),
+        'issuer_attributes': dict(issuer_attributes),
+        'not_before': not_before,
+        'not_after': not_after,
+        'signature_algorithm': SIGNATURE_OIDS.get(sig_oid, sig_oid),
+        'key_algorithm': key_algorithm,
+        'key_size': key_size,
+        'curve': curve,
+    }
+
+
+# DN karşılaştırmasında eş sayılan öznitelik adları
+DN_ALIASES = {
+    'E': 'EMAILADDRESS',
+    'S': 'ST',
+    'SERIALNUMBER': 'SERIALNUMBER',
+    'OID.2.5.4.5': 'SERIALNUMBER',
+    '2.5.4.5': 'SERIALNUMBER',
+    'OID.2.5.4.97': 'ORGANIZATIONIDENTIFIER',
+    '2.5.4.97': 'ORGANIZATIONIDENTIFIER',
+}
+
+
+def normalize_dn(name: str) -> Tuple[Tuple[str, str], ...]:
+    """DN metnini karşılaştırılabilir biçime getir: RFC 4514 'CN=..,OU=..' ile
+    XML X509IssuerName 'CN=..., OU=...' aynı sonucu verir (boşluk / büyük-küçük harf)"""
+    parts, current, escaped = [], [], False
+    for char in name or '':
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == '\\':
+            current.append(char)
+            escaped = True
+        elif char in ',;':
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append(''.join(current))
+
+    result = []
+    for part in parts:
+        key, sep, value = part.partition('=')
+        if not sep:
+            continue
+        key = key.strip().upper()
+        result.append((DN_ALIASES.get(key, key), ' '.join(value.split()).casefold()))
+    return tuple(result)
+
+
+def _to_utc(value) -> datetime:
+    if isinstance(value, datetime):
+        moment = value
+    else:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def check_validity(info: Dict[str, Any], moment=None) -> str:
+    """Sertifika verilen anda (varsayılan: şimdi) geçerli mi: valid / expired / not_yet_valid"""
+    moment = _to_utc(moment) if moment else datetime.now(timezone.utc)
+    if moment < _to_utc(info['not_before']):
+        return 'not_yet_valid'
+    if moment > _to_utc(info['not_after']):
+        return 'expired'
+    return 'valid'
+
+
+class CertificateCache:
+    """Parmak izi anahtarlı sertifika önbelleği (LRU + opsiyonel kalıcı JSON katmanı)"""
+
+    def __init__(self, maxsize: int = 1024, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.path = path
+        # base64 metin -> parmak izi (aynı metin tekrar çözülmez)
+        self._by_text: 'OrderedDict[str, str]' = OrderedDict()
+        self._by_fingerprint: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        # (normalize issuer, seri no) -> parmak izi; bellek LRU'su ve kalıcı katmanla birlikte tutulur
+        self._by_serial: Dict[Tuple[Tuple[Tuple[str, str], ...], str], str] = {}
+        self._persistent: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._persistent = json.load(f)
+            for fingerprint, info in self._persistent.items():
+                self._by_serial[self._serial_key(info)] = fingerprint
+
+    @staticmethod
+    def _serial_key(info: Dict[str, Any]):
+        return normalize_dn(info['issuer']), info['serial_number']
+
+    def _remember(self, info: Dict[str, Any]):
+        fingerprint = info['fingerprint_sha256']
+        self._by_fingerprint[fingerprint] = info
+        self._by_fingerprint.move_to_end(fingerprint)
+        self._by_serial[self._serial_key(info)] = fingerprint
+        while len(self._by_fingerprint) > self.maxsize:
+            evicted, evicted_info = self._by_fingerprint.popitem(last=False)
+            # Kalıcı katmandakiler by_fingerprint ile geri yüklenebildiği için indekste kalır
+            key = self._serial_key(evicted_info)
+            if evicted not in self._persistent and self._by_serial.get(key) == evicted:
+                del self._by_serial[key]
+
+    def get(self, certificate_b64: str) -> Optional[Dict[str, Any]]:
+        """ds:X509Certificate metninden sertifika bilgisi; çözülemezse None"""
+        text = ''.join(certificate_b64.split())
+        fingerprint = self._by_text.get(text)
+        if fingerprint is not None:
+            info = self.by_fingerprint(fingerprint)
+            if info is not None:
+                self._by_text.move_to_end(text)
+                self.hits += 1
+                return info
+
+        try:
+            der = base64.b64decode(text, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+        fingerprint = hashlib.sha256(der).hexdigest()
+        info = self.by_fingerprint(fingerprint)
+        if info is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            try:
+                info = parse_certificate_der(der)
+            except (IndexError, ValueError, UnicodeDecodeError):
+                return None
+            self._remember(info)
+            if self.path is not None:
+                self._persistent[fingerprint] = info
+                self._dirty = True
+
+        self._by_text[text] = fingerprint
+        while len(self._by_text) > self.maxsize:
+            self._by_text.popitem(last=False)
+        return info
+
+    def by_fingerprint(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Bellek, sonra kalıcı katmandan parmak izi ile bul"""
+        info = self._by_fingerprint.get(fingerprint)
+        if info is not None:
+            self._by_fingerprint.move_to_end(fingerprint)
+            return info
+        info = self._persistent.get(fingerprint)
+        if info is not None:
+            self._remember(info)
+        return info
+
+    def by_serial(self, serial_number: str, issuer: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Seri numarası (ve opsiyonel issuer) ile bul; xades IssuerSerial için"""
+        serial_number = str(serial_number).strip()
+        if issuer is not None:
+            fingerprint = self._by_serial.get((normalize_dn(issuer), serial_number))
+        else:
+            fingerprint = next((fp for (_, serial), fp in self._by_serial.items() if serial == serial_number), None)
+        return self.by_fingerprint(fingerprint) if fingerprint else None
+
+    def save(self):
+        """Kalıcı katmanı diske yaz (değişiklik varsa)"""
+        if self.path is None or not self._dirty:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._persistent, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+# Süreç genelinde paylaşılan varsayılan önbellek
+DEFAULT_CACHE = CertificateCache()
+
+
+def certificate_report(signature: Dict[str, Any], cache: Optional[CertificateCache] = None) -> Dict[str, Any]:
+    """ubl_signature çıktısından sertifika bilgisi + imza anındaki geçerlilik"""
+    cache = cache or DEFAULT_CACHE
+    info = None
+    if signature.get('certificate'):
+        info = cache.get(signature['certificate'])
+    elif signature.get('certificate_serial'):
+        info = cache.by_serial(signature['certificate_serial'], signature.get('certificate_issuer'))
+    if info is None:
+        return {}
+    report = dict(info)
+    if signature.get('signing_time'):
+        try:
+            report['valid_at_signing'] = check_validity(info, signature['signing_time'])
+        except ValueError:
+            # ISO 8601 dışı SigningTime (ör. '13.01.2026 10:00')
+            report['valid_at_signing'] = 'unparseable'
+    report['valid_now'] = check_validity(info)
+    return report
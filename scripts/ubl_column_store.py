@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Fatura Kolon Deposu (mmap NumPy)
+Fatura ve kalem düzeyindeki sayısal alanları (kuruş cinsinden tutarlar, oranlar,
+gün numarası olarak tarihler, sözlük kodlu VKN / birim / para birimi) kolon
+başına ham ikili dosyalara yazar. Dosyalar np.memmap ile açılır; "tedarikçi X
+için ay ve KDV oranı bazında toplam KDV" gibi sorgular XML parse etmeden,
+mmap'li kolonlar üzerinde vektörel taramayla milisaniyeler içinde çalışır.
+
+Ekleme (append) yolu: kolon dosyalarının sonuna yazılır, satır sayıları en son
+meta.json'a atomik olarak işlenir. Yarıda kalan bir ekleme sonraki eklemede
+kesilir (truncate); okuyucular yalnızca meta'daki satır sayısını görür.
+Aynı UUID'li fatura ikinci kez eklenmez.
+
+Kullanım:
+    python scripts/ubl_column_store.py ingest arsiv/2026-01
+    python scripts/ubl_column_store.py query --by kdv_percent,month --where supplier=8150407196
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ubl_documents import CAC, CBC, lookup_document_type
+from ubl_money import format_minor, parse_scaled
+
+# ============ SABİT NOKTA ÖLÇEKLERİ ============
+AMOUNT_DIGITS = 2      # Tutarlar kuruş cinsinden
+QTY_DIGITS = 6         # Miktar 10^-6 hassasiyetinde
+PRICE_DIGITS = 6       # Birim fiyat 10^-6 hassasiyetinde
+RATE_DIGITS = 2        # KDV oranı %0.01 hassasiyetinde
+
+# Eksik alan işaretleri
+MISSING = np.iinfo(np.int64).min
+MISSING_DATE = np.iinfo(np.int32).min
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+KDV_CODE = '0015'
+
+# Tablo -> [(kolon, dtype)]
+SCHEMA: Dict[str, List[Tuple[str, str]]] = {
+    'invoices': [
+        ('date', 'int32'), ('supplier', 'int32'), ('customer', 'int32'), ('currency', 'int32'),
+        ('type', 'int32'), ('invoice_id', 'int32'), ('uuid', 'int32'), ('line_count', 'int32'),
+        ('line_extension', 'int64'), ('tax_exclusive', 'int64'), ('tax_inclusive', 'int64'),
+        ('payable', 'int64'), ('tax_total', 'int64'),
+    ],
+    'lines': [
+        ('inv', 'int64'), ('unit', 'int32'), ('quantity', 'int64'), ('price', 'int64'),
+        ('line_extension', 'int64'), ('tax_amount', 'int64'), ('kdv_percent', 'int64'), ('kdv_amount', 'int64'),
+    ],
+}
+
+# Sözlük kodlu kolon -> sözlük adı (VKN sözlüğü tedarikçi ve müşteri için ortak)
+DICT_COLUMNS = {
+    'supplier': 'vkn', 'customer': 'vkn', 'currency': 'currency', 'type': 'type_code',
+    'invoice_id': 'invoice_id', 'uuid': 'uuid', 'unit': 'unit',
+}
+
+# LegalMonetaryTotal alanları -> kolon
+MONETARY_FIELDS = {
+    CBC + 'LineExtensionAmount': 'line_extension',
+    CBC + 'TaxExclusiveAmount': 'tax_exclusive',
+    CBC + 'TaxInclusiveAmount': 'tax_inclusive',
+    CBC + 'PayableAmount': 'payable',
+}
+
+PATH_PRICE = f'{CAC}Price/{CBC}PriceAmount'
+PATH_SUBTOTALS = f'{CAC}TaxTotal/{CAC}TaxSubtotal'
+PATH_TAX_AMOUNT = f'{CAC}TaxTotal/{CBC}TaxAmount'
+PATH_TAX_CODE = f'{CAC}TaxCategory/{CAC}TaxScheme/{CBC}TaxTypeCode'
+PATH_CATEGORY_PERCENT = f'{CAC}TaxCategory/{CBC}Percent'
+
+
+# ============ XML -> KAYIT ============
+def _scaled(elem, digits: int = AMOUNT_DIGITS) -> int:
+    text = (elem.text or '').strip() if elem is not None else ''
+    if not text:
+        return MISSING
+    try:
+        return parse_scaled(text, digits)[0]
+    except ValueError:
+        return MISSING
+
+
+def _day_number(text: str) -> int:
+    try:
+        return date.fromisoformat(text).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        return MISSING_DATE
+
+
+def _line_record(elem, quantity_tag: str) -> Tuple:
+    quantity = elem.find(quantity_tag)
+    # KDV kolonlarına yalnızca 0015 alt toplamı yazılır; stopaj vb. kesintiler KDV sayılmaz
+    kdv_percent = kdv_amount = MISSING
+    for sub in elem.iterfind(PATH_SUBTOTALS):
+        if (sub.findtext(PATH_TAX_CODE) or '').strip() == KDV_CODE:
+            percent = sub.find(CBC + 'Percent')
+            kdv_percent = _scaled(percent if percent is not None else sub.find(PATH_CATEGORY_PERCENT), RATE_DIGITS)
+            kdv_amount = _scaled(sub.find(CBC + 'TaxAmount'))
+            break
+    return (
+        quantity.get('unitCode', '') if quantity is not None else '',
+        _scaled(quantity, QTY_DIGITS),
+        _scaled(elem.find(PATH_PRICE), PRICE_DIGITS),
+        _scaled(elem.find(CBC + 'LineExtensionAmount')),
+        _scaled(elem.find(PATH_TAX_AMOUNT)),
+        kdv_percent,
+        kdv_amount,
+    )
+
+
+def parse_invoice(path: str) -> Dict[str, Any]:
+    """Faturayı tek geçişte depo kaydına çevir (başlık + kalem tuple'ları)"""
+    record: Dict[str, Any] = {'file': str(path), 'header': {}, 'totals': {}, 'lines': []}
+    root = None
+    doc_type = None
+    depth = 0
+    try:
+        for event, elem in ET.iterparse(path, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = elem
+                    doc_type = lookup_document_type(elem.tag)
+                    if doc_type is None or not doc_type.has_totals:
+                        record['error'] = f"Desteklenmeyen kök: {elem.tag[elem.tag.rfind('}') + 1:]}"
+                        return record
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            tag = elem.tag
+            if tag == doc_type.line_tag:
+                record['lines'].append(_line_record(elem, doc_type.quantity_tag))
+            elif tag == CAC + 'LegalMonetaryTotal':
+                for child in elem:
+                    name = MONETARY_FIELDS.get(child.tag)
+                    if name:
+                        record['totals'][name] = _scaled(child)
+            elif tag == CAC + 'TaxTotal':
+                amount = _scaled(elem.find(CBC + 'TaxAmount'))
+                if amount != MISSING:
+                    record['totals']['tax_total'] = record['totals'].get('tax_total', 0) + amount
+            else:
+                doc_type.read_header(elem, record['header'])
+            elem.clear()
+            del root[:]
+    except (ET.ParseError, OSError) as e:
+        record['error'] = str(e)
+    return record
+
+
+# ============ DEPO ============
+class ColumnStore:
+    """Kolon başına ham ikili dosya + meta.json + ekleme-only sözlük dosyaları"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.meta_path = os.path.join(root, 'meta.json')
+        for table in SCHEMA:
+            os.makedirs(os.path.join(root, table), exist_ok=True)
+        os.makedirs(os.path.join(root, 'dicts'), exist_ok=True)
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {'rows': {table: 0 for table in SCHEMA}, 'dicts': {}}
+        self.dicts: Dict[str, List[str]] = {}
+        self._codes: Dict[str, Dict[str, int]] = {}
+        self._maps: Dict[Tuple[str, str], np.ndarray] = {}
+
+    # ---- okuma ----
+    def rows(self, table: str) -> int:
+        return self.meta['rows'][table]
+
+    def _column_path(self, table: str, name: str) -> str:
+        return os.path.join(self.root, table, name + '.bin')
+
+    def column(self, table: str, name: str) -> np.ndarray:
+        """Kolonu salt okunur memmap olarak döndür (boş tablo için boş dizi)"""
+        key = (table, name)
+        array = self._maps.get(key)
+        if array is None:
+            dtype = dict(SCHEMA[table])[name]
+            count = self.rows(table)
+            if count:
+                array = np.memmap(self._column_path(table, name), dtype=dtype, mode='r', shape=(count,))
+            else:
+                array = np.zeros(0, dtype=dtype)
+            self._maps[key] = array
+        return array
+
+    def dictionary(self, name: str) -> List[str]:
+        values = self.dicts.get(name)
+        if values is None:
+            values = []
+            info = self.meta['dicts'].get(name)
+            if info:
+                with open(os.path.join(self.root, 'dicts', name + '.jsonl'), 'r', encoding='utf-8') as f:
+                    for _ in range(info['count']):
+                        values.append(json.loads(f.readline()))
+            self.dicts[name] = values
+        return values
+
+    def _code_map(self, name: str) -> Dict[str, int]:
+        codes = self._codes.get(name)
+        if codes is None:
+            codes = self._codes[name] = {v: i for i, v in enumerate(self.dictionary(name))}
+        return codes
+
+    def values(self, table: str, name: str) -> np.ndarray:
+        """Kolon ya da türetilmiş değer: kalem tablosunda fatura kolonları 'inv' ile
+        taşınır; 'month' (YYYYMM) ve 'year' tarih kolonundan hesaplanır"""
+        if name in dict(SCHEMA[table]):
+            return self.column(table, name)
+        if table == 'lines':
+            return self.values('invoices', name)[self.column('lines', 'inv')]
+        if name in ('month', 'year'):
+            days = self.column(table, 'date')
+            valid = days != MISSING_DATE
+            months = np.where(valid, days, 0).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+            years = months // 12 + 1970
+            result = years * 100 + months % 12 + 1 if name == 'month' else years
+            return np.where(valid, result, MISSING)
+        raise KeyError(f"'{table}' tablosunda kolon yok: {name}")
+
+    # ---- yazma ----
+    def _encode(self, name: str, value: str, new_values: Dict[str, List[str]]) -> int:
+        codes = self._code_map(name)
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self.dictionary(name).append(value)
+            new_values.setdefault(name, []).append(value)
+        return code
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """Kayıtları kolonlara ekle; meta en son yazılır"""
+        columns = {table: {name: [] for name, _ in cols} for table, cols in SCHEMA.items()}
+        new_values: Dict[str, List[str]] = {}
+        seen_uuids = self._code_map('uuid')
+        stats = {'added': 0, 'duplicates': 0, 'errors': 0, 'lines': 0}
+        inv_index = self.rows('invoices')
+        inv_cols = columns['invoices']
+        line_cols = columns['lines']
+
+        for record in records:
+            if record.get('error'):
+                stats['errors'] += 1
+                print(f"❌ {record['file']}: {record['error']}", file=sys.stderr)
+                continue
+            header = record['header']
+            uuid = header.get('uuid', '')
+            if uuid and uuid in seen_uuids:
+                stats['duplicates'] += 1
+                continue
+            totals = record['totals']
+            inv_cols['date'].append(_day_number(header.get('issue_date', '')))
+            for name in ('supplier', 'customer'):
+                inv_cols[name].append(self._encode('vkn', header.get(f'{name}_vkn', ''), new_values))
+            inv_cols['currency'].append(self._encode('currency', header.get('currency', ''), new_values))
+            inv_cols['type'].append(self._encode('type_code', header.get('type_code', ''), new_values))
+            inv_cols['invoice_id'].append(self._encode('invoice_id', header.get('id', ''), new_values))
+            inv_cols['uuid'].append(self._encode('uuid', uuid, new_values))
+            inv_cols['line_count'].append(len(record['lines']))
+            for name in ('line_extension', 'tax_exclusive', 'tax_inclusive', 'payable', 'tax_total'):
+                inv_cols[name].append(totals.get(name, MISSING))
+            for unit, qty, price, line_ext, tax_amount, kdv_percent, kdv_amount in record['lines']:
+                line_cols['inv'].append(inv_index)
+                line_cols['unit'].append(self._encode('unit', unit, new_values))
+                line_cols['quantity'].append(qty)
+                line_cols['price'].append(price)
+                line_cols['line_extension'].append(line_ext)
+                line_cols['tax_amount'].append(tax_amount)
+                line_cols['kdv_percent'].append(kdv_percent)
+                line_cols['kdv_amount'].append(kdv_amount)
+            inv_index += 1
+            stats['added'] += 1
+            stats['lines'] += len(record['lines'])
+
+        if not stats['added']:
+            return stats
+
+        # Kolon dosyaları: önce işlenmiş boyuta kes (yarım kalan ekleme), sonra sona yaz
+        for table, cols in SCHEMA.items():
+            count = self.rows(table)
+            for name, dtype in cols:
+                path = self._column_path(table, name)
+                with open(path, 'ab') as f:
+                    f.truncate(count * np.dtype(dtype).itemsize)
+                    f.write(np.asarray(columns[table][name], dtype=dtype).tobytes())
+        for name, values in new_values.items():
+            info = self.meta['dicts'].setdefault(name, {'count': 0, 'bytes': 0})
+            path = os.path.join(self.root, 'dicts', name + '.jsonl')
+            data = ''.join(json.dumps(v, ensure_ascii=False) + '\n' for v in values).encode('utf-8')
+            with open(path, 'ab') as f:
+                f.truncate(info['bytes'])
+                f.write(data)
+            info['count'] += len(values)
+            info['bytes'] += len(data)
+
+        self.meta['rows']['invoices'] = inv_index
+        self.meta['rows']['lines'] += stats['lines']
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+        self._maps.clear()
+        return stats
+
+    # ---- sorgu ----
+    def _label(self, name: str, value: int):
+        if value == MISSING:
+            return None
+        if name in DICT_COLUMNS:
+            return self.dictionary(DICT_COLUMNS[name])[value]
+        if name == 'date':
+            return str(np.datetime64(value, 'D'))
+        if name == 'kdv_percent':
+            return format_minor(value, RATE_DIGITS)
+        return value
+
+    def mask(self, table: str, where: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Eşitlik filtreleri; sözlük kolonlarında metin değer koda çevrilir"""
+        selected = np.ones(self.rows(table), dtype=bool)
+        for name, value in (where or {}).items():
+            if name in DICT_COLUMNS and isinstance(value, str):
+                code = self._code_map(DICT_COLUMNS[name]).get(value)
+                if code is None:
+                    return np.zeros(self.rows(table), dtype=bool)
+                value = code
+            elif name == 'kdv_percent' and isinstance(value, str):
+                value = parse_scaled(value, RATE_DIGITS)[0]
+            selected &= self.values(table, name) == int(value)
+        return selected
+
+    def group_sum(self, table: str, value: str, by: Sequence[str],
+                  where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Seçili satırlarda değer kolonunu anahtarlar bazında tam (int64) topla"""
+        values = self.values(table, value)
+        selected = self.mask(table, where) & (values != MISSING)
+        n = int(selected.sum())
+        if not n:
+            return []
+        # Her anahtarı kendi içinde sıkıştır, birleşik tek int64 anahtar üzerinde grupla
+        levels, codes = [], []
+        for name in by:
+            level, code = np.unique(np.asarray(self.values(table, name))[selected], return_inverse=True)
+            levels.append(level)
+            codes.append(code.ravel())
+        combined = np.ravel_multi_index(codes, [len(level) for level in levels]) if by else np.zeros(n, dtype=np.int64)
+        groups, inverse = np.unique(combined, return_inverse=True)
+        inverse = inverse.ravel()
+        totals = np.zeros(len(groups), dtype=np.int64)
+        np.add.at(totals, inverse, np.asarray(values)[selected])
+        counts = np.bincount(inverse, minlength=len(groups))
+        positions = np.unravel_index(groups, [len(level) for level in levels]) if by else []
+        out = []
+        for i in range(len(groups)):
+            row = {name: self._label(name, int(level[pos[i]])) for name, level, pos in zip(by, levels, positions)}
+            row.update(total=int(totals[i]), count=int(counts[i]))
+            out.append(row)
+        return out
+
+
+# ============ ALIM ============
+def expand_paths(paths: Iterable[str]) -> Iterator[str]:
+    """Klasörleri içindeki .xml dosyalarına aç"""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith('.xml'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def ingest(store: ColumnStore, paths: Iterable[str], workers: int = 1) -> Dict[str, int]:
+    """Faturaları parse edip depoya ekle (opsiyonel process havuzu ile)"""
+    paths = list(expand_paths(paths))
+    if workers <= 1 or len(paths) < 2:
+        return store.append(parse_invoice(p) for p in paths)
+    chunk_size = max(1, -(-len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return store.append(pool.map(parse_invoice, paths, chunksize=chunk_size))
+
+
+def _parse_where(items: Sequence[str]) -> Dict[str, str]:
+    where = {}
+    for item in items:
+        name, sep, value = item.partition('=')
+        if not sep:
+            raise ValueError(f"Filtre 'kolon=değer' biçiminde olmalı: {item}")
+        where[name.strip()] = value.strip()
+    return where
+
+
+def main():
+    parser = argparse.ArgumentParser(description='mmap NumPy fatura kolon deposu')
+    parser.add_argument('--store', default='scripts/column_store', help='Depo klasörü')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = sub.add_parser('ingest', help='Faturaları depoya ekle')
+    ingest_parser.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml',
+                                                            'scripts/invoice_skr2026000000187.xml'])
+    ingest_parser.add_argument('--workers', type=int, default=1, help='Paralel process sayısı')
+
+    query_parser = sub.add_parser('query', help='Vektörel group-by sorgusu')
+    query_parser.add_argument('--table', choices=sorted(SCHEMA), default='lines')
+    query_parser.add_argument('--value', default='kdv_amount', help='Toplanacak kolon')
+    query_parser.add_argument('--by', default='currency,kdv_percent,month', help='Anahtarlar (virgülle)')
+    query_parser.add_argument('--where', action='append', default=[], help="Filtre: kolon=değer (tekrarlanabilir)")
+    args = parser.parse_args()
+
+    store = ColumnStore(args.store)
+    if args.command == 'ingest':
+        started = time.perf_counter()
+        stats = ingest(store, args.files, args.workers)
+        elapsed = time.perf_counter() - started
+        print(f"✅ {stats['added']} fatura / {stats['lines']} kalem eklendi, {stats['duplicates']} tekrar, "
+              f"{stats['errors']} hata ({elapsed:.2f} sn)")
+        print(f"📦 Depo: {store.rows('invoices'):,} fatura, {store.rows('lines'):,} kalem -> {args.store}")
+        return
+
+    by = [k.strip() for k in args.by.split(',') if k.strip()]
+    try:
+        where = _parse_where(args.where)
+        started = time.perf_counter()
+        rows = store.group_sum(args.table, args.value, by, where)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - started
+
+    print(f"📊 {args.table}.{args.value} / {', '.join(by)}"
+          f"{' [' + ', '.join(args.where) + ']' if args.where else ''} ({elapsed * 1000:.1f} ms)")
+    print("-" * 80)
+    digits = {'quantity': QTY_DIGITS, 'price': PRICE_DIGITS, 'kdv_percent': RATE_DIGITS}.get(args.value, AMOUNT_DIGITS)
+    for row in rows:
+        label = ' / '.join(str(row[k]) for k in by)
+        print(f"  {label}: {format_minor(row['total'], digits)} ({row['count']} kayıt)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+UBL Belge Tipi Kaydı (Registry)
+Kök element ilk start olayında okunur ve belge tipine (Invoice, CreditNote,
+DespatchAdvice, ReceiptAdvice, ApplicationResponse) ait önceden derlenmiş
+(Clark notasyonlu) çıkarıcı setine yönlendirilir. Tüm tipler aynı tek geçişli
+iterparse motorunu paylaşır; karışık tipli klasörler deneme-yanılma parse
+olmadan tek seferde işlenir.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+UBL_NS = 'urn:oasis:names:specification:ubl:schema:xsd:'
+CBC = '{' + UBL_NS + 'CommonBasicComponents-2}'
+CAC = '{' + UBL_NS + 'CommonAggregateComponents-2}'
+
+# Alan tanımı: (alan adı, 'cac:A/cbc:B' yolu, okunacak attribute ya da None -> text)
+FieldSpec = Tuple[str, str, Optional[str]]
+
+
+def _clark(path: str) -> str:
+    """'cac:Party/cbc:ID' -> Clark notasyonlu ElementTree yolu"""
+    return path.replace('cac:', CAC).replace('cbc:', CBC)
+
+
+class DocumentType:
+    """Bir UBL belge tipi için önceden derlenmiş etiket ve yol seti"""
+
+    def __init__(self, name: str, line: Optional[str], header: List[FieldSpec], line_fields: List[FieldSpec],
+                 quantity: Optional[str] = None, has_totals: bool = False):
+        self.name = name
+        self.root_tag = '{' + UBL_NS + name + '-2}' + name
+        self.line_tag = CAC + line if line else None
+        self.quantity_tag = CBC + quantity if quantity else None
+        self.has_totals = has_totals
+        # Kökün doğrudan çocuğu -> [(alan, çocuk içindeki yol ya da None, attribute)]
+        self.header: Dict[str, List[Tuple[str, Optional[str], Optional[str]]]] = {}
+        for field, path, attr in header:
+            first, _, rest = path.partition('/')
+            self.header.setdefault(_clark(first), []).append((field, _clark(rest) or None, attr))
+        self.line_fields = [(field, _clark(path), attr) for field, path, attr in line_fields]
+
+    def __repr__(self) -> str:
+        return f"DocumentType({self.name})"
+
+    def read_header(self, elem, header: Dict[str, str]):
+        """Kökün tamamlanmış bir çocuğundan başlık alanlarını oku"""
+        for field, path, attr in self.header.get(elem.tag, ()):
+            if field in header:
+                continue
+            target = elem if path is None else elem.find(path)
+            if target is not None:
+                value = target.get(attr, '') if attr else (target.text or '').strip()
+                if value:
+                    header[field] = value
+
+    def read_line(self, elem) -> Dict[str, str]:
+        """Satır elementinden satır alanlarını oku"""
+        line = {}
+        for field, path, attr in self.line_fields:
+            target = elem.find(path)
+            if target is not None:
+                line[field] = target.get(attr, '') if attr else (target.text or '').strip()
+        return line
+
+
+DOCUMENT_TYPES: Dict[str, DocumentType] = {}
+_BY_LOCAL_NAME: Dict[str, DocumentType] = {}
+
+
+def register_document_type(doc_type: DocumentType) -> DocumentType:
+    """Belge tipini kök etiketi (ve yerel adı) ile kaydet"""
+    DOCUMENT_TYPES[doc_type.root_tag] = doc_type
+    _BY_LOCAL_NAME[doc_type.name] = doc_type
+    return doc_type
+
+
+def lookup_document_type(root_tag: str) -> Optional[DocumentType]:
+    """Kök etiketinden belge tipi; namespace hatalı belgelerde yerel ada düşer"""
+    doc_type = DOCUMENT_TYPES.get(root_tag)
+    if doc_type is None:
+        doc_type = _BY_LOCAL_NAME.get(root_tag[root_tag.rfind('}') + 1:])
+    return doc_type
+
+
+# ============ ORTAK ALANLAR ============
+COMMON_HEADER: List[FieldSpec] = [
+    ('id', 'cbc:ID', None),
+    ('uuid', 'cbc:UUID', None),
+    ('issue_date', 'cbc:IssueDate', None),
+    ('issue_time', 'cbc:IssueTime', None),
+    ('profile_id', 'cbc:ProfileID', None),
+]
+
+
+def _party_fields(prefix: str, element: str, wrapped: bool = True) -> List[FieldSpec]:
+    """Taraf alanları; VKN, MERSISNO / TICARETSICILNO gibi diğer kimliklerden önce
+    gelmeyebilir, bu yüzden schemeID ile seçilir (VKN yoksa TCKN)"""
+    party = f'cac:{element}/cac:Party' if wrapped else f'cac:{element}'
+    return [
+        (f'{prefix}_vkn', f"{party}/cac:PartyIdentification/cbc:ID[@schemeID='VKN']", None),
+        (f'{prefix}_vkn', f"{party}/cac:PartyIdentification/cbc:ID[@schemeID='TCKN']", None),
+        (f'{prefix}_name', f'{party}/cac:PartyName/cbc:Name', None),
+    ]
+
+
+MONETARY_HEADER: List[FieldSpec] = [
+    ('currency', 'cbc:DocumentCurrencyCode', None),
+    ('line_count', 'cbc:LineCountNumeric', None),
+    ('tax_total', 'cac:TaxTotal/cbc:TaxAmount', None),
+    ('payable', 'cac:LegalMonetaryTotal/cbc:PayableAmount', None),
+    ('payable_currency', 'cac:LegalMonetaryTotal/cbc:PayableAmount', 'currencyID'),
+]
+
+
+def _monetary_line(quantity: str) -> List[FieldSpec]:
+    return [
+        ('id', 'cbc:ID', None),
+        ('quantity', f'cbc:{quantity}', None),
+        ('unit', f'cbc:{quantity}', 'unitCode'),
+        ('line_extension', 'cbc:LineExtensionAmount', None),
+        ('price', 'cac:Price/cbc:PriceAmount', None),
+        ('item_name', 'cac:Item/cbc:Name', None),
+    ]
+
+
+def _despatch_line(quantity: str) -> List[FieldSpec]:
+    return [
+        ('id', 'cbc:ID', None),
+        ('quantity', f'cbc:{quantity}', None),
+        ('unit', f'cbc:{quantity}', 'unitCode'),
+        ('item_name', 'cac:Item/cbc:Name', None),
+    ]
+
+
+# ============ KAYITLI TİPLER ============
+INVOICE = register_document_type(DocumentType(
+    'Invoice', 'InvoiceLine',
+    COMMON_HEADER + [('type_code', 'cbc:InvoiceTypeCode', None)] + MONETARY_HEADER
+    + _party_fields('supplier', 'AccountingSupplierParty') + _party_fields('customer', 'AccountingCustomerParty'),
+    _monetary_line('InvoicedQuantity'), quantity='InvoicedQuantity', has_totals=True))
+
+CREDIT_NOTE = register_document_type(DocumentType(
+    'CreditNote', 'CreditNoteLine',
+    COMMON_HEADER + [('type_code', 'cbc:CreditNoteTypeCode', None)] + MONETARY_HEADER
+    + _party_fields('supplier', 'AccountingSupplierParty') + _party_fields('customer', 'AccountingCustomerParty'),
+    _monetary_line('CreditedQuantity'), quantity='CreditedQuantity', has_totals=True))
+
+DESPATCH_ADVICE = register_document_type(DocumentType(
+    'DespatchAdvice', 'DespatchLine',
+    COMMON_HEADER + [('type_code', 'cbc:DespatchAdviceTypeCode', None),
+                     ('line_count', 'cbc:LineCountNumeric', None)]
+    + _party_fields('supplier', 'DespatchSupplierParty') + _party_fields('customer', 'DeliveryCustomerParty'),
+    _despatch_line('DeliveredQuantity'), quantity='DeliveredQuantity'))
+
+RECEIPT_ADVICE = register_document_type(DocumentType(
+    'ReceiptAdvice', 'ReceiptLine',
+    COMMON_HEADER + [('type_code', 'cbc:ReceiptAdviceTypeCode', None),
+                     ('despatch_id', 'cac:DespatchDocumentReference/cbc:ID', None)]
+    + _party_fields('supplier', 'DespatchSupplierParty') + _party_fields('customer', 'DeliveryCustomerParty'),
+    _despatch_line('ReceivedQuantity'), quantity='ReceivedQuantity'))
+
+APPLICATION_RESPONSE = register_document_type(DocumentType(
+    'ApplicationResponse', 'DocumentResponse',
+    COMMON_HEADER + _party_fields('sender', 'SenderParty', wrapped=False)
+    + _party_fields('receiver', 'ReceiverParty', wrapped=False),
+    [('response_code', 'cac:Response/cbc:ResponseCode', None),
+     ('description', 'cac:Response/cbc:Description', None),
+     ('document_id', 'cac:DocumentReference/cbc:ID', None),
+     ('document_type_code', 'cac:DocumentReference/cbc:DocumentTypeCode', None)]))
+
+
+# ============ ORTAK MOTOR ============
+def detect_document_type(path: str) -> Optional[DocumentType]:
+    """Yalnızca ilk start olayını okuyarak belge tipini bul"""
+    for _, elem in ET.iterparse(path, events=('start',)):
+        return lookup_document_type(elem.tag)
+    return None
+
+
+def read_document(path: str, with_lines: bool = True) -> Dict[str, Any]:
+    """Belgeyi tek geçişte oku: tip, başlık alanları ve satırlar
+
+    Kökün doğrudan çocukları kapandıkça tipin derlenmiş alan seti uygulanır
+    ve element bırakılır; bellek satır sayısından bağımsızdır.
+    """
+    result: Dict[str, Any] = {'file': str(path), 'type': None, 'header': {}, 'lines': []}
+    doc_type = None
+    root = None
+    depth = 0
+    try:
+        for event, elem in ET.iterparse(path, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = elem
+                    doc_type = lookup_document_type(elem.tag)
+                    if doc_type is None:
+                        result['error'] = f"Desteklenmeyen kök: {elem.tag[elem.tag.rfind('}') + 1:]}"
+                        return result
+                    result['type'] = doc_type.name
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            if elem.tag == doc_type.line_tag:
+                if with_lines:
+                    result['lines'].append(doc_type.read_line(elem))
+            else:
+                doc_type.read_header(elem, result['header'])
+            elem.clear()
+            del root[:]
+    except ET.ParseError as e:
+        result['error'] = str(e)
+    return result
+
+
+def iter_documents(paths: Iterable[str], with_lines: bool = True) -> Iterator[Dict[str, Any]]:
+    """Karışık tipli dosya listesini tek tek oku"""
+    for path in paths:
+        yield read_document(str(path), with_lines)
+
+
+class LineStream:
+    """Satırları tek tek üreten iki geçişli okuyucu
+
+    İlk geçişte satırlar atılarak yalnızca başlık ve toplamları içeren kök ağacı
+    (root) tutulur; böylece satırlar okunmadan önce başlık, taraflar ve toplamlar
+    hazırdır. Satırlar ikinci geçişte birer birer üretilir ve hemen bırakılır.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.doc_type: Optional[DocumentType] = None
+        self.root = None
+        self.line_count = 0
+        self._scan()
+
+    def _iterparse(self):
+        if hasattr(self.source, 'seek'):
+            self.source.seek(0)
+        return ET.iterparse(self.source, events=('start', 'end'))
+
+    def _scan(self):
+        root = None
+        depth = 0
+        for event, elem in self._iterparse():
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = elem
+                    self.doc_type = lookup_document_type(elem.tag)
+                    if self.doc_type is None:
+                        raise ValueError(f"Desteklenmeyen kök: {elem.tag[elem.tag.rfind('}') + 1:]}")
+                continue
+            depth -= 1
+            if depth == 1 and elem.tag == self.doc_type.line_tag:
+                self.line_count += 1
+                root.remove(elem)
+        self.root = root
+
+    def __iter__(self) -> Iterator[Any]:
+        """Satır elementlerini sırayla üret; her satır bir sonraki adımda bırakılır"""
+        line_tag = self.doc_type.line_tag
+        root = None
+        depth = 0
+        for event, elem in self._iterparse():
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = elem
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            if elem.tag == line_tag:
+                yield elem
+            elem.clear()
+            del root[:]
+
+
+def main():
+    import sys
+    from collections import Counter
+
+    paths = sys.argv[1:] or ['scripts/invoice_esg2026000000115.xml']
+    counts = Counter()
+    for doc in iter_documents(paths):
+        if doc.get('error'):
+            counts['hata'] += 1
+            print(f"❌ {doc['file']}: {doc['error']}")
+            continue
+        counts[doc['type']] += 1
+        header = doc['header']
+        print(f"📄 [{doc['type']}] {header.get('id', '')} {header.get('type_code', '')} "
+              f"- {len(doc['lines'])} satır - {doc['file']}")
+    print("\n📊 " + ', '.join(f"{name}: {count}" for name, count in counts.most_common()))
+
+
+if __name__ == '__main__':
+    main()
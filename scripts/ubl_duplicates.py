@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+ETTN (UUID) ve Fatura Numarası Mükerrer Kontrolü
+Aynı faturanın iki kez gönderilmesi ya da bir numaranın yeniden kullanılması
+entegratör tarafından reddedilir. Bu araç gönderim öncesi klasörleri ve
+arşivleri tarar, iki tür tekrarı raporlar:
+
+  uuid    : aynı ETTN birden fazla belgede
+  number  : aynı düzenleyici (VKN) + belge tipi için aynı ID; ID'nin seri
+            (ilk 3 karakter) ve yıl (sonraki 4 hane) kırılımıyla
+
+Her belgeden yalnızca başlık alanları akış halinde okunur; ID, ETTN, tarih ve
+düzenleyici VKN'si bulunduğunda (satırlara gelmeden) parse durdurulur.
+
+İki anahtar deposu:
+  bellek (varsayılan): anahtar başına 64 bit özet + dosya no düz dizide; eşit
+                       özetler sonda sıralamayla bulunur ve yalnızca o dosyaların
+                       başlıkları yeniden okunarak tam anahtarla doğrulanır
+  --bloom            : sabit boyutlu Bloom filtresi + diskte (SQLite) anahtar
+                       günlüğü; yalnızca filtrenin "görülmüş olabilir" dediği
+                       anahtarlar bellekte aday olarak tutulur ve tarama sonunda
+                       günlükle tek birleştirmede kesinleştirilir. Bellek,
+                       beklenen belge sayısı ve yanlış pozitif oranıyla sınırlıdır.
+
+Kullanım:
+    python scripts/ubl_duplicates.py giden/ arsiv/2026 --workers 8
+    python scripts/ubl_duplicates.py arsiv/ --bloom --expected 20000000 --db mukerrer.db
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ubl_documents import lookup_document_type
+from ubl_path_catalog import expand_paths
+
+# Başlıkta aranan alanlar; hepsi bulununca parse kesilir
+KEY_FIELDS = ('id', 'uuid', 'issue_date', 'supplier_vkn')
+# GİB numara yapısı: 3 karakter seri + 4 hane yıl + 9 hane sıra
+NUMBER_PATTERN = re.compile(r'^([A-Z0-9]{3})(\d{4})(\d{9})$')
+
+DEFAULT_FP_RATE = 0.001
+LOG_BATCH = 10000
+READ_BLOCK_PER_WORKER = 256
+
+Key = Tuple[str, str]
+
+
+# ============ BAŞLIK OKUMA ============
+
+def read_keys(path: str) -> Dict[str, Optional[str]]:
+    """Belge tipi (ve tip kodu), ID, ETTN, tarih ve düzenleyici VKN'si; gerekli alanlar bulununca durur"""
+    header: Dict[str, str] = {}
+    doc_type = None
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if root is None:
+                root = elem
+                doc_type = lookup_document_type(elem.tag)
+                if doc_type is None:
+                    raise ValueError(f"Desteklenmeyen kök: {elem.tag[elem.tag.rfind('}') + 1:]}")
+            elif depth == 2 and elem.tag == doc_type.line_tag:
+                break
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        doc_type.read_header(elem, header)
+        if 'sender_vkn' in header:
+            header.setdefault('supplier_vkn', header['sender_vkn'])
+        elem.clear()
+        del root[:]
+        if all(field in header for field in KEY_FIELDS):
+            break
+    return {'type': doc_type.name if doc_type else None, 'type_code': header.get('type_code'),
+            **{field: header.get(field) for field in KEY_FIELDS}}
+
+
+def document_keys(doc: Dict[str, Optional[str]]) -> List[Key]:
+    """Belgenin mükerrer anahtarları: ('uuid', ETTN) ve ('number', tip|VKN|ID)"""
+    keys = []
+    if doc.get('uuid'):
+        keys.append(('uuid', doc['uuid'].strip().upper()))
+    if doc.get('id'):
+        keys.append(('number', f"{doc['type']}|{doc.get('supplier_vkn') or ''}|{doc['id'].strip().upper()}"))
+    return keys
+
+
+def _key_hash(kind: str, key: str) -> bytes:
+    return hashlib.blake2b(f'{kind}\x00{key}'.encode('utf-8'), digest_size=16).digest()
+
+
+def _read(path: str) -> Tuple[str, Optional[Dict[str, Optional[str]]], Optional[str]]:
+    """İşçi: (dosya, başlık anahtarları, hata)"""
+    try:
+        return path, read_keys(path), None
+    except (ET.ParseError, ValueError, OSError) as e:
+        return path, None, str(e)
+
+
+# ============ ANAHTAR DEPOLARI ============
+
+class MemoryKeySet:
+    """Anahtar başına 64 bit özet + dosya no (12 bayt) düz dizilerde; tekrarlar sonda sıralamayla bulunur
+
+    Eşit özet grupları yalnızca o dosyaların başlıkları yeniden okunarak tam
+    anahtarla doğrulanır; özet çakışmaları sonuca karışmaz.
+    """
+
+    def __init__(self):
+        self.files: List[str] = []
+        self._digests = array('Q')
+        self._file_ids = array('I')
+
+    def add_file(self, path: str) -> int:
+        self.files.append(path)
+        return len(self.files) - 1
+
+    def add(self, kind: str, key: str, file_id: int):
+        self._digests.append(int.from_bytes(_key_hash(kind, key)[:8], 'little'))
+        self._file_ids.append(file_id)
+
+    def duplicates(self) -> Iterator[Tuple[str, str, List[str]]]:
+        digests = np.frombuffer(self._digests, dtype=np.uint64)
+        if len(digests) < 2:
+            return
+        order = np.argsort(digests, kind='stable')
+        ordered = digests[order]
+        repeat = ordered[1:] == ordered[:-1]
+        member = np.zeros(len(ordered), dtype=bool)
+        member[1:] |= repeat
+        member[:-1] |= repeat
+        file_ids = np.frombuffer(self._file_ids, dtype=np.uint32)[order[member]]
+        runs: Dict[int, List[int]] = {}
+        for digest, file_id in zip(ordered[member].tolist(), file_ids.tolist()):
+            runs.setdefault(digest, []).append(file_id)
+
+        for digest, run in runs.items():
+            groups: Dict[Key, List[str]] = {}
+            for file_id in dict.fromkeys(run):
+                path = self.files[file_id]
+                for kind, key in document_keys(read_keys(path)):
+                    if int.from_bytes(_key_hash(kind, key)[:8], 'little') == digest:
+                        groups.setdefault((kind, key), []).append(path)
+            for (kind, key), paths in groups.items():
+                if len(paths) > 1:
+                    yield kind, key, paths
+
+    def close(self):
+        pass
+
+
+class BloomKeySet:
+    """Bloom filtresi + diskte anahtar günlüğü; adaylar taramanın sonunda kesinleştirilir"""
+
+    def __init__(self, db_path: str, expected_keys: int, fp_rate: float = DEFAULT_FP_RATE):
+        expected_keys = max(1, expected_keys)
+        self.size = max(64, int(-expected_keys * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / expected_keys * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self.expected_keys = expected_keys
+        self.keys = 0
+        self.candidates = set()
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode = OFF')
+        self.conn.execute('PRAGMA synchronous = OFF')
+        self.conn.execute('CREATE TABLE files (id INTEGER PRIMARY KEY, path TEXT NOT NULL)')
+        self.conn.execute('CREATE TABLE log (kind TEXT NOT NULL, key TEXT NOT NULL, file INTEGER NOT NULL)')
+        self._files: List[Tuple[int, str]] = []
+        self._log: List[Tuple[str, str, int]] = []
+        self._hashes: List[bytes] = []
+        self._next_file = 0
+
+    def add_file(self, path: str) -> int:
+        file_id = self._next_file
+        self._next_file += 1
+        self._files.append((file_id, path))
+        return file_id
+
+    def add(self, kind: str, key: str, file_id: int):
+        self._log.append((kind, key, file_id))
+        self._hashes.append(_key_hash(kind, key))
+        if len(self._log) >= LOG_BATCH:
+            self._flush()
+
+    def _flush(self):
+        """Bekleyen anahtarları filtrede sına / işaretle ve günlüğe yaz
+
+        Parti önceki partilere karşı filtreyle, kendi içinde özet eşitliğiyle
+        sınanır; ikisi de "görülmüş olabilir" sayılır.
+        """
+        if self._log:
+            raw = np.frombuffer(b''.join(self._hashes), dtype=np.uint64).reshape(-1, 2)
+            steps = np.arange(self.hashes, dtype=np.uint64)
+            positions = (raw[:, :1] + steps * (raw[:, 1:] | np.uint64(1))) % np.uint64(self.size)
+            index = positions >> np.uint64(3)
+            masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+            present = np.all(self.bits[index] & masks, axis=1)
+            _, inverse, counts = np.unique(raw[:, 0], return_inverse=True, return_counts=True)
+            present |= counts[inverse] > 1
+            np.bitwise_or.at(self.bits, index.ravel(), masks.ravel())
+            for i in np.flatnonzero(present).tolist():
+                self.candidates.add(self._log[i][:2])
+            self.keys += len(self._log)
+        with self.conn:
+            self.conn.executemany('INSERT INTO files (id, path) VALUES (?, ?)', self._files)
+            self.conn.executemany('INSERT INTO log (kind, key, file) VALUES (?, ?, ?)', self._log)
+        self._files.clear()
+        self._log.clear()
+        self._hashes.clear()
+
+    def duplicates(self) -> Iterator[Tuple[str, str, List[str]]]:
+        """Adayları günlükle tek geçişte birleştir; birden fazla dosyada görülenler mükerrerdir"""
+        self._flush()
+        self.conn.execute('CREATE TEMP TABLE candidates (kind TEXT, key TEXT, PRIMARY KEY (kind, key)) WITHOUT ROWID')
+        with self.conn:
+            self.conn.executemany('INSERT INTO candidates VALUES (?, ?)', self.candidates)
+        groups: Dict[Key, List[str]] = {}
+        rows = self.conn.execute('SELECT l.kind, l.key, f.path FROM log l JOIN candidates c ON c.kind = l.kind '
+                                 'AND c.key = l.key JOIN files f ON f.id = l.file ORDER BY l.rowid')
+        for kind, key, path in rows:
+            groups.setdefault((kind, key), []).append(path)
+        for (kind, key), paths in groups.items():
+            if len(paths) > 1:
+                yield kind, key, paths
+
+    def close(self):
+        self.conn.close()
+
+
+# ============ TARAMA ============
+
+def map_paths(func: Callable[[str], Any], paths: Iterable[str], workers: int = 1) -> Iterator[Any]:
+    """func'ı dosyalara sırayı koruyarak uygula (ilk görülen dosya 'asıl' kabul edilir)
+
+    Dosya listesi bloklar halinde işçilere verilir; milyonlarca yol ya da
+    future bellekte biriktirilmez.
+    """
+    if workers <= 1:
+        yield from map(func, paths)
+        return
+    block_size = workers * READ_BLOCK_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        block = []
+        for path in paths:
+            block.append(path)
+            if len(block) >= block_size:
+                yield from pool.map(func, block, chunksize=max(1, -(-len(block) // (workers * 4))))
+                block = []
+        if block:
+            yield from pool.map(func, block, chunksize=max(1, -(-len(block) // (workers * 4))))
+
+
+def find_duplicates(files: Iterable[str], workers: int = 1, store=None) -> Dict[str, Any]:
+    """Dosyaları tarayıp ETTN ve numara tekrarlarını raporla"""
+    store = store or MemoryKeySet()
+    documents = 0
+    errors = []
+    for path, doc, error in map_paths(_read, expand_paths(files), workers):
+        if error is not None:
+            errors.append({'file': path, 'error': error})
+            continue
+        documents += 1
+        file_id = store.add_file(path)
+        for kind, key in document_keys(doc):
+            store.add(kind, key, file_id)
+
+    uuid_groups = []
+    number_groups = []
+    for kind, key, paths in store.duplicates():
+        if kind == 'uuid':
+            uuid_groups.append({'uuid': key, 'files': paths})
+            continue
+        doc_type, vkn, number = key.split('|', 2)
+        match = NUMBER_PATTERN.match(number)
+        number_groups.append({'type': doc_type, 'supplier_vkn': vkn or None, 'id': number,
+                              'series': match.group(1) if match else None,
+                              'year': match.group(2) if match else None, 'files': paths})
+
+    # Aynı ETTN'li dosya kümesi = aynı belgenin tekrarı; farklıysa numara yeniden kullanılmış
+    resent = {frozenset(group['files']) for group in uuid_groups}
+    by_series: Dict[Tuple[Optional[str], Optional[str], Optional[str]], int] = {}
+    for group in number_groups:
+        group['same_document'] = frozenset(group['files']) in resent
+        series_key = (group['supplier_vkn'], group['series'], group['year'])
+        by_series[series_key] = by_series.get(series_key, 0) + 1
+    uuid_groups.sort(key=lambda g: g['uuid'])
+    number_groups.sort(key=lambda g: (g['supplier_vkn'] or '', g['id']))
+    return {
+        'documents': documents,
+        'errors': errors,
+        'uuid': uuid_groups,
+        'number': number_groups,
+        'by_series': [{'supplier_vkn': vkn, 'series': series, 'year': year, 'duplicates': n}
+                      for (vkn, series, year), n in sorted(by_series.items(), key=lambda item: str(item[0]))],
+    }
+
+
+def print_report(report: Dict[str, Any], limit: int = 50):
+    print(f"📊 {report['documents']:,} belge tarandı, {len(report['errors'])} hata")
+    for error in report['errors'][:limit]:
+        print(f"  ❌ {error['file']}: {error['error']}")
+
+    print(f"\n🆔 Mükerrer ETTN: {len(report['uuid'])}")
+    for group in report['uuid'][:limit]:
+        print(f"  {group['uuid']} ({len(group['files'])} dosya)")
+        for path in group['files']:
+            print(f"      {path}")
+
+    print(f"\n🔢 Mükerrer numara: {len(report['number'])}")
+    for group in report['number'][:limit]:
+        kind = 'aynı belge tekrar' if group['same_document'] else 'numara yeniden kullanılmış'
+        print(f"  {group['type']} {group['supplier_vkn'] or '-'} {group['id']} ({len(group['files'])} dosya, {kind})")
+        for path in group['files']:
+            print(f"      {path}")
+    if report['by_series']:
+        print("\n📅 Seri / yıl kırılımı:")
+        for row in report['by_series']:
+            print(f"  {row['supplier_vkn'] or '-':12s} {row['series'] or '?':4s} {row['year'] or '????'} "
+                  f"{row['duplicates']:,} mükerrer numara")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ETTN ve fatura numarası mükerrer kontrolü')
+    parser.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml',
+                                                     'scripts/invoice_skr2026000000187.xml'])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--bloom', action='store_true', help='Bloom filtresi + disk günlüğü (çok büyük taramalar)')
+    parser.add_argument('--expected', type=int, default=1_000_000, help='Beklenen belge sayısı (Bloom boyutu)')
+    parser.add_argument('--fp-rate', type=float, default=DEFAULT_FP_RATE, help='Bloom yanlış pozitif oranı')
+    parser.add_argument('--db', default='duplicate_keys.db', help='Bloom modunda anahtar günlüğü (yeniden oluşturulur)')
+    parser.add_argument('--limit', type=int, default=50, help='Yazdırılacak grup sayısı')
+    parser.add_argument('--output', help='Raporu JSON olarak kaydet')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = BloomKeySet(args.db, args.expected * 2, args.fp_rate) if args.bloom else MemoryKeySet()
+    try:
+        report = find_duplicates(args.files, args.workers, store)
+    finally:
+        store.close()
+    elapsed = time.perf_counter() - started
+    print_report(report, args.limit)
+
+    if args.bloom:
+        print(f"\n🌸 Bloom: {len(store.bits) / 1024 / 1024:.1f} MB, {store.hashes} hash, "
+              f"{len(store.candidates):,} aday / {store.keys:,} anahtar")
+        if store.keys > store.expected_keys:
+            print(f"⚠️ Anahtar sayısı beklenenin üzerinde; --expected artırılmalı (aday kümesi büyür)")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Rapor kaydedildi: {args.output}")
+    print(f"⏱️  {elapsed:.2f} sn")
+    if report['uuid'] or report['number']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Zarf (Envelope) Ayırıcı
+GİB StandardBusinessDocument zarfları ve entegratör indirme paketleri gibi
+birden fazla Invoice / ApplicationResponse vb. belgeyi saran kapsayıcı XML'leri
+expat ile akış halinde tarar. Kayıtlı bir UBL belge kökü (ubl_documents)
+bulunduğunda ham baytları tamponlanır; belge kapanınca bağımsız bir XML olarak
+analizcilere verilir ve tampon hemen bırakılır. Bellek en büyük tek belgeyle
+sınırlıdır.
+
+Opsiyonel bayt aralığı indeksi (JSON) her belgenin zarf içindeki [start, end)
+aralığını ve üst elementlerden miras aldığı namespace tanımlarını tutar; tek bir
+belge zarf yeniden taranmadan seek ile çıkarılabilir.
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import sys
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set
+from xml.parsers import expat
+from xml.sax.saxutils import quoteattr
+
+from ubl_documents import DOCUMENT_TYPES, read_document
+
+READ_BLOCK = 1 << 16
+INDEX_SUFFIX = '.index.json'
+
+
+class EmbeddedDocument(NamedTuple):
+    """Zarf içindeki tek belge: konum bilgisi + bağımsız XML baytları"""
+    index: int
+    type: str
+    start: int
+    end: int
+    namespaces: Dict[str, str]
+    encoding: str
+    data: bytes
+
+    def entry(self) -> Dict[str, Any]:
+        """Bayt aralığı indeksine yazılacak kayıt"""
+        return {'index': self.index, 'type': self.type, 'start': self.start, 'end': self.end,
+                'namespaces': self.namespaces, 'encoding': self.encoding}
+
+
+# Start / empty-element tag sonu: tırnak içindeki '>' karakterleri atlanır
+_TAG = re.compile(rb'<(?:[^>"\']|"[^"]*"|\'[^\']*\')*>')
+
+
+def element_end(data, start: int, position: int) -> int:
+    """EndElement olayındaki CurrentByteIndex'ten elementin gerçek bitiş ofseti
+
+    '</qname >' gibi boşluklu end tag'lerde sonraki '>' aranır; '<qname/>' biçimindeki
+    boş elementlerde expat olayı tag'in hemen sonunu gösterir.
+    """
+    if data[position - 2:position] == b'/>' and _TAG.match(data, start).end() == position:
+        return position
+    return data.find(b'>', position) + 1
+
+
+def used_prefixes(raw: bytes, encoding: str) -> Set[str]:
+    """Alt ağacın element / attribute adlarında kullanıp kendisi tanımlamadığı önekler
+
+    Varsayılan namespace ('') yalnızca öneksiz elementler için sayılır.
+    """
+    used: Set[str] = set()
+    scopes: List[Set[str]] = [set()]
+
+    def start(name, attrs):
+        local = scopes[-1] | {k[6:] for k in attrs if k == 'xmlns' or k.startswith('xmlns:')}
+        scopes.append(local)
+        for qname in [name] + [k for k in attrs if ':' in k and not k.startswith('xmlns:')]:
+            prefix = qname.rpartition(':')[0]
+            if prefix not in local and prefix != 'xml':
+                used.add(prefix)
+
+    parser = expat.ParserCreate(encoding)
+    parser.StartElementHandler = start
+    parser.EndElementHandler = lambda name: scopes.pop()
+    parser.Parse(raw, True)
+    return used
+
+
+def standalone_xml(raw: bytes, qname: str, namespaces: Dict[str, str], encoding: str) -> bytes:
+    """Ham element baytlarını XML bildirimi ve miras namespace'lerle bağımsız hale getir
+
+    Yalnızca alt ağacın adlarında kullanılıp kendi içinde tanımlanmayan önekler eklenir;
+    fazladan namespace inclusive C14N çıktısını (ve XMLDSig özetlerini) değiştirir.
+    """
+    declaration = f'<?xml version="1.0" encoding="{encoding}"?>\n'.encode('ascii')
+    needed = used_prefixes(raw, encoding) if namespaces else set()
+    attrs = ''.join(
+        f' {"xmlns:" + p if p else "xmlns"}={quoteattr(uri)}'
+        for p, uri in namespaces.items() if p in needed)
+    if not attrs:
+        return declaration + raw
+    head = len(qname.encode(encoding)) + 1
+    return declaration + raw[:head] + attrs.encode(encoding) + raw[head:]
+
+
+class _Splitter:
+    """expat olaylarından belge sınırlarını bulur, tamamlanan belgeleri kuyruğa alır"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.buffer_start = 0
+        self.encoding = 'UTF-8'
+        self.scopes: List[Dict[str, str]] = [{}]
+        self.depth = 0
+        self.current: Optional[Dict[str, Any]] = None
+        self.completed: List[EmbeddedDocument] = []
+        self.count = 0
+        self.last_event = 0
+        self.parser = expat.ParserCreate()
+        self.parser.XmlDeclHandler = self.xml_decl
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = self.end
+
+    def xml_decl(self, version, encoding, standalone):
+        if encoding:
+            self.encoding = encoding
+
+    def start(self, name, attrs):
+        position = self.last_event = self.parser.CurrentByteIndex
+        scope = self.scopes[-1]
+        declared = {k[6:]: v for k, v in attrs.items() if k == 'xmlns' or k.startswith('xmlns:')}
+        if declared:
+            scope = dict(scope, **declared)
+        self.scopes.append(scope)
+        self.depth += 1
+        if self.current is not None:
+            return
+        prefix, _, local = name.rpartition(':')
+        root_tag = '{' + scope.get(prefix, '') + '}' + local
+        doc_type = DOCUMENT_TYPES.get(root_tag)
+        if doc_type is not None:
+            parent = self.scopes[-2]
+            inherited = {p: uri for p, uri in parent.items() if p not in declared and uri}
+            self.current = {'type': doc_type.name, 'qname': name, 'start': position,
+                            'depth': self.depth, 'namespaces': inherited}
+
+    def end(self, name):
+        position = self.last_event = self.parser.CurrentByteIndex
+        current = self.current
+        if current is not None and self.depth == current['depth']:
+            end = self.buffer_start + element_end(
+                self.buffer, current['start'] - self.buffer_start, position - self.buffer_start)
+            raw = bytes(self.buffer[current['start'] - self.buffer_start:end - self.buffer_start])
+            self.completed.append(EmbeddedDocument(
+                self.count, current['type'], current['start'], end, current['namespaces'], self.encoding,
+                standalone_xml(raw, current['qname'], current['namespaces'], self.encoding)))
+            self.count += 1
+            self.current = None
+        self.scopes.pop()
+        self.depth -= 1
+
+    def feed(self, block: bytes, final: bool = False):
+        self.buffer += block
+        self.parser.Parse(block, final)
+        # Açık belge yoksa yalnızca son olaydan sonraki (henüz işlenmemiş) baytlar tutulur
+        keep = self.current['start'] if self.current is not None else self.last_event
+        if keep > self.buffer_start:
+            del self.buffer[:keep - self.buffer_start]
+            self.buffer_start = keep
+
+
+def split_envelope(path: str, block_size: int = READ_BLOCK) -> Iterator[EmbeddedDocument]:
+    """Zarftaki belgeleri tamamlandıkça sırayla üret"""
+    splitter = _Splitter()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            splitter.feed(block, final=not block)
+            yield from splitter.completed
+            splitter.completed.clear()
+            if not block:
+                break
+
+
+def index_path_for(envelope: str) -> str:
+    return envelope + INDEX_SUFFIX
+
+
+def write_index(envelope: str, entries: List[Dict[str, Any]], index_path: Optional[str] = None) -> str:
+    """Bayt aralığı indeksini zarfın boyutu ve mtime'ı ile birlikte kaydet"""
+    stat = os.stat(envelope)
+    index_path = index_path or index_path_for(envelope)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump({'envelope': os.path.basename(envelope), 'size': stat.st_size, 'mtime': stat.st_mtime,
+                   'documents': entries}, f, ensure_ascii=False, indent=2)
+    return index_path
+
+
+def load_index(envelope: str, index_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """İndeksi oku; zarf değişmişse (boyut / mtime) None döndür"""
+    index_path = index_path or index_path_for(envelope)
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    stat = os.stat(envelope)
+    if index.get('size') != stat.st_size or index.get('mtime') != stat.st_mtime:
+        return None
+    return index
+
+
+def extract_document(envelope: str, entry: Dict[str, Any]) -> bytes:
+    """İndeks kaydındaki belgeyi zarfı taramadan (seek ile) bağımsız XML olarak çıkar"""
+    encoding = entry.get('encoding', 'UTF-8')
+    with open(envelope, 'rb') as f:
+        f.seek(entry['start'])
+        raw = f.read(entry['end'] - entry['start'])
+    qname = raw[1:raw.find(b'>')].split(None, 1)[0].rstrip(b'/').decode(encoding)
+    return standalone_xml(raw, qname, entry.get('namespaces') or {}, encoding)
+
+
+def analyze_envelope(path: str, handler: Callable[[EmbeddedDocument], Any] = None,
+                     build_index: bool = False) -> List[Any]:
+    """Her belgeyi tamamlandığı anda handler'a ver (varsayılan: ubl_documents.read_document)"""
+    if handler is None:
+        def handler(doc):
+            return read_document(io.BytesIO(doc.data), with_lines=False)
+    results = []
+    entries = []
+    for doc in split_envelope(path):
+        results.append(handler(doc))
+        if build_index:
+            entries.append(doc.entry())
+    if build_index:
+        write_index(path, entries)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Çok belgeli zarfları akış halinde ayır')
+    parser.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml'])
+    parser.add_argument('--output-dir', help='Her belgeyi ayrı XML dosyası olarak yaz')
+    parser.add_argument('--index', action='store_true', help='Bayt aralığı indeksini (<zarf>.index.json) yaz')
+    parser.add_argument('--extract', type=int, metavar='N', help='İndeksten N numaralı belgeyi stdout\'a çıkar')
+    args = parser.parse_args()
+
+    if args.extract is not None:
+        for path in args.files:
+            index = load_index(path)
+            if index is None:
+                print(f"❌ {path}: indeks yok ya da güncel değil (önce --index ile tarayın)", file=sys.stderr)
+                sys.exit(1)
+            entry = next((e for e in index['documents'] if e['index'] == args.extract), None)
+            if entry is None:
+                print(f"❌ {path}: {args.extract} numaralı belge yok", file=sys.stderr)
+                sys.exit(1)
+            sys.stdout.buffer.write(extract_document(path, entry))
+        return
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    for path in args.files:
+        def handler(doc, path=path):
+            summary = read_document(io.BytesIO(doc.data), with_lines=False)
+            header = summary['header']
+            status = f"❌ {summary['error']}" if summary.get('error') else '✅'
+            print(f"{status} [{doc.index}] {doc.type} {header.get('id', '')} "
+                  f"bayt {doc.start:,}-{doc.end:,} ({len(doc.data):,} bayt)")
+            if args.output_dir:
+                stem = os.path.splitext(os.path.basename(path))[0]
+                name = f"{stem}_{doc.index:05d}_{header.get('id') or doc.type}.xml"
+                with open(os.path.join(args.output_dir, name), 'wb') as f:
+                    f.write(doc.data)
+            return summary
+
+        try:
+            results = analyze_envelope(path, handler, build_index=args.index)
+        except expat.ExpatError as e:
+            print(f"❌ {path}: {e}")
+            continue
+        print(f"\n📦 {path}: {len(results)} belge")
+        if args.index:
+            print(f"💾 İndeks: {index_path_for(path)}")
+
+if __name__ == '__main__':
+    main()
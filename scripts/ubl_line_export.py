@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Fatura Kalemi CSV/TSV Dışa Aktarımı (Muhasebe Teslimi)
+Fatura klasörünü tek geçişli iterparse ile okur ve her kalemi düz bir satır
+olarak (fatura no, ETTN, tarih, satıcı/alıcı VKN, mal adı, satıcı kodu, miktar,
+birim, fiyat, tutar, KDV oranı, KDV tutarı) doğrudan tek bir csv.writer'a yazar.
+UBL'de başlık alanları kalemlerden önce geldiği için tüm fatura için ara sözlük
+kurulmaz; her kalem satıra çevrildikten sonra bırakılır. Bir faturanın satırları
+dosya sonuna kadar tutulur, böylece yarıda bozulan dosyadan kısmi kalem yazılmaz.
+Milyonlarca satırlık aylık dökümler fatura başına sınırlı bellekle, tamponlu
+çıktıyla üretilir.
+
+Kullanım:
+    python scripts/ubl_line_export.py arsiv/2026-01/*.xml --output ocak.csv
+    python scripts/ubl_line_export.py arsiv/2026-01 --format tsv --output ocak.tsv
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ubl_documents import CAC, CBC, DocumentType, lookup_document_type
+
+# Çıktı kolonları: (kolon, ubl_documents başlık alanı)
+HEADER_COLUMNS = [
+    ('invoice_id', 'id'),
+    ('uuid', 'uuid'),
+    ('issue_date', 'issue_date'),
+    ('supplier_vkn', 'supplier_vkn'),
+    ('customer_vkn', 'customer_vkn'),
+    ('currency', 'currency'),
+]
+
+# Kalem kolonları: (kolon, aday yollar, attribute ya da None -> text); None yol = belge tipinin miktar etiketi
+LINE_COLUMNS = [
+    ('line_id', ('cbc:ID',), None),
+    ('item_name', ('cac:Item/cbc:Name',), None),
+    ('seller_code', ('cac:Item/cac:SellersItemIdentification/cbc:ID',), None),
+    ('quantity', None, None),
+    ('unit', None, 'unitCode'),
+    ('price', ('cac:Price/cbc:PriceAmount',), None),
+    ('line_amount', ('cbc:LineExtensionAmount',), None),
+    ('tax_percent', ('cac:TaxTotal/cac:TaxSubtotal/cbc:Percent',
+                     'cac:TaxTotal/cac:TaxSubtotal/cac:TaxCategory/cbc:Percent'), None),
+    ('tax_amount', ('cac:TaxTotal/cbc:TaxAmount',), None),
+]
+
+COLUMNS = [name for name, _ in HEADER_COLUMNS] + [name for name, _, _ in LINE_COLUMNS]
+
+FORMATS = {'csv': ',', 'tsv': '\t'}
+WRITE_BUFFER = 1 << 20
+
+
+class UnsupportedDocument(ValueError):
+    """Kalem içermeyen ya da kayıtlı olmayan kök (ÖKC raporu, eArsivVeri vb.)"""
+
+
+_compiled: Dict[str, List[Tuple[Tuple[str, ...], Optional[str]]]] = {}
+
+
+def _line_paths(doc_type: DocumentType) -> List[Tuple[Tuple[str, ...], Optional[str]]]:
+    """Belge tipi için kalem kolon yollarını Clark notasyonuna derle (tip başına bir kez)"""
+    paths = _compiled.get(doc_type.name)
+    if paths is None:
+        paths = []
+        for _, candidates, attr in LINE_COLUMNS:
+            if candidates is None:
+                candidates = (doc_type.quantity_tag,)
+            else:
+                candidates = tuple(c.replace('cac:', CAC).replace('cbc:', CBC) for c in candidates)
+            paths.append((candidates, attr))
+        _compiled[doc_type.name] = paths
+    return paths
+
+
+def _value(elem, candidates: Tuple[str, ...], attr: Optional[str]) -> str:
+    for path in candidates:
+        target = elem.find(path)
+        if target is not None:
+            return target.get(attr, '') if attr else (target.text or '').strip()
+    return ''
+
+
+def iter_rows(path: str) -> Iterator[List[str]]:
+    """Tek faturanın kalem satırlarını üret (başlık değerleri her satırın başında)"""
+    root = None
+    doc_type = None
+    header: Dict[str, str] = {}
+    header_row: Optional[List[str]] = None
+    line_paths = []
+    depth = 0
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if root is None:
+                root = elem
+                doc_type = lookup_document_type(elem.tag)
+                if doc_type is None or doc_type.quantity_tag is None:
+                    raise UnsupportedDocument(f"Kalem içermeyen ya da desteklenmeyen kök: {elem.tag[elem.tag.rfind('}') + 1:]}")
+                line_paths = _line_paths(doc_type)
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        if elem.tag == doc_type.line_tag:
+            if header_row is None:
+                header_row = [header.get(field, '') for _, field in HEADER_COLUMNS]
+            yield header_row + [_value(elem, candidates, attr) for candidates, attr in line_paths]
+        else:
+            doc_type.read_header(elem, header)
+        elem.clear()
+        del root[:]
+
+
+def expand_paths(paths: Iterable[str]) -> Iterator[str]:
+    """Klasörleri içindeki .xml dosyalarına aç"""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith('.xml'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def export_lines(paths: Iterable[str], out, delimiter: str = ',') -> Dict[str, int]:
+    """Tüm kalemleri tek writer ile yaz; dosya / satır / hata sayılarını döndür"""
+    writer = csv.writer(out, delimiter=delimiter, lineterminator='\n')
+    writer.writerow(COLUMNS)
+    stats = {'files': 0, 'rows': 0, 'skipped': 0, 'errors': 0}
+    for path in expand_paths(paths):
+        try:
+            # Yarıda kesilen (bozuk / eksik) dosyanın kalemleri çıktıya sızmasın diye
+            # satırlar fatura sonuna kadar tutulur, parse tamamlanınca yazılır
+            rows = list(iter_rows(path))
+        except UnsupportedDocument as e:
+            stats['skipped'] += 1
+            print(f"⏭️  {path}: {e}", file=sys.stderr)
+            continue
+        except (ET.ParseError, ValueError, OSError) as e:
+            stats['errors'] += 1
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            continue
+        writer.writerows(rows)
+        stats['rows'] += len(rows)
+        stats['files'] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fatura kalemlerini düz CSV/TSV tablosuna aktar')
+    parser.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml',
+                                                     'scripts/invoice_skr2026000000187.xml'],
+                        help='Fatura XML dosyaları ya da klasörler')
+    parser.add_argument('--output', default='-', help="Çıktı dosyası ('-' = stdout)")
+    parser.add_argument('--format', choices=sorted(FORMATS),
+                        help='Çıktı biçimi (varsayılan: uzantıdan, yoksa csv)')
+    args = parser.parse_args()
+
+    fmt = args.format or ('tsv' if args.output.lower().endswith('.tsv') else 'csv')
+    started = time.perf_counter()
+    if args.output == '-':
+        stats = export_lines(args.files, sys.stdout, FORMATS[fmt])
+        sys.stdout.flush()
+    else:
+        # Excel'in Türkçe karakterleri doğru açması için BOM'lu UTF-8
+        with open(args.output, 'w', encoding='utf-8-sig', newline='', buffering=WRITE_BUFFER) as out:
+            stats = export_lines(args.files, out, FORMATS[fmt])
+    elapsed = time.perf_counter() - started
+
+    print(f"📊 {stats['files']} fatura, {stats['rows']:,} kalem, {stats['skipped']} atlanan, {stats['errors']} hata "
+          f"({elapsed:.2f} sn){'' if args.output == '-' else ' -> ' + args.output}", file=sys.stderr)
+    if stats['errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
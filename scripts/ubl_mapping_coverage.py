@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Mapping Kapsam Raporu
+xml_mapping_guide.MAPPING_SPEC'teki (veritabanına eşlenen) alanların bir
+korpusta ne sıklıkla dolu geldiğini ve gerçek belgelerde dolu olup hiçbir alana
+eşlenmeyen path'leri raporlar. Her belge extract_all_xml_data akış okuyucusuyla
+bir kez taranır; belgede görülen her farklı path derlenmiş spec'e karşı süreç
+başına yalnızca bir kez eşlenir (memo). Aynı tarama hem alan isabet / kayıp
+sayılarını hem de eşlenmemiş path'leri üretir.
+
+Kısmi sonuçlar birleştirilebilir: işçi süreçler dosya gruplarını ayrı ayrı
+sayar, ana süreç toplar.
+
+Kullanım:
+    python scripts/ubl_mapping_coverage.py arsiv/2026-01 --workers 8
+    python scripts/ubl_mapping_coverage.py arsiv/ --output kapsam.json --min-frequency 0.05
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from extract_all_xml_data import MAX_VALUE_SIZE, stream_all_elements
+from ubl_path_catalog import expand_paths
+from xml_mapping_guide import MAPPING_SPEC
+
+# Spec kök elemente göre yazılmıştır (InvoiceLine, LegalMonetaryTotal ...)
+DEFAULT_ROOTS = ('Invoice',)
+# Eşlenmemiş path raporunda varsayılan olarak atlanan alt ağaçlar (imza / XAdES içi)
+DEFAULT_IGNORE = ('UBLExtensions',)
+
+_PREDICATE = re.compile(r'\[[^\]]*\]')
+
+
+def compile_xpath(xpath: str) -> str:
+    """Guide xpath'ini kök altı yerel ad path'ine çevir
+
+    './/cac:InvoiceLine[3]/cbc:InvoicedQuantity/@unitCode' -> 'InvoiceLine/InvoicedQuantity/@unitCode'
+    Guide xpath'leri './/' ile başlasa da kökün doğrudan altından başlayan yollar olarak okunur.
+    """
+    steps = _PREDICATE.sub('', xpath).lstrip('./').split('/')
+    return '/'.join(step if step.startswith('@') else step.rpartition(':')[2] for step in steps if step)
+
+
+class CompiledSpec:
+    """Mapping spec'i path -> alan tablosuna derler; belge path'lerini memo ile eşler"""
+
+    def __init__(self, spec: Sequence[Tuple[str, str]] = MAPPING_SPEC):
+        self.fields = [field for field, _ in spec]
+        self._by_path: Dict[str, Tuple[str, ...]] = {}
+        for field, xpath in spec:
+            path = compile_xpath(xpath)
+            self._by_path[path] = self._by_path.get(path, ()) + (field,)
+        self._memo: Dict[str, Tuple[str, ...]] = {}
+
+    def match(self, path: str) -> Tuple[str, ...]:
+        """Kök adıyla başlayan belge path'inin eşlendiği alanlar (yoksa boş)"""
+        fields = self._memo.get(path)
+        if fields is None:
+            relative = path.partition('/')[2]
+            fields = self._memo[path] = self._by_path.get(relative, ())
+        return fields
+
+
+class Coverage:
+    """Alan isabetleri ve eşlenmemiş dolu path'ler (belge sayısı olarak); birleştirilebilir"""
+
+    def __init__(self):
+        self.documents = 0
+        self.skipped = 0
+        self.errors = 0
+        self.hits: Dict[str, int] = {}
+        self.unmapped: Dict[str, int] = {}
+
+    def add_document(self, elements: Dict[str, List[Dict[str, Any]]], spec: CompiledSpec):
+        """Tek belgenin path'lerini tek geçişte alan isabetine ya da eşlenmemiş listesine yaz"""
+        self.documents += 1
+        hit = set()
+        unmapped = set()
+        for path, entries in elements.items():
+            attributes = set()
+            for entry in entries:
+                for name in entry.get('attributes') or ():
+                    attributes.add(name[name.index('}') + 1:] if '}' in name else name)
+            for candidate in [path] + [f"{path}/@{name}" for name in attributes]:
+                fields = spec.match(candidate)
+                if fields:
+                    hit.update(fields)
+                else:
+                    unmapped.add(candidate)
+        for field in hit:
+            self.hits[field] = self.hits.get(field, 0) + 1
+        for path in unmapped:
+            self.unmapped[path] = self.unmapped.get(path, 0) + 1
+
+    def merge(self, other: 'Coverage'):
+        self.documents += other.documents
+        self.skipped += other.skipped
+        self.errors += other.errors
+        for field, n in other.hits.items():
+            self.hits[field] = self.hits.get(field, 0) + n
+        for path, n in other.unmapped.items():
+            self.unmapped[path] = self.unmapped.get(path, 0) + n
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'documents': self.documents, 'skipped': self.skipped, 'errors': self.errors,
+                'hits': self.hits, 'unmapped': self.unmapped}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Coverage':
+        coverage = cls()
+        coverage.documents = data['documents']
+        coverage.skipped = data['skipped']
+        coverage.errors = data['errors']
+        coverage.hits = dict(data['hits'])
+        coverage.unmapped = dict(data['unmapped'])
+        return coverage
+
+    def report(self, fields: Sequence[str], ignore: Sequence[str] = DEFAULT_IGNORE,
+               min_frequency: float = 0.0) -> Dict[str, Any]:
+        """Alan başına isabet / kayıp / oran ve sıklık sırasıyla eşlenmemiş path'ler"""
+        total = self.documents
+        field_rows = [{'field': field, 'hits': self.hits.get(field, 0),
+                       'misses': total - self.hits.get(field, 0),
+                       'coverage': self.hits.get(field, 0) / total if total else 0.0}
+                      for field in fields]
+        ignored = tuple(f"/{name}" for name in ignore)
+        unmapped_rows = [{'path': path, 'documents': n, 'frequency': n / total if total else 0.0}
+                         for path, n in self.unmapped.items()
+                         if not any(marker + '/' in path or path.endswith(marker) for marker in ignored)
+                         and (not total or n / total >= min_frequency)]
+        unmapped_rows.sort(key=lambda row: (-row['documents'], row['path']))
+        return {'documents': total, 'skipped': self.skipped, 'errors': self.errors,
+                'fields': field_rows, 'unmapped': unmapped_rows}
+
+
+def scan_files(paths: Iterable[str], roots: Sequence[str] = DEFAULT_ROOTS,
+               spec: Optional[CompiledSpec] = None) -> Coverage:
+    """Dosyaları akış halinde tarayıp kapsamı say (spec dışı kök tipleri atlanır)"""
+    spec = spec or CompiledSpec()
+    coverage = Coverage()
+    for path in paths:
+        try:
+            elements = stream_all_elements(path, MAX_VALUE_SIZE)
+        except Exception as e:
+            coverage.errors += 1
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            continue
+        root = next(iter(elements), '').partition('/')[0]
+        if root not in roots:
+            coverage.skipped += 1
+            continue
+        coverage.add_document(elements, spec)
+    return coverage
+
+
+def _scan_chunk(args: Tuple[List[str], Tuple[str, ...]]) -> Dict[str, Any]:
+    paths, roots = args
+    return scan_files(paths, roots).to_dict()
+
+
+def scan_parallel(paths: Iterable[str], workers: int = 1, roots: Sequence[str] = DEFAULT_ROOTS) -> Coverage:
+    """Dosya gruplarını işçilerde say, kısmi sonuçları birleştir"""
+    paths = list(expand_paths(paths))
+    if workers <= 1 or len(paths) < 2:
+        return scan_files(paths, roots)
+    chunk_size = max(1, -(-len(paths) // (workers * 4)))
+    chunks = [(paths[i:i + chunk_size], tuple(roots)) for i in range(0, len(paths), chunk_size)]
+    coverage = Coverage()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_scan_chunk, chunks):
+            coverage.merge(Coverage.from_dict(partial))
+    return coverage
+
+
+def print_report(report: Dict[str, Any], limit: int = 50):
+    print(f"📊 {report['documents']:,} belge tarandı, {report['skipped']} atlandı, {report['errors']} hata")
+    print(f"\n{'Alan':45s} {'İsabet':>8s} {'Kayıp':>8s} {'Kapsam':>7s}")
+    print('-' * 72)
+    for row in report['fields']:
+        status = '✅' if row['coverage'] == 1 else ('⚠️ ' if row['hits'] else '❌')
+        print(f"{row['field']:45s} {row['hits']:8,} {row['misses']:8,} {row['coverage']:7.1%} {status}")
+
+    unmapped = report['unmapped']
+    print(f"\n🔎 Dolu ama eşlenmemiş path'ler ({len(unmapped)}):")
+    print('-' * 72)
+    for row in unmapped[:limit]:
+        print(f"  {row['frequency']:6.1%} {row['documents']:8,}  {row['path']}")
+    if len(unmapped) > limit:
+        print(f"  ... ve {len(unmapped) - limit} path daha")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mapping spec kapsam raporu (alan isabeti + eşlenmemiş path)')
+    parser.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml',
+                                                     'scripts/invoice_skr2026000000187.xml'])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--roots', nargs='+', default=list(DEFAULT_ROOTS), help='Spec uygulanacak kök tipleri')
+    parser.add_argument('--ignore', nargs='*', default=list(DEFAULT_IGNORE),
+                        help='Eşlenmemiş raporunda atlanacak element adları (alt ağaçlarıyla)')
+    parser.add_argument('--min-frequency', type=float, default=0.0, help='Eşlenmemiş path için asgari frekans')
+    parser.add_argument('--limit', type=int, default=50, help='Yazdırılacak eşlenmemiş path sayısı')
+    parser.add_argument('--output', help='Raporu JSON olarak kaydet')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    coverage = scan_parallel(args.files, args.workers, args.roots)
+    report = coverage.report(CompiledSpec().fields, args.ignore, args.min_frequency)
+    elapsed = time.perf_counter() - started
+    print_report(report, args.limit)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Rapor kaydedildi: {args.output}")
+    print(f"⏱️  {elapsed:.2f} sn")
+
+
+if __name__ == '__main__':
+    main()
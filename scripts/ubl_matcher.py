@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Satış Faturası / Alış Faturası / Uygulama Yanıtı Eşleştirici (Hash Join)
+Gelen ApplicationResponse (KABUL / RED) belgelerini ve alış faturalarını kendi
+kestiğimiz satış faturalarına bağlar. Satış faturaları akış halinde okunurken
+iki hash indeksi kurulur (build):
+
+  uuid    : ETTN -> satış faturaları
+  number  : (düzenleyici VKN, fatura no) -> satış faturaları
+
+Gelen belgeler (probe) tek tek okunup indekse bir kez sorulur; iç içe döngü
+yoktur, süre toplam belge sayısıyla doğrusaldır. Eşleme önce ETTN ile yapılır;
+ETTN tutmazsa VKN + numara adayları tutar (kuruş toleranslı) ve tarih (gün
+toleranslı) ile süzülür. Yanıtlarda DocumentReference/ID ETTN ya da fatura
+numarası olabilir; ikisi de denenir.
+
+Sonuç kümeleri:
+  matched    : tek aday (ETTN'le eşleşip tutar / tarih / taraf farkı olanlar
+               'differences' ile işaretlenir)
+  ambiguous  : birden fazla aday (ör. mükerrer numara)
+  unmatched  : aday yok; numara tutup tutar / tarih tutmayanlar 'near_misses' ile
+  ayrıca yanıt almamış satış faturaları ve hem KABUL hem RED almış olanlar
+
+Gelen dosyalar tek belge ya da birden fazla belgeyi saran zarf
+(ubl_envelope) olabilir.
+
+Kullanım:
+    python scripts/ubl_matcher.py --sales giden/ --incoming gelen/ yanitlar/ --workers 8
+    python scripts/ubl_matcher.py --sales giden/ --incoming yanitlar/ --tolerance 2 --date-days 1 --output eslesme.json
+"""
+
+import argparse
+import io
+import json
+import time
+import xml.etree.ElementTree as ET
+from datetime import date
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from ubl_documents import APPLICATION_RESPONSE, detect_document_type, read_document
+from ubl_duplicates import map_paths
+from ubl_envelope import split_envelope
+from ubl_money import DEFAULT_CURRENCY, currency_exponent, parse_scaled
+from ubl_path_catalog import expand_paths
+
+DEFAULT_TOLERANCE = 1  # alt birim (kuruş)
+INVOICE_TYPES = ('Invoice', 'CreditNote')
+
+
+class InvoiceKey(NamedTuple):
+    """Eşleştirmede kullanılan fatura alanları"""
+    source: str
+    type: str
+    id: str
+    uuid: str
+    issue_date: str
+    supplier_vkn: str
+    customer_vkn: str
+    payable: Optional[int]
+    currency: str
+    type_code: str
+
+
+class ResponseKey(NamedTuple):
+    """Uygulama yanıtındaki tek DocumentResponse"""
+    source: str
+    id: str
+    uuid: str
+    issue_date: str
+    sender_vkn: str
+    receiver_vkn: str
+    code: str
+    description: str
+    document_id: str
+
+
+Record = Union[InvoiceKey, ResponseKey]
+
+
+# ============ OKUMA ============
+
+def _norm(value: Optional[str]) -> str:
+    return (value or '').strip().upper()
+
+
+def _records(document: Dict[str, Any], source: str) -> List[Record]:
+    """read_document çıktısını eşleştirme kayıtlarına çevir"""
+    header = document['header']
+    if document['type'] == APPLICATION_RESPONSE.name:
+        return [ResponseKey(source, _norm(header.get('id')), _norm(header.get('uuid')), header.get('issue_date', ''),
+                            _norm(header.get('sender_vkn')), _norm(header.get('receiver_vkn')),
+                            _norm(line.get('response_code')), line.get('description', ''),
+                            _norm(line.get('document_id')))
+                for line in document['lines'] if line.get('document_id')]
+    if document['type'] not in INVOICE_TYPES:
+        return []
+    currency = header.get('payable_currency') or header.get('currency') or DEFAULT_CURRENCY
+    try:
+        payable = parse_scaled(header['payable'], currency_exponent(currency))[0] if header.get('payable') else None
+    except ValueError:
+        payable = None
+    return [InvoiceKey(source, document['type'], _norm(header.get('id')), _norm(header.get('uuid')),
+                       header.get('issue_date', ''), _norm(header.get('supplier_vkn')),
+                       _norm(header.get('customer_vkn')), payable, currency, header.get('type_code', ''))]
+
+
+def read_records(path: str) -> List[Record]:
+    """Tek belge ya da zarftaki tüm belgelerden eşleştirme kayıtları"""
+    doc_type = detect_document_type(path)
+    if doc_type is not None:
+        document = read_document(path, with_lines=doc_type is APPLICATION_RESPONSE)
+        if 'error' in document:
+            raise ValueError(document['error'])
+        return _records(document, path)
+    records: List[Record] = []
+    for embedded in split_envelope(path):
+        document = read_document(io.BytesIO(embedded.data), with_lines=embedded.type == APPLICATION_RESPONSE.name)
+        if 'error' in document:
+            raise ValueError(f"#{embedded.index}: {document['error']}")
+        records.extend(_records(document, f'{path}#{embedded.index}'))
+    return records
+
+
+def _load(path: str) -> Tuple[str, Optional[List[Record]], Optional[str]]:
+    """İşçi: (dosya, kayıtlar, hata)"""
+    try:
+        return path, read_records(path), None
+    except (ET.ParseError, ValueError, OSError) as e:
+        return path, None, str(e)
+
+
+def _day(text: str) -> Optional[int]:
+    try:
+        return date.fromisoformat(text[:10]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def _ref(invoice: InvoiceKey) -> Dict[str, Any]:
+    return {'source': invoice.source, 'id': invoice.id, 'uuid': invoice.uuid, 'issue_date': invoice.issue_date}
+
+
+# ============ EŞLEŞTİRİCİ ============
+
+class Matcher:
+    """Satış faturalarına hash indeksi kurar; gelen belgeleri tek sorguda eşler"""
+
+    def __init__(self, tolerance: int = DEFAULT_TOLERANCE, date_days: int = 0):
+        self.tolerance = tolerance
+        self.date_days = date_days
+        self.sales: List[InvoiceKey] = []
+        self.by_uuid: Dict[str, List[int]] = {}
+        self.by_number: Dict[Tuple[str, str], List[int]] = {}
+        self.responses: Dict[int, List[str]] = {}
+        self.purchases: Dict[int, int] = {}
+        self.matched: List[Dict[str, Any]] = []
+        self.ambiguous: List[Dict[str, Any]] = []
+        self.unmatched: List[Dict[str, Any]] = []
+        self.errors: List[Dict[str, str]] = []
+        self.incoming = 0
+
+    # ---------- build ----------
+
+    def add_sale(self, invoice: InvoiceKey):
+        index = len(self.sales)
+        self.sales.append(invoice)
+        if invoice.uuid:
+            self.by_uuid.setdefault(invoice.uuid, []).append(index)
+        if invoice.id:
+            self.by_number.setdefault((invoice.supplier_vkn, invoice.id), []).append(index)
+
+    def load_sales(self, files: Iterable[str], workers: int = 1):
+        for path, records, error in map_paths(_load, expand_paths(files), workers):
+            if error is not None:
+                self.errors.append({'file': path, 'error': error})
+                continue
+            for record in records:
+                if isinstance(record, InvoiceKey):
+                    self.add_sale(record)
+
+    # ---------- probe ----------
+
+    def _within(self, sale: InvoiceKey, payable: Optional[int], currency: str, issue_date: str) -> List[str]:
+        """Tolerans dışında kalan alanlar (boşsa uyumlu)"""
+        differences = []
+        if payable is not None and sale.payable is not None:
+            if currency != sale.currency:
+                differences.append('currency')
+            elif abs(payable - sale.payable) > self.tolerance:
+                differences.append('amount')
+        day, sale_day = _day(issue_date), _day(sale.issue_date)
+        if day is not None and sale_day is not None and abs(day - sale_day) > self.date_days:
+            differences.append('date')
+        return differences
+
+    def _emit(self, record: Dict[str, Any], candidates: List[int], method: Optional[str],
+              differences: List[str] = (), near_misses: List[int] = ()) -> Optional[int]:
+        if len(candidates) == 1:
+            record.update(method=method, sales=_ref(self.sales[candidates[0]]), differences=list(differences))
+            self.matched.append(record)
+            return candidates[0]
+        if candidates:
+            record.update(method=method, candidates=[_ref(self.sales[i]) for i in candidates])
+            self.ambiguous.append(record)
+        else:
+            record['near_misses'] = [dict(_ref(self.sales[i]), differences=diff) for i, diff in near_misses]
+            self.unmatched.append(record)
+        return None
+
+    def match_purchase(self, invoice: InvoiceKey):
+        """Alış faturası: ETTN, yoksa VKN + numara + tutar + tarih"""
+        record = {'kind': 'purchase', 'source': invoice.source, 'id': invoice.id, 'uuid': invoice.uuid,
+                  'supplier_vkn': invoice.supplier_vkn}
+        candidates = self.by_uuid.get(invoice.uuid, []) if invoice.uuid else []
+        if candidates:
+            differences = []
+            if len(candidates) == 1:
+                sale = self.sales[candidates[0]]
+                differences = self._within(sale, invoice.payable, invoice.currency, invoice.issue_date)
+                if invoice.id != sale.id:
+                    differences.append('number')
+            found = self._emit(record, candidates, 'uuid', differences)
+        else:
+            near_misses = []
+            candidates = []
+            for i in self.by_number.get((invoice.supplier_vkn, invoice.id), ()):
+                differences = self._within(self.sales[i], invoice.payable, invoice.currency, invoice.issue_date)
+                if differences:
+                    near_misses.append((i, differences))
+                else:
+                    candidates.append(i)
+            found = self._emit(record, candidates, 'number', near_misses=near_misses)
+        if found is not None:
+            self.purchases[found] = self.purchases.get(found, 0) + 1
+
+    def match_response(self, response: ResponseKey):
+        """Yanıt: referans ETTN olarak, tutmazsa (alıcı VKN = düzenleyici, numara) olarak aranır"""
+        record = {'kind': 'response', 'source': response.source, 'id': response.id, 'uuid': response.uuid,
+                  'code': response.code, 'document_id': response.document_id, 'sender_vkn': response.sender_vkn}
+        candidates = self.by_uuid.get(response.document_id, [])
+        method = 'uuid'
+        if not candidates:
+            candidates = self.by_number.get((response.receiver_vkn, response.document_id), [])
+            method = 'number'
+        differences = []
+        if len(candidates) == 1:
+            sale = self.sales[candidates[0]]
+            if response.sender_vkn and sale.customer_vkn and response.sender_vkn != sale.customer_vkn:
+                differences.append('sender')
+        found = self._emit(record, candidates, method, differences)
+        if found is not None:
+            self.responses.setdefault(found, []).append(response.code)
+
+    def probe(self, record: Record):
+        self.incoming += 1
+        if isinstance(record, ResponseKey):
+            self.match_response(record)
+        else:
+            self.match_purchase(record)
+
+    def load_incoming(self, files: Iterable[str], workers: int = 1):
+        for path, records, error in map_paths(_load, expand_paths(files), workers):
+            if error is not None:
+                self.errors.append({'file': path, 'error': error})
+                continue
+            for record in records:
+                self.probe(record)
+
+    # ---------- sonuç ----------
+
+    def report(self) -> Dict[str, Any]:
+        codes: Dict[str, int] = {}
+        for answers in self.responses.values():
+            for code in answers:
+                codes[code] = codes.get(code, 0) + 1
+        return {
+            'sales': len(self.sales),
+            'incoming': self.incoming,
+            'errors': self.errors,
+            'matched': self.matched,
+            'ambiguous': self.ambiguous,
+            'unmatched': self.unmatched,
+            'response_codes': codes,
+            'sales_without_response': [_ref(sale) for i, sale in enumerate(self.sales) if i not in self.responses],
+            'conflicting_responses': [dict(_ref(self.sales[i]), codes=answers)
+                                      for i, answers in self.responses.items() if len(set(answers)) > 1],
+        }
+
+
+def _label(item: Dict[str, Any]) -> str:
+    kind = 'yanıt' if item['kind'] == 'response' else 'alış'
+    reference = f"{item['code']} -> {item['document_id']}" if item['kind'] == 'response' else item['id']
+    return f"[{kind}] {reference} ({item['source']})"
+
+
+def print_report(report: Dict[str, Any], limit: int = 20):
+    print(f"📊 {report['sales']:,} satış faturası, {report['incoming']:,} gelen kayıt, {len(report['errors'])} hata")
+    for error in report['errors'][:limit]:
+        print(f"  ❌ {error['file']}: {error['error']}")
+
+    with_differences = [m for m in report['matched'] if m['differences']]
+    by_method: Dict[str, int] = {}
+    for item in report['matched']:
+        by_method[item['method']] = by_method.get(item['method'], 0) + 1
+    methods = ', '.join(f"{method}: {n:,}" for method, n in sorted(by_method.items()))
+    print(f"\n✅ Eşleşen: {len(report['matched']):,} ({methods or '-'}), {len(with_differences)} farklı alanlı")
+    for item in with_differences[:limit]:
+        print(f"  {_label(item)} ~ {item['sales']['id']}: {', '.join(item['differences'])}")
+
+    print(f"\n❓ Belirsiz: {len(report['ambiguous']):,}")
+    for item in report['ambiguous'][:limit]:
+        print(f"  {_label(item)}: {len(item['candidates'])} aday ({item['method']})")
+        for candidate in item['candidates']:
+            print(f"      {candidate['id']} {candidate['issue_date']} {candidate['source']}")
+
+    print(f"\n❌ Eşleşmeyen: {len(report['unmatched']):,}")
+    for item in report['unmatched'][:limit]:
+        misses = '; '.join(f"{m['id']} ({', '.join(m['differences'])})" for m in item['near_misses'])
+        print(f"  {_label(item)}" + (f" — yakın: {misses}" if misses else ''))
+
+    if report['response_codes']:
+        codes = ', '.join(f"{code or '-'}: {n:,}" for code, n in sorted(report['response_codes'].items()))
+        print(f"\n📨 Yanıt kodları: {codes}")
+    print(f"📭 Yanıt almamış satış faturası: {len(report['sales_without_response']):,}")
+    if report['conflicting_responses']:
+        print(f"⚠️ Çelişkili yanıt alan satış faturası: {len(report['conflicting_responses'])}")
+        for item in report['conflicting_responses'][:limit]:
+            print(f"  {item['id']} ({item['source']}): {', '.join(item['codes'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Satış / alış faturası ve uygulama yanıtı eşleştirici')
+    parser.add_argument('--sales', nargs='+', required=True, help='Kendi kestiğimiz faturalar (dosya / klasör)')
+    parser.add_argument('--incoming', nargs='+', required=True,
+                        help='Gelen alış faturaları ve ApplicationResponse belgeleri (dosya / klasör / zarf)')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--tolerance', type=int, default=DEFAULT_TOLERANCE,
+                        help='Tutar toleransı (alt birim, ör. kuruş)')
+    parser.add_argument('--date-days', type=int, default=0, help='Tarih toleransı (gün)')
+    parser.add_argument('--limit', type=int, default=20, help='Küme başına yazdırılacak kayıt sayısı')
+    parser.add_argument('--output', help='Sonucu JSON olarak kaydet')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    matcher = Matcher(args.tolerance, args.date_days)
+    matcher.load_sales(args.sales, args.workers)
+    built = time.perf_counter()
+    matcher.load_incoming(args.incoming, args.workers)
+    finished = time.perf_counter()
+    report = matcher.report()
+    print_report(report, args.limit)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Sonuç kaydedildi: {args.output}")
+    print(f"⏱️  indeks {built - started:.2f} sn, eşleştirme {finished - built:.2f} sn")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Sabit Noktalı Para Tipi
+Tutarları float yerine tamsayı alt birim (kuruş/cent) + para birimi kodu olarak
+tutar; cbc:*Amount metnini ve currencyID'yi tam (exact) parse eder ve Türkçe
+formatta (1.234,56) önbellekli olarak yazar.
+"""
+
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+# Para birimi -> alt birim hane sayısı (ISO 4217); listede olmayanlar 2 hane
+CURRENCY_EXPONENTS = {
+    'TRY': 2, 'TRL': 2, 'USD': 2, 'EUR': 2, 'GBP': 2, 'CHF': 2,
+    'JPY': 0, 'KRW': 0, 'KWD': 3, 'BHD': 3, 'OMR': 3, 'JOD': 3,
+}
+
+DEFAULT_CURRENCY = 'TRY'
+
+
+def currency_exponent(currency: str) -> int:
+    """Para biriminin alt birim hane sayısı"""
+    return CURRENCY_EXPONENTS.get(currency, 2)
+
+
+def parse_scaled(text: str, digits: int) -> Tuple[int, bool]:
+    """Ondalık metni 10^-digits ölçekli tamsayıya çevir (half-up); (değer, tam_mı) döner"""
+    s = text.strip()
+    negative = s.startswith('-')
+    if negative or s.startswith('+'):
+        s = s[1:]
+    whole, _, frac = s.partition('.')
+    if not (whole or frac) or not (whole or '0').isdigit() or (frac and not frac.isdigit()):
+        raise ValueError(f"Geçersiz ondalık değer: {text!r}")
+    if len(frac) <= digits:
+        value = int((whole or '0') + frac.ljust(digits, '0'))
+        exact = True
+    else:
+        value = int((whole or '0') + frac[:digits])
+        rest = frac[digits:]
+        exact = not rest.strip('0')
+        if rest[0] >= '5':
+            value += 1
+    return (-value if negative else value), exact
+
+
+def round_half_up(numerator: int, divisor: int) -> int:
+    """Tamsayı bölme, sıfırdan uzağa yarım yuvarlama (GİB kuralı)"""
+    magnitude = (abs(numerator) + divisor // 2) // divisor
+    return -magnitude if numerator < 0 else magnitude
+
+
+@lru_cache(maxsize=65536)
+def format_minor(minor: int, exponent: int = 2) -> str:
+    """Alt birim tamsayıyı Türkçe formatta yaz: 123456 -> '1.234,56'"""
+    sign = '-' if minor < 0 else ''
+    if exponent == 0:
+        return sign + f"{abs(minor):,}".replace(',', '.')
+    whole, frac = divmod(abs(minor), 10 ** exponent)
+    return f"{sign}{whole:,}".replace(',', '.') + f",{frac:0{exponent}d}"
+
+
+class Money:
+    """Tamsayı alt birim + para birimi kodu"""
+
+    __slots__ = ('minor', 'currency')
+
+    def __init__(self, minor: int, currency: str = DEFAULT_CURRENCY):
+        self.minor = minor
+        self.currency = currency
+
+    @classmethod
+    def parse(cls, text: str, currency: Optional[str] = None) -> 'Money':
+        """cbc:*Amount metnini parse et (fazla haneler half-up yuvarlanır)"""
+        return cls.parse_exact(text, currency)[0]
+
+    @classmethod
+    def parse_exact(cls, text: str, currency: Optional[str] = None) -> Tuple['Money', bool]:
+        """Parse et; ikinci değer metin alt birime yuvarlanmadan sığdıysa True"""
+        currency = currency or DEFAULT_CURRENCY
+        minor, exact = parse_scaled(text, currency_exponent(currency))
+        return cls(minor, currency), exact
+
+    @classmethod
+    def from_element(cls, elem, default_currency: str = DEFAULT_CURRENCY) -> Optional['Money']:
+        """cbc:*Amount elementinden (text + currencyID) oku; boş ya da hatalıysa None"""
+        if elem is None or not (elem.text or '').strip():
+            return None
+        try:
+            return cls.parse(elem.text, elem.get('currencyID') or default_currency)
+        except ValueError:
+            return None
+
+    @property
+    def exponent(self) -> int:
+        return currency_exponent(self.currency)
+
+    def _check(self, other: 'Money'):
+        if self.currency != other.currency:
+            raise ValueError(f"Para birimi uyuşmuyor: {self.currency} / {other.currency}")
+
+    def __add__(self, other: 'Money') -> 'Money':
+        if isinstance(other, int) and other == 0:
+            return self
+        self._check(other)
+        return Money(self.minor + other.minor, self.currency)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: 'Money') -> 'Money':
+        self._check(other)
+        return Money(self.minor - other.minor, self.currency)
+
+    def __neg__(self) -> 'Money':
+        return Money(-self.minor, self.currency)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Money) and self.minor == other.minor and self.currency == other.currency
+
+    def __hash__(self) -> int:
+        return hash((self.minor, self.currency))
+
+    def __lt__(self, other: 'Money') -> bool:
+        self._check(other)
+        return self.minor < other.minor
+
+    def __repr__(self) -> str:
+        return f"Money({self.to_decimal()!s} {self.currency})"
+
+    def mul_decimal(self, text: str, digits: int = 6) -> 'Money':
+        """Ondalık metinle çarp (miktar × birim fiyat gibi), sonucu alt birime yuvarla"""
+        factor, _ = parse_scaled(text, digits)
+        return Money(round_half_up(self.minor * factor, 10 ** digits), self.currency)
+
+    def percent(self, text: str, digits: int = 4) -> 'Money':
+        """Oran (%) uygula: matrah.percent('20') -> KDV tutarı"""
+        rate, _ = parse_scaled(text, digits)
+        return Money(round_half_up(self.minor * rate, 100 * 10 ** digits), self.currency)
+
+    def to_decimal(self) -> str:
+        """XML'e yazılabilir nokta ayraçlı metin: '1234.56'"""
+        exponent = self.exponent
+        sign = '-' if self.minor < 0 else ''
+        if exponent == 0:
+            return f"{sign}{abs(self.minor)}"
+        whole, frac = divmod(abs(self.minor), 10 ** exponent)
+        return f"{sign}{whole}.{frac:0{exponent}d}"
+
+    def format(self, with_currency: bool = False) -> str:
+        """Türkçe formatta yaz: '1.234,56' (opsiyonel ' TRY')"""
+        text = format_minor(self.minor, self.exponent)
+        return f"{text} {self.currency}" if with_currency else text
+
+
+def multiply_decimal(quantity: str, price: str, currency: str = DEFAULT_CURRENCY, digits: int = 6) -> Money:
+    """Miktar × birim fiyat (ikisi de metin) -> alt birime yuvarlanmış satır tutarı
+
+    Birim fiyat 2 haneden fazla ondalık içerebildiği için çarpım önce
+    10^-digits hassasiyette yapılır, sonra tek seferde yuvarlanır.
+    """
+    qty, _ = parse_scaled(quantity, digits)
+    unit, _ = parse_scaled(price, digits)
+    return Money(round_half_up(qty * unit, 10 ** (2 * digits - currency_exponent(currency))), currency)
+
+
+def sum_money(values: Iterable[Money], currency: str = DEFAULT_CURRENCY) -> Money:
+    """Aynı para birimindeki tutarları topla (boşsa sıfır)"""
+    total = 0
+    for value in values:
+        if value.currency != currency:
+            raise ValueError(f"Para birimi uyuşmuyor: {currency} / {value.currency}")
+        total += value.minor
+    return Money(total, currency)
+
+
+def format_amount_text(amount_str: str, currency: str = DEFAULT_CURRENCY) -> str:
+    """Ham tutar metnini Türkçe formatla; parse edilemezse olduğu gibi döndür"""
+    try:
+        return Money.parse(amount_str, currency).format()
+    except (ValueError, AttributeError):
+        return amount_str
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Belge Numarası Sıra / Boşluk Denetimi
+e-Fatura / e-Arşiv numaraları seri (3 karakter) + yıl (4 hane) + 9 haneli
+sayaçtan oluşur (EAR2026000000888, NGA2026000000008). Her seri ve yılda
+numaralar 1'den boşluksuz ilerlemeli ve düzenleme tarihi numarayla birlikte
+artmalıdır.
+
+Kaynaklar UBL belgeleri (başlık akışla okunur, satırlara gelmeden durur) ya da
+GİB eArsivVeri raporlarıdır (kök elemente göre otomatik seçilir). Sayaçlar ve
+tarihler (epoch gün) düzenleyici VKN + belge tipi + seri + yıl başına tamsayı
+dizilerinde toplanır. Denetim dizi sıralanıp vektörel farklarla yapılır:
+
+  boşluk      : ardışık sayaç farkı > 1 (ve ilk sayaç > 1; arşiv serinin başını
+                içermiyorsa --from-first ile seri ilk görülen sayaçtan başlatılır)
+  mükerrer    : aynı sayaç farklı ETTN ile (aynı ETTN'li kopyalar tek sayılır)
+  sıra bozma  : sayaç sırasında tarih, önceki numaraların en geç tarihinden
+                geride; her ihlal, onu geride bırakan numara altında toplanır
+  yıl uyumu   : numaradaki yıl ile düzenleme tarihinin yılı farklı
+
+Kullanım:
+    python scripts/ubl_number_audit.py arsiv/2026 --workers 8
+    python scripts/ubl_number_audit.py earsiv_raporlari/ --year 2026 --series EAR NGA --output denetim.json
+    python scripts/ubl_number_audit.py arsiv/2026-10 --from-first
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from earsiv_report import iter_report
+from ubl_duplicates import NUMBER_PATTERN, map_paths, read_keys
+from ubl_path_catalog import expand_paths
+
+MISSING = np.iinfo(np.int64).min
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# eArsivVeri kayıt tipi (iptal eki olmadan) -> numara ailesi
+REPORT_FAMILIES = {
+    'fatura': 'Invoice',
+    'serbest_meslek_makbuz': 'SerbestMeslekMakbuz',
+    'mustahsil_makbuz': 'MustahsilMakbuz',
+}
+
+# UBL makbuzları (ProfileID EARSIVBELGE, CreditNote kökü) tip koduyla eArsivVeri ailesine eşlenir;
+# aksi halde aynı numaralar 'CreditNote' ve rapor ailesi altında iki ayrı seri olur
+UBL_RECEIPT_FAMILIES = {
+    'MUSTAHSILMAKBUZ': 'MustahsilMakbuz',
+    'SERBESTMESLEKMAKBUZ': 'SerbestMeslekMakbuz',
+}
+
+# Kaynak kaydı: (aile, düzenleyici VKN, numara, tarih, ETTN, iptal mi)
+Record = Tuple[str, str, str, str, str, bool]
+SeriesKey = Tuple[str, str, str, str]
+
+
+# ============ KAYNAK OKUMA ============
+
+def _root_name(path: str) -> str:
+    for _, elem in ET.iterparse(path, events=('start',)):
+        return elem.tag[elem.tag.rfind('}') + 1:]
+    return ''
+
+
+def read_records(path: str) -> List[Record]:
+    """UBL belgesinden tek, eArsivVeri raporundan tüm numara kayıtları"""
+    if _root_name(path) == 'eArsivVeri':
+        return [(REPORT_FAMILIES.get(entry.kind.replace('_iptal', ''), entry.kind), entry.taxpayer_vkn,
+                 entry.number, entry.date, entry.ettn, entry.cancelled)
+                for entry in iter_report(path) if entry.number]
+    keys = read_keys(path)
+    if not keys['id']:
+        return []
+    family = UBL_RECEIPT_FAMILIES.get((keys['type_code'] or '').strip().upper(), keys['type'])
+    return [(family, keys['supplier_vkn'] or '', keys['id'], keys['issue_date'] or '', keys['uuid'] or '', False)]
+
+
+def _load(path: str) -> Tuple[str, Optional[List[Record]], Optional[str]]:
+    """İşçi: (dosya, kayıtlar, hata)"""
+    try:
+        return path, read_records(path), None
+    except (ET.ParseError, ValueError, OSError) as e:
+        return path, None, str(e)
+
+
+def _day(text: str) -> int:
+    try:
+        return date.fromisoformat(text[:10]).toordinal() - EPOCH_ORDINAL
+    except ValueError:
+        return MISSING
+
+
+def _uuid_code(uuid: str, record_no: int) -> int:
+    """ETTN'nin 64 bit özeti; ETTN yoksa kayda özgü (hiçbir kopyayla birleşmez)"""
+    text = uuid.strip().upper() if uuid else f'#{record_no}'
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+def _iso(day: int) -> Optional[str]:
+    return None if day == MISSING else str(np.datetime64(int(day), 'D'))
+
+
+# ============ DEFTER ============
+
+class _Series:
+    """Tek seri / yıl için sayaç, tarih, ETTN özeti ve kaynak dizileri"""
+
+    def __init__(self):
+        self.counters = array('q')
+        self.days = array('q')
+        self.uuids = array('q')
+        self.sources = array('q')
+        self.cancelled = 0
+
+
+class NumberLedger:
+    """Numaraları seri başına tamsayı dizilerinde toplar"""
+
+    def __init__(self, years: Optional[Sequence[str]] = None, prefixes: Optional[Sequence[str]] = None):
+        self.years = set(years) if years else None
+        self.prefixes = {p.upper() for p in prefixes} if prefixes else None
+        self.sources: List[str] = []
+        self.series: Dict[SeriesKey, _Series] = {}
+        self.invalid: List[Dict[str, str]] = []
+        self.errors: List[Dict[str, str]] = []
+        self.records = 0
+
+    def add_records(self, source: str, records: Iterable[Record]):
+        source_id = len(self.sources)
+        self.sources.append(source)
+        for family, vkn, number, issue_date, uuid, cancelled in records:
+            match = NUMBER_PATTERN.match(number.strip().upper())
+            if match is None:
+                self.invalid.append({'number': number, 'source': source})
+                continue
+            prefix, year, counter = match.groups()
+            if (self.years and year not in self.years) or (self.prefixes and prefix not in self.prefixes):
+                continue
+            key = (vkn, family, prefix, year)
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = _Series()
+            series.counters.append(int(counter))
+            series.days.append(_day(issue_date))
+            series.uuids.append(_uuid_code(uuid, self.records))
+            series.sources.append(source_id)
+            series.cancelled += cancelled
+            self.records += 1
+
+    def load(self, files: Iterable[str], workers: int = 1):
+        """Dosyaları (UBL ya da eArsivVeri) sırayı koruyarak oku"""
+        for path, records, error in map_paths(_load, expand_paths(files), workers):
+            if error is not None:
+                self.errors.append({'file': path, 'error': error})
+            else:
+                self.add_records(path, records)
+
+    def audit(self, from_first: bool = False) -> Dict[str, Any]:
+        rows = [audit_series(key, series, self.sources, from_first) for key, series in sorted(self.series.items())]
+        return {'records': self.records, 'sources': len(self.sources), 'errors': self.errors,
+                'invalid': self.invalid, 'from_first': from_first, 'series': rows}
+
+
+# ============ DENETİM ============
+
+def audit_series(key: SeriesKey, series: _Series, sources: Sequence[str], from_first: bool = False) -> Dict[str, Any]:
+    """Tek seri için boşluk, mükerrer, sıra bozma ve yıl uyumu (vektörel)
+
+    from_first: seri 1 yerine ilk görülen sayaçtan başlar (kısmi arşivler için)
+    """
+    vkn, family, prefix, year = key
+    counters = np.frombuffer(series.counters, dtype=np.int64)
+    days = np.frombuffer(series.days, dtype=np.int64)
+    uuids = np.frombuffer(series.uuids, dtype=np.int64)
+    source_ids = np.frombuffer(series.sources, dtype=np.int64)
+
+    # Sayaç, sonra ETTN sırası; aynı (sayaç, ETTN) aynı belgenin kopyasıdır
+    order = np.lexsort((uuids, counters))
+    counters, days, uuids, source_ids = counters[order], days[order], uuids[order], source_ids[order]
+    keep = np.ones(len(counters), dtype=bool)
+    keep[1:] = (counters[1:] != counters[:-1]) | (uuids[1:] != uuids[:-1])
+    counters, days, source_ids = counters[keep], days[keep], source_ids[keep]
+
+    def number(counter: int) -> str:
+        return f'{prefix}{year}{counter:09d}'
+
+    # Mükerrer: aynı sayaç birden fazla farklı belgede
+    repeat = counters[1:] == counters[:-1]
+    member = np.zeros(len(counters), dtype=bool)
+    member[1:] |= repeat
+    member[:-1] |= repeat
+    duplicate_ids: Dict[int, List[int]] = {}
+    for counter, source_id in zip(counters[member].tolist(), source_ids[member].tolist()):
+        duplicate_ids.setdefault(counter, []).append(source_id)
+    duplicates = {counter: [sources[i] for i in sorted(ids)] for counter, ids in duplicate_ids.items()}
+
+    # Boşluk: benzersiz sayaçlar arasında fark > 1; seri 1'den (from_first ile ilk sayaçtan) başlar
+    unique = counters[np.concatenate(([True], ~repeat))] if len(counters) else counters
+    start = unique[0] - 1 if from_first and len(unique) else 0
+    bounds = np.concatenate(([start], unique))
+    steps = np.diff(bounds)
+    at = np.flatnonzero(steps > 1)
+    gap_from = bounds[at] + 1
+    gap_to = bounds[at + 1] - 1
+
+    # Sıra bozma: tarih, önceki numaraların en geç tarihinden geride
+    dated = days != MISSING
+    dated_counters = counters[dated]
+    dated_days = days[dated]
+    order_breaks = []
+    inversions = 0
+    if len(dated_days) > 1:
+        latest = np.maximum.accumulate(dated_days)
+        index = np.arange(len(dated_days))
+        holder = np.maximum.accumulate(np.where(dated_days == latest, index, 0))
+        broken = np.flatnonzero(dated_days[1:] < latest[:-1]) + 1
+        inversions = len(broken)
+        if inversions:
+            blockers = holder[broken - 1]
+            # holder artan olduğundan aynı numaranın ihlalleri ardışıktır
+            starts = np.flatnonzero(np.concatenate(([True], blockers[1:] != blockers[:-1])))
+            ends = np.concatenate((starts[1:], [len(blockers)]))
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                blocker = int(blockers[start])
+                order_breaks.append({
+                    'number': number(int(dated_counters[blocker])),
+                    'date': _iso(int(dated_days[blocker])),
+                    'later_numbers_dated_before': end - start,
+                    'first': number(int(dated_counters[broken[start]])),
+                    'last': number(int(dated_counters[broken[end - 1]])),
+                    'earliest_date': _iso(int(dated_days[broken[start:end]].min())),
+                })
+
+    # Yıl uyumu: numaradaki yıl ile tarih yılı
+    date_years = dated_days.astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+    wrong_year = np.flatnonzero(date_years != int(year))
+
+    return {
+        'supplier_vkn': vkn or None,
+        'type': family,
+        'series': prefix,
+        'year': year,
+        'documents': int(len(counters)),
+        'cancelled': series.cancelled,
+        'first': number(int(unique[0])) if len(unique) else None,
+        'last': number(int(unique[-1])) if len(unique) else None,
+        'missing': int((gap_to - gap_from + 1).sum()),
+        'gaps': [{'from': number(a), 'to': number(b), 'count': b - a + 1}
+                 for a, b in zip(gap_from.tolist(), gap_to.tolist())],
+        'duplicates': [{'number': number(counter), 'sources': paths} for counter, paths in duplicates.items()],
+        'inversions': inversions,
+        'order_breaks': order_breaks,
+        'undated': int((~dated).sum()),
+        'year_mismatches': [{'number': number(int(dated_counters[i])), 'date': _iso(int(dated_days[i]))}
+                            for i in wrong_year.tolist()],
+    }
+
+
+def has_findings(row: Dict[str, Any]) -> bool:
+    return bool(row['gaps'] or row['duplicates'] or row['inversions'] or row['year_mismatches'])
+
+
+def print_report(report: Dict[str, Any], limit: int = 20):
+    print(f"📊 {report['records']:,} numara, {report['sources']:,} kaynak, {len(report['series'])} seri, "
+          f"{len(report['errors'])} hata, {len(report['invalid'])} biçimsiz numara")
+    if report.get('from_first'):
+        print("ℹ️  Seriler ilk görülen numaradan başlatıldı; öncesindeki eksikler sayılmaz")
+    else:
+        print("ℹ️  Her serinin 1'den başladığı varsayıldı (kısmi arşiv için --from-first)")
+    for error in report['errors'][:limit]:
+        print(f"  ❌ {error['file']}: {error['error']}")
+    for item in report['invalid'][:limit]:
+        print(f"  ❓ {item['number']!r}: {item['source']}")
+
+    for row in report['series']:
+        status = '⚠️ ' if has_findings(row) else '✅'
+        cancelled = f", {row['cancelled']} iptal" if row['cancelled'] else ''
+        print(f"\n{status} {row['supplier_vkn'] or '-'} {row['type']} {row['series']} {row['year']}: "
+              f"{row['documents']:,} belge ({row['first']} .. {row['last']}{cancelled})")
+        if row['gaps']:
+            print(f"   🕳️  {row['missing']:,} eksik numara, {len(row['gaps'])} boşluk")
+            for gap in row['gaps'][:limit]:
+                span = gap['from'] if gap['count'] == 1 else f"{gap['from']} .. {gap['to']} ({gap['count']:,})"
+                print(f"       {span}")
+        if row['duplicates']:
+            print(f"   🔁 {len(row['duplicates'])} mükerrer numara")
+            for dup in row['duplicates'][:limit]:
+                print(f"       {dup['number']}: {', '.join(dup['sources'])}")
+        if row['inversions']:
+            print(f"   🔀 {row['inversions']:,} numara önceki bir numaradan eski tarihli")
+            for item in row['order_breaks'][:limit]:
+                print(f"       {item['number']} ({item['date']}) sonrasındaki {item['later_numbers_dated_before']:,} "
+                      f"numara daha eski tarihli: {item['first']} .. {item['last']} (en eski {item['earliest_date']})")
+        if row['year_mismatches']:
+            print(f"   📅 {len(row['year_mismatches'])} numara yılı ile tarih yılı farklı")
+            for item in row['year_mismatches'][:limit]:
+                print(f"       {item['number']} ({item['date']})")
+        if row['undated']:
+            print(f"   ❔ {row['undated']} numaranın tarihi okunamadı")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Belge numarası boşluk / mükerrer / tarih sırası denetimi')
+    parser.add_argument('files', nargs='*', default=[
+        'E-ARSIV ENTEGRASYON TEST/INVOICE_DEMIR_INSAAT_TAAHHUT_LTD_STI__EAR2026000000888 2.xml',
+        'E-ARSIV ENTEGRASYON TEST/INVOICE_YALI_ATAKOY_APART_UNITE_VE_ISYERI_TOPLU_YAPI_YONETIMI_NGA2026000000008.xml'])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--year', nargs='+', help='Yalnızca bu yıllar (numaradaki yıl)')
+    parser.add_argument('--series', nargs='+', help='Yalnızca bu seri önekleri')
+    parser.add_argument('--from-first', action='store_true',
+                        help="Seriyi 1 yerine ilk görülen numaradan başlat (arşiv serinin başını içermiyorsa)")
+    parser.add_argument('--limit', type=int, default=20, help='Seri başına yazdırılacak bulgu sayısı')
+    parser.add_argument('--output', help='Raporu JSON olarak kaydet')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ledger = NumberLedger(args.year, args.series)
+    ledger.load(args.files, args.workers)
+    loaded = time.perf_counter()
+    report = ledger.audit(args.from_first)
+    finished = time.perf_counter()
+    print_report(report, args.limit)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Rapor kaydedildi: {args.output}")
+    print(f"⏱️  okuma {loaded - started:.2f} sn, denetim {finished - loaded:.2f} sn")
+    if any(has_findings(row) for row in report['series']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
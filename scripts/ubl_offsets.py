@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Bayt Ofset İndeksi (Rastgele Erişim)
+İlk akış taramasında (expat CurrentByteIndex) her belgenin ve her satırın
+(InvoiceLine / CreditNoteLine / DespatchLine ...) başlangıç-bitiş bayt ofsetlerini
+kaydeder ve dosyanın yanına sidecar indeks (<dosya>.offsets.json) olarak yazar.
+Sonraki sorgularda dosya mmap ile açılır ve yalnızca istenen dilim parse edilir;
+5.000 satırlık bir faturada "4.213. satır" dosyanın başından okunmadan gelir.
+Tek faturalar ve çok belgeli zarflar (ubl_envelope) aynı şekilde indekslenir.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+from xml.parsers import expat
+
+from ubl_documents import CBC, DOCUMENT_TYPES, lookup_document_type
+from ubl_envelope import element_end, standalone_xml
+
+INDEX_SUFFIX = '.offsets.json'
+INDEX_VERSION = 2
+READ_BLOCK = 1 << 16
+
+
+class _OffsetScanner:
+    """expat olaylarından belge ve satır ofsetlerini toplar (içerik tamponlanmaz)"""
+
+    def __init__(self, data):
+        self.data = data
+        self.encoding = 'UTF-8'
+        self.scopes: List[Dict[str, str]] = [{}]
+        self.depth = 0
+        self.documents: List[Dict[str, Any]] = []
+        self.current: Optional[Dict[str, Any]] = None
+        self._line_tag = None
+        self._line_start = None
+        self._id_text: Optional[List[str]] = None
+        self.parser = expat.ParserCreate()
+        self.parser.XmlDeclHandler = self.xml_decl
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = self.end
+        self.parser.CharacterDataHandler = self.text
+
+    def xml_decl(self, version, encoding, standalone):
+        if encoding:
+            self.encoding = encoding
+
+    def _end_offset(self, start: int) -> int:
+        """start ofsetinde açılan elementin bittiği ofset (end tag ya da '<qname/>' sonu)"""
+        return element_end(self.data, start, self.parser.CurrentByteIndex)
+
+    def start(self, name, attrs):
+        position = self.parser.CurrentByteIndex
+        scope = self.scopes[-1]
+        declared = {k[6:]: v for k, v in attrs.items() if k == 'xmlns' or k.startswith('xmlns:')}
+        if declared:
+            scope = dict(scope, **declared)
+        self.scopes.append(scope)
+        self.depth += 1
+        current = self.current
+        prefix, _, local = name.rpartition(':')
+
+        if current is None:
+            doc_type = DOCUMENT_TYPES.get('{' + scope.get(prefix, '') + '}' + local)
+            if doc_type is not None:
+                parent = self.scopes[-2]
+                self._line_tag = doc_type.line_tag
+                self.current = {
+                    'index': len(self.documents), 'type': doc_type.name, 'id': '',
+                    'start': position, 'end': None, 'depth': self.depth,
+                    'namespaces': {p: uri for p, uri in parent.items() if p not in declared and uri},
+                    'line_namespaces': {p: uri for p, uri in scope.items() if uri},
+                    'lines': [],
+                }
+            return
+
+        if self.depth == current['depth'] + 1:
+            tag = '{' + scope.get(prefix, '') + '}' + local
+            if tag == self._line_tag:
+                self._line_start = position
+            elif tag == CBC + 'ID' and not current['id']:
+                self._id_text = []
+
+    def text(self, data):
+        if self._id_text is not None:
+            self._id_text.append(data)
+
+    def end(self, name):
+        current = self.current
+        if current is not None:
+            if self.depth == current['depth'] + 1:
+                if self._line_start is not None:
+                    current['lines'].append([self._line_start, self._end_offset(self._line_start)])
+                    self._line_start = None
+                elif self._id_text is not None:
+                    current['id'] = ''.join(self._id_text).strip()
+                    self._id_text = None
+            elif self.depth == current['depth']:
+                current['end'] = self._end_offset(current['start'])
+                del current['depth']
+                self.documents.append(current)
+                self.current = None
+        self.scopes.pop()
+        self.depth -= 1
+
+
+def scan_offsets(path: str) -> Dict[str, Any]:
+    """Dosyayı bir kez akış halinde tarayıp ofset indeksini oluştur"""
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+        try:
+            scanner = _OffsetScanner(data)
+            for position in range(0, len(data), READ_BLOCK):
+                scanner.parser.Parse(data[position:position + READ_BLOCK], False)
+            scanner.parser.Parse(b'', True)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+    stat = os.stat(path)
+    return {'version': INDEX_VERSION, 'file': os.path.basename(path), 'size': stat.st_size,
+            'mtime': stat.st_mtime, 'encoding': scanner.encoding, 'documents': scanner.documents}
+
+
+def index_path_for(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
+def load_offsets(path: str, rebuild: bool = True) -> Optional[Dict[str, Any]]:
+    """Sidecar indeksi oku; yoksa ya da dosya değişmişse (boyut / mtime) yeniden oluştur"""
+    index_path = index_path_for(path)
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        stat = os.stat(path)
+        if (index.get('version') == INDEX_VERSION and index.get('size') == stat.st_size
+                and index.get('mtime') == stat.st_mtime):
+            return index
+    if not rebuild:
+        return None
+    index = scan_offsets(path)
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    return index
+
+
+class OffsetIndex:
+    """mmap üzerinden belge / satır dilimlerine rastgele erişim"""
+
+    def __init__(self, path: str, rebuild: bool = True):
+        self.path = path
+        self.index = load_offsets(path, rebuild)
+        if self.index is None:
+            raise FileNotFoundError(f"Ofset indeksi yok ya da güncel değil: {index_path_for(path)}")
+        self.encoding = self.index['encoding']
+        self.documents = self.index['documents']
+        self._by_id = {doc['id']: doc for doc in self.documents if doc['id']}
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def document_entry(self, key) -> Dict[str, Any]:
+        """Belge kaydı: sıra numarası (int) ya da belge ID'si (str) ile"""
+        if isinstance(key, int):
+            return self.documents[key]
+        try:
+            return self._by_id[key]
+        except KeyError:
+            raise KeyError(f"Belge bulunamadı: {key}") from None
+
+    def _standalone(self, raw: bytes, namespaces: Dict[str, str]) -> bytes:
+        qname = raw[1:raw.find(b'>')].split(None, 1)[0].rstrip(b'/').decode(self.encoding)
+        return standalone_xml(raw, qname, namespaces, self.encoding)
+
+    def document_bytes(self, key) -> bytes:
+        doc = self.document_entry(key)
+        return self._standalone(self._map[doc['start']:doc['end']], doc['namespaces'])
+
+    def line_bytes(self, key, number: int) -> bytes:
+        """1 tabanlı satır sırasına göre satır elementinin bağımsız XML'i"""
+        doc = self.document_entry(key)
+        if not 1 <= number <= len(doc['lines']):
+            raise IndexError(f"Satır {number} yok ({len(doc['lines'])} satır)")
+        start, end = doc['lines'][number - 1]
+        return self._standalone(self._map[start:end], doc['line_namespaces'])
+
+    def line(self, key, number: int):
+        """Yalnızca satır dilimini parse edip elementi döndür"""
+        return ET.fromstring(self.line_bytes(key, number))
+
+    def read_line(self, key, number: int) -> Dict[str, str]:
+        """Satırı belge tipinin satır alan setiyle oku"""
+        doc_type = lookup_document_type(self.document_entry(key)['type'])
+        return doc_type.read_line(self.line(key, number))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bayt ofset indeksi ile belge / satır rastgele erişimi')
+    parser.add_argument('file', nargs='?', default='scripts/invoice_skr2026000000187.xml')
+    parser.add_argument('--document', default='0', help='Belge sıra numarası ya da ID (varsayılan: 0)')
+    parser.add_argument('--line', type=int, help='Gösterilecek satır (1 tabanlı)')
+    parser.add_argument('--raw', action='store_true', help='Satırı/belgeyi ham XML olarak yaz')
+    parser.add_argument('--rebuild', action='store_true', help='İndeksi yeniden oluştur')
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(index_path_for(args.file)):
+        os.remove(index_path_for(args.file))
+
+    started = time.perf_counter()
+    with OffsetIndex(args.file) as index:
+        loaded = time.perf_counter() - started
+        key = int(args.document) if args.document.isdigit() else args.document
+        if args.line is None:
+            if args.raw:
+                sys.stdout.buffer.write(index.document_bytes(key))
+                return
+            print(f"📑 {args.file}: {len(index.documents)} belge (indeks {loaded * 1000:.1f} ms)")
+            for doc in index.documents:
+                print(f"  [{doc['index']}] {doc['type']} {doc['id']} bayt {doc['start']:,}-{doc['end']:,}, "
+                      f"{len(doc['lines'])} satır")
+            return
+
+        started = time.perf_counter()
+        if args.raw:
+            sys.stdout.buffer.write(index.line_bytes(key, args.line))
+            return
+        line = index.read_line(key, args.line)
+        elapsed = time.perf_counter() - started
+        print(f"📄 {index.document_entry(key)['id']} satır {args.line} ({elapsed * 1000:.2f} ms)")
+        for field, value in line.items():
+            print(f"  {field}: {value}")
+
+
+if __name__ == '__main__':
+    main()
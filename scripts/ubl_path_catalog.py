@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Korpus Path Kataloğu (Şema ve Kardinalite Çıkarımı)
+Klasördeki tüm belgeleri (fatura, irsaliye, yanıt...) extract_all_xml_data'nın
+akış okuyucusuyla tarar ve metni olsun olmasın her element path'i (InvoiceLine,
+Party/PartyTaxScheme gibi kapsayıcılar dahil; attribute'lar 'path/@ad' olarak)
+için belge frekansı, belge başına min / max tekrar ve toplam tekrar tutar.
+Tekrarlar start olaylarından sayılır. Metinli tekrarlar için ek olarak değer
+uzunluğu aralığı, tip dağılımı (tamsayı, ondalık, tarih, saat, kod, serbest
+metin...) ve sabit boyutlu bir KMV çizimi (en küçük k değer hash'i) tutulur.
+Çizim hem farklı değer sayısı tahmini hem de farklı değerler üzerinde düzgün
+örneklem verir.
+
+Tüm istatistikler birleştirilebilir: farklı makinelerde / farklı entegratör
+(NILVERA, Veriban...) arşivlerinde üretilen kısmi kataloglar 'merge' ile tek
+katalogda toplanır; sonuç belgelerin hangi sırayla işlendiğinden bağımsızdır.
+
+Kullanım:
+    python scripts/ubl_path_catalog.py build arsiv/nilvera --output nilvera.catalog.json --workers 8
+    python scripts/ubl_path_catalog.py merge nilvera.catalog.json veriban.catalog.json --output tum.catalog.json
+    python scripts/ubl_path_catalog.py show tum.catalog.json --type date
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from extract_all_xml_data import READ_BLOCK, _PathCollector
+
+CATALOG_VERSION = 2
+SKETCH_SIZE = 256         # KMV: path başına tutulan en küçük hash sayısı (~%6 hata)
+SAMPLE_SIZE = 5           # Gösterilen örnek değer sayısı
+MAX_SAMPLE_LENGTH = 120   # Çizimde saklanan değerin azami uzunluğu
+MAX_VALUE_SIZE = 1024     # Bu uzunluğu aşan metinler 'large' (tam metin okunmaz)
+HASH_SPACE = 1 << 64
+
+# Tip tespiti: ilk eşleşen desen (tam eşleşme) kazanır
+TYPE_PATTERNS = [
+    ('boolean', re.compile(r'true|false')),
+    ('integer', re.compile(r'-?(0|[1-9]\d*)')),
+    ('decimal', re.compile(r'-?\d+\.\d+')),
+    ('date', re.compile(r'\d{4}-\d{2}-\d{2}')),
+    ('time', re.compile(r'\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})?')),
+    ('datetime', re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})?')),
+    ('code', re.compile(r'[A-Za-z0-9_.:/+-]{1,40}')),
+]
+TYPES = [name for name, _ in TYPE_PATTERNS] + ['text', 'large']
+
+
+def infer_type(value: str) -> str:
+    """Tek değerin tipi (baştaki sıfırlı sayılar ID/VKN gibi 'code' sayılır)"""
+    for name, pattern in TYPE_PATTERNS:
+        if pattern.fullmatch(value):
+            return name
+    return 'text'
+
+
+# Genişletme sırası: görülen tüm tipleri kapsayan ilk küme path tipidir
+TYPE_WIDENING = [
+    ('decimal', {'integer', 'decimal'}),
+    ('code', {'boolean', 'integer', 'decimal', 'date', 'time', 'datetime', 'code'}),
+    ('text', set(TYPES) - {'large'}),
+]
+
+
+def path_type(types: Dict[str, int]) -> str:
+    """Path tipi: tek tipse o tip, karışıksa tüm değerleri kapsayan en dar tip"""
+    if len(types) <= 1:
+        return next(iter(types), '')
+    for name, members in TYPE_WIDENING:
+        if types.keys() <= members:
+            return name
+    return 'large'
+
+
+def value_hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class PathStats:
+    """Tek path'in birleştirilebilir istatistikleri"""
+    __slots__ = ('documents', 'occurrences', 'min_count', 'max_count',
+                 'min_length', 'max_length', 'types', 'sketch', '_threshold')
+
+    def __init__(self):
+        self.documents = 0
+        self.occurrences = 0
+        self.min_count = None
+        self.max_count = 0
+        self.min_length = None
+        self.max_length = 0
+        self.types: Dict[str, int] = {}
+        self.sketch: Dict[int, str] = {}    # hash -> (kısaltılmış) değer
+        self._threshold = HASH_SPACE        # Çizim doluyken içindeki en büyük hash
+
+    def add_document(self, count: int, values: List[Tuple[str, int, Optional[int]]]):
+        """Bir belgedeki tekrar sayısı ve metinli tekrarlar: (değer, uzunluk, hazır hash ya da None)"""
+        self.documents += 1
+        self.occurrences += count
+        self.min_count = count if self.min_count is None else min(self.min_count, count)
+        self.max_count = max(self.max_count, count)
+        for value, length, key in values:
+            if self.min_length is None or length < self.min_length:
+                self.min_length = length
+            if length > self.max_length:
+                self.max_length = length
+            kind = 'large' if key is not None else infer_type(value)
+            self.types[kind] = self.types.get(kind, 0) + 1
+            self._offer(value_hash(value) if key is None else key, value)
+
+    def _offer(self, key: int, value: str):
+        if key >= self._threshold or key in self.sketch:
+            return
+        self.sketch[key] = value[:MAX_SAMPLE_LENGTH]
+        if len(self.sketch) > SKETCH_SIZE:
+            del self.sketch[max(self.sketch)]
+        if len(self.sketch) == SKETCH_SIZE:
+            self._threshold = max(self.sketch)
+
+    def merge(self, other: 'PathStats'):
+        self.documents += other.documents
+        self.occurrences += other.occurrences
+        for name in ('min_count', 'min_length'):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            if theirs is not None and (mine is None or theirs < mine):
+                setattr(self, name, theirs)
+        self.max_count = max(self.max_count, other.max_count)
+        self.max_length = max(self.max_length, other.max_length)
+        for kind, n in other.types.items():
+            self.types[kind] = self.types.get(kind, 0) + n
+        for key, value in other.sketch.items():
+            self._offer(key, value)
+
+    def distinct(self) -> int:
+        """Farklı değer sayısı (çizim dolmadıysa kesin, dolduysa KMV tahmini)"""
+        if len(self.sketch) < SKETCH_SIZE:
+            return len(self.sketch)
+        return int((SKETCH_SIZE - 1) * HASH_SPACE / (max(self.sketch) + 1))
+
+    def samples(self, n: int = SAMPLE_SIZE) -> List[str]:
+        """Farklı değerler üzerinden düzgün örneklem (en küçük hash'ler)"""
+        return [self.sketch[key] for key in sorted(self.sketch)[:n]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'documents': self.documents, 'occurrences': self.occurrences,
+                'min_count': self.min_count, 'max_count': self.max_count,
+                'min_length': self.min_length, 'max_length': self.max_length,
+                'types': self.types, 'sketch': [[key, self.sketch[key]] for key in sorted(self.sketch)]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PathStats':
+        stats = cls()
+        for name in ('documents', 'occurrences', 'min_count', 'max_count', 'min_length', 'max_length'):
+            setattr(stats, name, data[name])
+        stats.types = dict(data['types'])
+        for key, value in data['sketch']:
+            stats._offer(key, value)
+        return stats
+
+
+class _CatalogCollector(_PathCollector):
+    """_PathCollector'a ek olarak her start olayında element ve attribute tekrarlarını sayar"""
+
+    def __init__(self, max_value_size: Optional[int]):
+        super().__init__(max_value_size, None)
+        self.counts: Dict[str, int] = {}
+        self.attributes: Dict[str, List[str]] = {}
+
+    def start(self, name, attrs):
+        super().start(name, attrs)
+        path = self.stack[-1][0][1]
+        self.counts[path] = self.counts.get(path, 0) + 1
+        for key, value in attrs.items():
+            self.attributes.setdefault(f"{path}/@{key.rpartition('}')[2]}", []).append(value)
+
+
+def scan_document(path: str, max_value_size: Optional[int] = MAX_VALUE_SIZE
+                  ) -> Tuple[Dict[str, int], Dict[str, List[Tuple[str, int, Optional[int]]]]]:
+    """Belgedeki path -> tekrar sayısı (kök ilk sırada) ve path -> metinli tekrarlar"""
+    collector = _CatalogCollector(max_value_size)
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(READ_BLOCK)
+            collector.parser.Parse(block, not block)
+            if not block:
+                break
+    counts = dict(collector.counts)
+    values: Dict[str, List[Tuple[str, int, Optional[int]]]] = {}
+    for element_path, entries in collector.elements().items():
+        values[element_path] = [
+            (entry['value'], entry['length'], int(entry['sha256'][:16], 16)) if 'sha256' in entry
+            else (entry['value'], len(entry['value']), None)
+            for entry in entries]
+    for attribute_path, attribute_values in collector.attributes.items():
+        counts[attribute_path] = len(attribute_values)
+        values[attribute_path] = [(value, len(value), None) for value in attribute_values]
+    return counts, values
+
+
+class Catalog:
+    """Path -> PathStats; belge ekleme ve katalog birleştirme"""
+
+    def __init__(self):
+        self.documents = 0
+        self.errors = 0
+        self.roots: Dict[str, int] = {}
+        self.paths: Dict[str, PathStats] = {}
+
+    def add_document(self, counts: Dict[str, int], values: Dict[str, List[Tuple[str, int, Optional[int]]]]):
+        """scan_document çıktısını (tek belge) kataloğa ekle"""
+        self.documents += 1
+        if counts:
+            root = next(iter(counts))
+            self.roots[root] = self.roots.get(root, 0) + 1
+        for path, count in counts.items():
+            stats = self.paths.get(path)
+            if stats is None:
+                stats = self.paths[path] = PathStats()
+            stats.add_document(count, values.get(path, ()))
+
+    def merge(self, other: 'Catalog'):
+        self.documents += other.documents
+        self.errors += other.errors
+        for root, n in other.roots.items():
+            self.roots[root] = self.roots.get(root, 0) + n
+        for path, stats in other.paths.items():
+            mine = self.paths.get(path)
+            if mine is None:
+                self.paths[path] = mine = PathStats()
+            mine.merge(stats)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'version': CATALOG_VERSION, 'sketch_size': SKETCH_SIZE, 'documents': self.documents,
+                'errors': self.errors, 'roots': self.roots,
+                'paths': {path: self.paths[path].to_dict() for path in sorted(self.paths)}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Catalog':
+        if data.get('version') != CATALOG_VERSION or data.get('sketch_size') != SKETCH_SIZE:
+            raise ValueError(f"Uyumsuz katalog (sürüm {data.get('version')}, çizim {data.get('sketch_size')})")
+        catalog = cls()
+        catalog.documents = data['documents']
+        catalog.errors = data.get('errors', 0)
+        catalog.roots = dict(data['roots'])
+        catalog.paths = {path: PathStats.from_dict(stats) for path, stats in data['paths'].items()}
+        return catalog
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str) -> 'Catalog':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Özet satırları (path sırasıyla)"""
+        for path in sorted(self.paths):
+            stats = self.paths[path]
+            yield {'path': path, 'documents': stats.documents,
+                   'frequency': stats.documents / self.documents if self.documents else 0.0,
+                   'min_count': stats.min_count, 'max_count': stats.max_count,
+                   'type': path_type(stats.types), 'distinct': stats.distinct(),
+                   'samples': stats.samples()}
+
+
+def expand_paths(paths: Iterable[str]) -> Iterator[str]:
+    """Klasörleri (alt klasörler dahil) içindeki .xml dosyalarına aç"""
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    if name.lower().endswith('.xml'):
+                        yield os.path.join(folder, name)
+        else:
+            yield path
+
+
+def build_catalog(paths: Iterable[str]) -> Catalog:
+    """Dosyaları tek tek akış halinde tarayıp katalog oluştur"""
+    catalog = Catalog()
+    for path in paths:
+        try:
+            counts, values = scan_document(path)
+        except Exception as e:
+            catalog.errors += 1
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            continue
+        catalog.add_document(counts, values)
+    return catalog
+
+
+def _build_chunk(paths: List[str]) -> Dict[str, Any]:
+    return build_catalog(paths).to_dict()
+
+
+def build_parallel(paths: Iterable[str], workers: int = 1) -> Catalog:
+    """Dosya gruplarından kısmi kataloglar üretip birleştir"""
+    paths = list(expand_paths(paths))
+    if workers <= 1 or len(paths) < 2:
+        return build_catalog(paths)
+    chunk_size = max(1, -(-len(paths) // (workers * 4)))
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    catalog = Catalog()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(_build_chunk, chunks):
+            catalog.merge(Catalog.from_dict(partial))
+    return catalog
+
+
+def print_catalog(catalog: Catalog, type_filter: Optional[str] = None, min_frequency: float = 0.0):
+    print(f"📚 {catalog.documents:,} belge, {len(catalog.paths):,} path, {catalog.errors} hata")
+    for root, n in sorted(catalog.roots.items(), key=lambda item: -item[1]):
+        print(f"   {root}: {n:,}")
+    print()
+    print(f"{'Path':70s} {'Frek.':>6s} {'Min':>4s} {'Max':>5s} {'Tip':9s} {'Farklı':>8s}  Örnekler")
+    print('-' * 140)
+    for row in catalog.rows():
+        if type_filter and row['type'] != type_filter:
+            continue
+        if row['frequency'] < min_frequency:
+            continue
+        path = row['path'] if len(row['path']) <= 70 else '…' + row['path'][-69:]
+        samples = ', '.join(s if len(s) <= 24 else s[:23] + '…' for s in row['samples'][:3])
+        print(f"{path:70s} {row['frequency']:6.1%} {row['min_count']:4d} {row['max_count']:5d} "
+              f"{row['type']:9s} {row['distinct']:8,}  {samples}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Korpus genelinde path kataloğu (frekans, tip, kardinalite)')
+    sub = parser.add_subparsers(dest='command')
+
+    build = sub.add_parser('build', help='XML dosyalarından katalog oluştur')
+    build.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml',
+                                                    'scripts/invoice_skr2026000000187.xml'])
+    build.add_argument('--output', default='path_catalog.json')
+    build.add_argument('--merge', help='Var olan kataloğa ekle (artımlı)')
+    build.add_argument('--workers', type=int, default=1)
+
+    merge = sub.add_parser('merge', help='Kısmi katalogları birleştir')
+    merge.add_argument('catalogs', nargs='+')
+    merge.add_argument('--output', required=True)
+
+    show = sub.add_parser('show', help='Kataloğu tablo olarak yazdır')
+    show.add_argument('catalog')
+    show.add_argument('--type', choices=TYPES, help='Yalnızca bu tipteki path\'ler')
+    show.add_argument('--min-frequency', type=float, default=0.0, help='Asgari belge frekansı (0-1)')
+
+    args = parser.parse_args()
+    if args.command is None:
+        args = parser.parse_args(['build'] + sys.argv[1:])
+
+    if args.command == 'show':
+        print_catalog(Catalog.load(args.catalog), args.type, args.min_frequency)
+        return
+
+    started = time.perf_counter()
+    if args.command == 'merge':
+        catalog = Catalog()
+        for path in args.catalogs:
+            catalog.merge(Catalog.load(path))
+    else:
+        catalog = build_parallel(args.files, args.workers)
+        if args.merge and os.path.exists(args.merge):
+            catalog.merge(Catalog.load(args.merge))
+        print_catalog(catalog)
+    catalog.save(args.output)
+    elapsed = time.perf_counter() - started
+    print(f"\n💾 {args.output}: {catalog.documents:,} belge, {len(catalog.paths):,} path ({elapsed:.2f} sn)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Ters Path İndeksi ("hangi belgelerde X var?" sorguları)
+Her belgenin tüm element path'lerini (yerel adlarla, attribute'lar 'path/@ad')
+bir kez tarar ve path -> belge numarası posting listelerini kalıcı bir klasöre
+yazar. Seyrek listeler fark (delta) kodlu uint32, yoğun listeler segment aralığı
+üzerinde bit dizisi olarak saklanır ve zlib ile sıkıştırılır. Her ekleme yeni bir
+segment yazar (belge numaraları hep artar, segmentler ardışık aralıkları kapsar);
+'compact' tüm segmentleri tek segmentte toplar. Sorgular belge maskeleri üzerinde
+(AND / OR / NOT = &, |, ~) değerlendirilir.
+
+Sorgu dili (büyük harf operatörler, parantez desteklenir):
+    AccountingCustomerParty/Party/PartyTaxScheme        kökten itibaren tam path
+    **/TaxCategory/Percent                              ** = herhangi sayıda seviye, * = tek seviye
+    re:/Percent$ AND NOT re:TaxCategory/Percent$        're:' = path üzerinde regex (search);
+                                                        Percent'i olup hiç TaxCategory/Percent'i olmayanlar
+    re:^(?!.*/TaxCategory/).*/Percent$                  TaxCategory dışında en az bir Percent olanlar
+    A AND B, A OR B, NOT A
+
+Kullanım:
+    python scripts/ubl_path_index.py add arsiv/2026-01 --index path_index --workers 8
+    python scripts/ubl_path_index.py query "AccountingCustomerParty/Party/PartyTaxScheme" --index path_index
+    python scripts/ubl_path_index.py paths "**/Percent" --index path_index
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from xml.parsers import expat
+
+import numpy as np
+
+from ubl_path_catalog import expand_paths
+
+INDEX_VERSION = 1
+READ_BLOCK = 1 << 16
+META_FILE = 'meta.json'
+PATHS_FILE = 'paths.txt'
+DOCS_FILE = 'docs.txt'
+DOCS_OFFSETS = 'docs.idx'
+ID_DTYPE = np.uint32
+
+
+# ============ BELGE TARAMA ============
+
+def document_paths(path: str) -> Tuple[str, Set[str]]:
+    """Belgedeki farklı element / attribute path'leri (kök adı dahil) ve kök adı"""
+    found: Set[str] = set()
+    nodes: Dict[Tuple[str, str], str] = {}
+    stack: List[str] = []
+
+    def start(name, attrs):
+        parent = stack[-1] if stack else ''
+        full = nodes.get((parent, name))
+        if full is None:
+            local = name.rpartition('}')[2]
+            full = nodes[(parent, name)] = f"{parent}/{local}" if parent else local
+            found.add(full)
+        stack.append(full)
+        for attr in attrs:
+            found.add(f"{full}/@{attr.rpartition('}')[2]}")
+
+    def end(name):
+        stack.pop()
+
+    parser = expat.ParserCreate(namespace_separator='}')
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(READ_BLOCK)
+            parser.Parse(block, not block)
+            if not block:
+                break
+    root = min(found, key=len) if found else ''
+    return root, found
+
+
+def _scan(path: str) -> Tuple[str, Optional[str], List[str], Optional[str]]:
+    """İşçi: (dosya, kök, path listesi, hata)"""
+    try:
+        root, paths = document_paths(path)
+        return path, root, sorted(paths), None
+    except (expat.ExpatError, OSError) as e:
+        return path, None, [], str(e)
+
+
+# ============ POSTING KODLAMA ============
+
+IDS, BITMAP = 0, 1
+
+
+def encode_postings(ids: np.ndarray, base: int, span: int) -> Tuple[int, bytes]:
+    """Sıralı belge numaralarını segment aralığına göre kodla (Roaring benzeri kap seçimi)
+
+    Seyrek listeler fark (delta) kodlu uint32, yoğun listeler (adet * 32 > aralık)
+    aralık üzerinde bit dizisi olarak saklanır; ikisi de zlib ile sıkıştırılır.
+    """
+    if len(ids) * 32 > span:
+        mask = np.zeros(span, dtype=bool)
+        mask[ids - base] = True
+        return BITMAP, zlib.compress(np.packbits(mask).tobytes(), 6)
+    deltas = np.diff(ids.astype(ID_DTYPE), prepend=ID_DTYPE(base))
+    return IDS, zlib.compress(deltas.astype(ID_DTYPE).tobytes(), 6)
+
+
+def write_segment(directory: str, name: str, postings: Dict[int, np.ndarray], base: int, span: int):
+    """Segment: <ad>.bin (sıkıştırılmış listeler art arda) + <ad>.json (aralık + path id -> [ofset, bayt, adet, kap])"""
+    table = {}
+    with open(os.path.join(directory, name + '.bin'), 'wb') as f:
+        offset = 0
+        for path_id in sorted(postings):
+            ids = postings[path_id]
+            kind, data = encode_postings(ids, base, span)
+            f.write(data)
+            table[str(path_id)] = [offset, len(data), int(len(ids)), kind]
+            offset += len(data)
+    with open(os.path.join(directory, name + '.json'), 'w', encoding='utf-8') as f:
+        json.dump({'base': base, 'span': span, 'paths': table}, f, separators=(',', ':'))
+
+
+class _Segment:
+    """Ardışık belge numarası aralığının [base, base + span) posting listeleri"""
+
+    def __init__(self, directory: str, name: str):
+        self.name = name
+        with open(os.path.join(directory, name + '.json'), 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        self.base = header['base']
+        self.span = header['span']
+        self.table = {int(k): v for k, v in header['paths'].items()}
+        with open(os.path.join(directory, name + '.bin'), 'rb') as f:
+            self.data = f.read()
+
+    def count(self, path_id: int) -> int:
+        entry = self.table.get(path_id)
+        return entry[2] if entry is not None else 0
+
+    def fill(self, path_id: int, mask: np.ndarray):
+        """Path'in bu segmentteki belgelerini tüm-korpus maskesinde işaretle"""
+        entry = self.table.get(path_id)
+        if entry is None:
+            return
+        offset, size, _, kind = entry
+        raw = zlib.decompress(self.data[offset:offset + size])
+        if kind == BITMAP:
+            bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8), count=self.span).view(bool)
+            mask[self.base:self.base + self.span] |= bits
+        else:
+            # Farklar segment tabanına göredir: ilk fark ids[0] - base
+            mask[self.base + np.cumsum(np.frombuffer(raw, dtype=ID_DTYPE), dtype=np.int64)] = True
+
+
+# ============ SORGU ============
+
+# 're:' terimi boşluğa kadar tek parçadır (parantez içerebilir); boşluklu desenler tırnakla yazılır
+_TOKEN = re.compile(r'\s*("[^"]*"|re:\S+|\(|\)|[^\s()]+)')
+
+
+def _pattern_regex(pattern: str) -> 're.Pattern':
+    """Glob path deseni ('**' çok seviye, '*' tek seviye) ya da 're:' regex
+
+    Glob deseni '/' + path üzerinde tam eşleşir.
+    """
+    if pattern.startswith('re:'):
+        return re.compile(pattern[3:])
+    parts = []
+    for segment in pattern.strip('/').split('/'):
+        if segment == '**':
+            parts.append('(?:/[^/]+)*')
+        else:
+            parts.append('/' + re.escape(segment).replace(r'\*', '[^/]*'))
+    return re.compile('^' + ''.join(parts) + '$')
+
+
+class QueryError(ValueError):
+    """Geçersiz sorgu ifadesi"""
+
+
+class PathIndex:
+    """Kalıcı ters path indeksi: ekleme, sıkıştırma ve AND / OR / NOT sorguları"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            if self.meta.get('version') != INDEX_VERSION:
+                raise ValueError(f"Uyumsuz indeks sürümü: {self.meta.get('version')}")
+        else:
+            self.meta = {'version': INDEX_VERSION, 'documents': 0, 'paths': 0, 'segments': [], 'next_segment': 0}
+        self.paths: List[str] = []
+        paths_file = os.path.join(directory, PATHS_FILE)
+        if os.path.exists(paths_file):
+            with open(paths_file, 'r', encoding='utf-8') as f:
+                self.paths = f.read().split('\n')[:self.meta['paths']]
+        self.path_ids = {path: i for i, path in enumerate(self.paths)}
+        self._segments: Optional[List[_Segment]] = None
+        self._cache: Dict[str, np.ndarray] = {}     # desen -> belge maskesi
+        self._pattern_cache: Dict[str, List[int]] = {}
+
+    @property
+    def documents(self) -> int:
+        return self.meta['documents']
+
+    def _save_meta(self):
+        with open(os.path.join(self.directory, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, indent=2)
+
+    def segments(self) -> List[_Segment]:
+        if self._segments is None:
+            self._segments = [_Segment(self.directory, name) for name in self.meta['segments']]
+        return self._segments
+
+    # ---------- ekleme ----------
+
+    def indexed_files(self) -> Set[str]:
+        docs_file = os.path.join(self.directory, DOCS_FILE)
+        if not os.path.exists(docs_file):
+            return set()
+        with open(docs_file, 'r', encoding='utf-8') as f:
+            return {line.split('\t', 1)[0] for _, line in zip(range(self.documents), f)}
+
+    def add(self, files: Iterable[str], workers: int = 1) -> Dict[str, int]:
+        """Yeni dosyaları tarayıp tek segment olarak ekle (daha önce eklenen dosyalar atlanır)"""
+        known = self.indexed_files()
+        stats = {'added': 0, 'skipped': 0, 'errors': 0}
+        # Aynı çağrıda birden fazla kez verilen dosyalar da tek belge olur
+        unique: Dict[str, str] = {}
+        for path in expand_paths(files):
+            unique.setdefault(os.path.abspath(path), path)
+        files = []
+        for absolute, path in unique.items():
+            if absolute in known:
+                stats['skipped'] += 1
+            else:
+                files.append(path)
+        if workers <= 1 or len(files) < 2:
+            results = map(_scan, files)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(_scan, files, chunksize=max(1, -(-len(files) // (workers * 4))))
+
+        postings: Dict[int, List[int]] = {}
+        doc_id = self.documents
+        new_paths: List[str] = []
+        docs_file = os.path.join(self.directory, DOCS_FILE)
+        # Belge tablosunu meta'daki sayıya göre kırp (yarım kalmış önceki ekleme)
+        offsets = self._doc_offsets()
+        with open(docs_file, 'r+b' if os.path.exists(docs_file) else 'wb') as docs:
+            position = int(offsets[-1]) if len(offsets) else 0
+            docs.truncate(position)
+            docs.seek(position)
+            new_offsets = []
+            try:
+                for path, root, paths, error in results:
+                    if error is not None:
+                        stats['errors'] += 1
+                        print(f"❌ {path}: {error}", file=sys.stderr)
+                        continue
+                    for full in paths:
+                        path_id = self.path_ids.get(full)
+                        if path_id is None:
+                            path_id = self.path_ids[full] = len(self.paths)
+                            self.paths.append(full)
+                            new_paths.append(full)
+                        postings.setdefault(path_id, []).append(doc_id)
+                    stat = os.stat(path)
+                    line = f"{os.path.abspath(path)}\t{stat.st_size}\t{stat.st_mtime}\t{root}\n".encode('utf-8')
+                    docs.write(line)
+                    position += len(line)
+                    new_offsets.append(position)
+                    doc_id += 1
+                    stats['added'] += 1
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+
+        if not stats['added']:
+            return stats
+        np.concatenate([offsets, np.array(new_offsets, dtype=np.uint64)]).tofile(
+            os.path.join(self.directory, DOCS_OFFSETS))
+        if new_paths:
+            with open(os.path.join(self.directory, PATHS_FILE), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(self.paths))
+        name = f"seg_{self.meta['next_segment']:05d}"
+        write_segment(self.directory, name, {pid: np.array(ids, dtype=ID_DTYPE) for pid, ids in postings.items()},
+                      self.documents, doc_id - self.documents)
+        # meta en son yazılır: yarıda kesilen ekleme görünmez kalır
+        self.meta.update(documents=doc_id, paths=len(self.paths), next_segment=self.meta['next_segment'] + 1,
+                         segments=self.meta['segments'] + [name])
+        self._save_meta()
+        self._segments = None
+        self._cache.clear()
+        self._pattern_cache.clear()
+        return stats
+
+    def compact(self) -> int:
+        """Tüm segmentleri tek segmentte birleştir; birleştirilen segment sayısını döndür"""
+        segments = self.segments()
+        if len(segments) <= 1:
+            return len(segments)
+        postings = {pid: np.flatnonzero(self.mask(pid)).astype(ID_DTYPE) for pid in range(len(self.paths))}
+        name = f"seg_{self.meta['next_segment']:05d}"
+        write_segment(self.directory, name, {pid: ids for pid, ids in postings.items() if len(ids)},
+                      0, self.documents)
+        old = self.meta['segments']
+        self.meta.update(segments=[name], next_segment=self.meta['next_segment'] + 1)
+        self._save_meta()
+        for old_name in old:
+            for suffix in ('.bin', '.json'):
+                os.remove(os.path.join(self.directory, old_name + suffix))
+        self._segments = None
+        return len(old)
+
+    # ---------- okuma ----------
+
+    def _doc_offsets(self) -> np.ndarray:
+        offsets_file = os.path.join(self.directory, DOCS_OFFSETS)
+        if not os.path.exists(offsets_file) or not self.documents:
+            return np.zeros(0, dtype=np.uint64)
+        return np.fromfile(offsets_file, dtype=np.uint64, count=self.documents)
+
+    def document(self, doc_id: int) -> Dict[str, Any]:
+        """Belge numarasından dosya bilgisi (docs.idx ofsetleriyle doğrudan seek)"""
+        if not 0 <= doc_id < self.documents:
+            raise IndexError(f"Belge {doc_id} yok ({self.documents} belge)")
+        offsets = np.memmap(os.path.join(self.directory, DOCS_OFFSETS), dtype=np.uint64, mode='r',
+                            shape=(self.documents,))
+        start = int(offsets[doc_id - 1]) if doc_id else 0
+        end = int(offsets[doc_id])
+        with open(os.path.join(self.directory, DOCS_FILE), 'rb') as f:
+            f.seek(start)
+            file, size, mtime, root = f.read(end - start).decode('utf-8').rstrip('\n').split('\t')
+        return {'id': doc_id, 'file': file, 'size': int(size), 'mtime': float(mtime), 'root': root}
+
+    def count(self, path_id: int) -> int:
+        """Path'i içeren belge sayısı (listeler açılmadan)"""
+        return sum(segment.count(path_id) for segment in self.segments())
+
+    def mask(self, path_id: int) -> np.ndarray:
+        """Path'i içeren belgelerin maskesi (belge sayısı uzunluğunda bool)"""
+        mask = np.zeros(self.documents, dtype=bool)
+        for segment in self.segments():
+            segment.fill(path_id, mask)
+        return mask
+
+    def postings(self, path_id: int) -> np.ndarray:
+        """Path'in tüm segmentlerdeki belge numaraları (sıralı)"""
+        return np.flatnonzero(self.mask(path_id)).astype(ID_DTYPE)
+
+    def match_paths(self, pattern: str) -> List[int]:
+        """Desene uyan path id'leri (desen başına bir kez hesaplanır)"""
+        ids = self._pattern_cache.get(pattern)
+        if ids is None:
+            regex = _pattern_regex(pattern)
+            if pattern.startswith('re:'):
+                ids = [i for i, path in enumerate(self.paths) if regex.search(path)]
+            else:
+                # Glob desenleri kök adı olmadan da yazılabilir
+                ids = [i for i, path in enumerate(self.paths)
+                       if regex.match('/' + path) or regex.match('/' + path.partition('/')[2])]
+            self._pattern_cache[pattern] = ids
+        return ids
+
+    def _term(self, pattern: str) -> np.ndarray:
+        """Desene uyan tüm path'lerin birleşimi (maske olarak; sonuç desen başına saklanır)"""
+        mask = self._cache.get(pattern)
+        if mask is None:
+            mask = np.zeros(self.documents, dtype=bool)
+            for path_id in self.match_paths(pattern):
+                for segment in self.segments():
+                    segment.fill(path_id, mask)
+            mask.flags.writeable = False
+            self._cache[pattern] = mask
+        return mask
+
+    def query(self, expression: str) -> np.ndarray:
+        """AND / OR / NOT ifadesini değerlendir; sıralı belge numaralarını döndür"""
+        tokens = [t.strip('"') if t.startswith('"') else t for t in _TOKEN.findall(expression)]
+        position = 0
+
+        def peek():
+            return tokens[position] if position < len(tokens) else None
+
+        def take():
+            nonlocal position
+            position += 1
+            return tokens[position - 1]
+
+        def parse_or():
+            result = parse_and()
+            while peek() == 'OR':
+                take()
+                result = result | parse_and()
+            return result
+
+        def parse_and():
+            result = parse_not()
+            while peek() == 'AND':
+                take()
+                result = result & parse_not()
+            return result
+
+        def parse_not():
+            if peek() == 'NOT':
+                take()
+                return ~parse_not()
+            return parse_atom()
+
+        def parse_atom():
+            token = peek()
+            if token is None or token in ('AND', 'OR', ')'):
+                raise QueryError(f"Beklenmeyen sorgu sonu / operatör: {token!r}")
+            take()
+            if token == '(':
+                result = parse_or()
+                if peek() != ')':
+                    raise QueryError("Kapanmayan parantez")
+                take()
+                return result
+            return self._term(token)
+
+        result = parse_or()
+        if position != len(tokens):
+            raise QueryError(f"Fazla ifade: {' '.join(tokens[position:])}")
+        return np.flatnonzero(result).astype(ID_DTYPE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ters path indeksi: yapısal "hangi belgelerde" sorguları')
+    parser.add_argument('--index', default='path_index', help='İndeks klasörü')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    add = sub.add_parser('add', help='Dosyaları indekse ekle (artımlı)')
+    add.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml',
+                                                  'scripts/invoice_skr2026000000187.xml'])
+    add.add_argument('--workers', type=int, default=1)
+
+    query = sub.add_parser('query', help='AND / OR / NOT sorgusu çalıştır')
+    query.add_argument('expression')
+    query.add_argument('--limit', type=int, default=20, help='Listelenecek belge sayısı (0 = yalnızca sayı)')
+
+    paths = sub.add_parser('paths', help='Desene uyan path\'leri ve belge sayılarını listele')
+    paths.add_argument('pattern')
+
+    sub.add_parser('compact', help='Segmentleri birleştir')
+    args = parser.parse_args()
+
+    index = PathIndex(args.index)
+    started = time.perf_counter()
+    if args.command == 'add':
+        stats = index.add(args.files, args.workers)
+        print(f"📥 {stats['added']:,} belge eklendi, {stats['skipped']} zaten indekste, {stats['errors']} hata "
+              f"({time.perf_counter() - started:.2f} sn)")
+        print(f"📚 {index.documents:,} belge, {len(index.paths):,} path, {len(index.meta['segments'])} segment")
+    elif args.command == 'compact':
+        merged = index.compact()
+        print(f"🗜️  {merged} segment birleştirildi ({time.perf_counter() - started:.2f} sn)")
+    elif args.command == 'paths':
+        for path_id in index.match_paths(args.pattern):
+            print(f"{index.count(path_id):10,}  {index.paths[path_id]}")
+    else:
+        try:
+            result = index.query(args.expression)
+        except (QueryError, re.error) as e:
+            print(f"❌ Sorgu hatası: {e}", file=sys.stderr)
+            sys.exit(2)
+        elapsed = time.perf_counter() - started
+        print(f"🔎 {len(result):,} / {index.documents:,} belge ({elapsed * 1000:.1f} ms)")
+        for doc_id in result[:args.limit]:
+            doc = index.document(int(doc_id))
+            print(f"  [{doc['id']}] {doc['root']} {doc['file']}")
+        if args.limit and len(result) > args.limit:
+            print(f"  ... ve {len(result) - args.limit:,} belge daha")
+
+
+if __name__ == '__main__':
+    main()
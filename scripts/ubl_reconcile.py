@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+"""
+UBL Fatura Tutar Mutabakatı (Reconciliation) Motoru
+Satır tutarlarını, miktarları, fiyatları ve oranları sabit noktalı (kuruş)
+tamsayı NumPy dizilerine yükler; satır vergisi, TaxSubtotal, TaxTotal,
+LegalMonetaryTotal ve yuvarlama kurallarını vektörel olarak kontrol eder.
+
+Kullanım:
+    python scripts/ubl_reconcile.py fatura1.xml fatura2.xml ...
+    python scripts/ubl_reconcile.py --workers 4 arsiv/*.xml
+"""
+
+import argparse
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+from ubl_documents import lookup_document_type
+from ubl_money import format_minor, parse_scaled
+
+# ============ SABİT NOKTA ÖLÇEKLERİ ============
+AMOUNT_DIGITS = 2      # Tutarlar kuruş cinsinden
+QTY_DIGITS = 6         # Miktar 10^-6 hassasiyetinde
+PRICE_DIGITS = 6       # Birim fiyat 10^-6 hassasiyetinde
+PERCENT_DIGITS = 4     # Oran %0.0001 hassasiyetinde
+
+# Eksik alan işareti (int64 en küçük değer)
+MISSING = np.iinfo(np.int64).min
+
+# Namespace'ler (Clark notasyonu önekleri)
+CBC = '{urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2}'
+CAC = '{urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2}'
+
+PATH_PRICE_AMOUNT = f'{CAC}Price/{CBC}PriceAmount'
+PATH_CATEGORY_PERCENT = f'{CAC}TaxCategory/{CBC}Percent'
+PATH_TAX_TYPE_CODE = f'{CAC}TaxCategory/{CAC}TaxScheme/{CBC}TaxTypeCode'
+
+# LegalMonetaryTotal alanları -> kolon adı
+MONETARY_FIELDS = {
+    'LineExtensionAmount': 'line_extension',
+    'TaxExclusiveAmount': 'tax_exclusive',
+    'TaxInclusiveAmount': 'tax_inclusive',
+    'AllowanceTotalAmount': 'allowance_total',
+    'ChargeTotalAmount': 'charge_total',
+    'PrepaidAmount': 'prepaid',
+    'PayableRoundingAmount': 'payable_rounding',
+    'PayableAmount': 'payable',
+}
+
+# Yokluğu 0 sayılan (opsiyonel) toplam alanları
+OPTIONAL_MONETARY = {'allowance_total', 'charge_total', 'prepaid', 'payable_rounding'}
+
+# TaxTotal içinde TaxSubtotal olarak gelip toplamdan düşülen tevkifat kodları (TR1.0)
+WITHHOLDING_CODES = {'9015'}
+
+# Kesintileri (stopaj 0003, SGK 0011, borsa 8001, mera fonu 9040...) PayableAmount'a
+# düzenleyiciye göre farklı yansıyan makbuz tipleri: ödenecek tutar kontrolü yapılmaz
+UNMODELLED_PAYABLE_TYPES = {'MUSTAHSILMAKBUZ', 'SERBESTMESLEKMAKBUZ'}
+
+# Yuvarlanan alan ayrıntısının tutulduğu tablolar
+ROUNDING_TABLES = ('invoices', 'lines', 'line_taxes', 'doc_taxes')
+
+INVOICE_COLUMNS = list(MONETARY_FIELDS.values()) + ['tax_total', 'withholding_total']
+
+
+def round_div(numerator: np.ndarray, divisor: int) -> np.ndarray:
+    """int64 bölme, sıfırdan uzağa yarım yuvarlama (GİB kuralı)"""
+    half = divisor // 2
+    magnitude = (np.abs(numerator) + half) // divisor
+    return np.where(numerator < 0, -magnitude, magnitude)
+
+
+def mul_round(a: np.ndarray, b: np.ndarray, divisor: int) -> np.ndarray:
+    """round(a * b / divisor) - int64 taşma riski olan satırlar Python int ile hesaplanır"""
+    risky = np.abs(a.astype(np.float64) * b.astype(np.float64)) >= 2.0 ** 62
+    if not risky.any():
+        return round_div(a * b, divisor)
+    result = np.zeros(len(a), dtype=np.int64)
+    safe = ~risky
+    result[safe] = round_div(a[safe] * b[safe], divisor)
+    half = divisor // 2
+    for i in np.flatnonzero(risky):
+        product = int(a[i]) * int(b[i])
+        magnitude = (abs(product) + half) // divisor
+        result[i] = -magnitude if product < 0 else magnitude
+    return result
+
+
+class _ColumnBuilder:
+    """Tek geçişli iterparse ile kolon listelerini doldurur"""
+
+    def __init__(self):
+        self.invoice_ids: List[str] = []
+        self.invoice_files: List[str] = []
+        self.invoices = {name: [] for name in INVOICE_COLUMNS}
+        self.invoice_inexact = {name: [] for name in INVOICE_COLUMNS}
+        self.payable_modelled: List[bool] = []
+        self.line_ids: List[str] = []
+        self.lines = {name: [] for name in ('inv', 'qty', 'price', 'line_extension',
+                                            'allowance', 'charge', 'tax_amount', 'inexact')}
+        self.line_taxes = {name: [] for name in ('line', 'taxable', 'tax', 'percent', 'code', 'inexact')}
+        self.doc_taxes = {name: [] for name in ('inv', 'taxable', 'tax', 'percent', 'code', 'inexact')}
+        self.codes: Dict[str, int] = {}
+        self.errors: List[Dict[str, Any]] = []
+        # Tablo -> satır indeksi -> 2 haneden fazla ondalıklı ilk alan ('Alan=ham değer')
+        self.rounding: Dict[str, Dict[int, str]] = {name: {} for name in ROUNDING_TABLES}
+
+    def _code_id(self, code: str) -> int:
+        """Vergi tipi kodunu sözlük kodlamasıyla tamsayıya çevir"""
+        code_id = self.codes.get(code)
+        if code_id is None:
+            code_id = self.codes[code] = len(self.codes)
+        return code_id
+
+    def _amount(self, elem, digits: int = AMOUNT_DIGITS,
+                at: Optional[Tuple[str, int]] = None) -> Tuple[int, bool]:
+        """Element text'ini ölçekli tamsayıya çevir; hatalıysa eksik say
+
+        at=(tablo, indeks) verilirse tam olmayan (yuvarlanan) değer yuvarlama raporu için saklanır.
+        """
+        text = (elem.text or '').strip()
+        if not text:
+            return MISSING, True
+        try:
+            value, exact = parse_scaled(text, digits)
+        except ValueError as e:
+            self.errors.append({'file': self._file, 'check': 'parse', 'detail': str(e)})
+            return MISSING, True
+        if not exact and at is not None:
+            self.rounding[at[0]].setdefault(at[1], f"{elem.tag[elem.tag.rfind('}') + 1:]}={text}")
+        return value, exact
+
+    def _subtotal(self, elem, table: str) -> Dict[str, Any]:
+        """TaxSubtotal elementini oku (table: eklenecek alt toplam tablosu, 'line_taxes' / 'doc_taxes')"""
+        subtotal = {'taxable': MISSING, 'tax': MISSING, 'percent': MISSING, 'code': '', 'inexact': False}
+        at = (table, len(getattr(self, table)['tax']))
+        taxable = elem.find(CBC + 'TaxableAmount')
+        if taxable is not None:
+            subtotal['taxable'], exact = self._amount(taxable, at=at)
+            subtotal['inexact'] |= not exact
+        tax = elem.find(CBC + 'TaxAmount')
+        if tax is not None:
+            subtotal['tax'], exact = self._amount(tax, at=at)
+            subtotal['inexact'] |= not exact
+        # UBL-TR Percent'i TaxSubtotal altına koyar; eski örnekler TaxCategory altında
+        percent = elem.find(CBC + 'Percent')
+        if percent is None:
+            percent = elem.find(PATH_CATEGORY_PERCENT)
+        if percent is not None:
+            subtotal['percent'], _ = self._amount(percent, PERCENT_DIGITS)
+        code = elem.find(PATH_TAX_TYPE_CODE)
+        if code is not None:
+            subtotal['code'] = (code.text or '').strip()
+        return subtotal
+
+    def _add_line(self, elem, inv_index: int, quantity_tag: str):
+        """InvoiceLine / CreditNoteLine elementini kolonlara yaz"""
+        line_index = len(self.line_ids)
+        cols = self.lines
+        line_id = elem.find(CBC + 'ID')
+        self.line_ids.append((line_id.text or '').strip() if line_id is not None else '')
+        cols['inv'].append(inv_index)
+        inexact = False
+
+        qty = MISSING
+        qty_elem = elem.find(quantity_tag)
+        if qty_elem is not None:
+            qty, _ = self._amount(qty_elem, QTY_DIGITS)
+        price_elem = elem.find(PATH_PRICE_AMOUNT)
+        price = self._amount(price_elem, PRICE_DIGITS)[0] if price_elem is not None else MISSING
+        ext_elem = elem.find(CBC + 'LineExtensionAmount')
+        line_ext = MISSING
+        if ext_elem is not None:
+            line_ext, exact = self._amount(ext_elem, at=('lines', line_index))
+            inexact |= not exact
+
+        allowance = charge = 0
+        for ac in elem.iterfind(CAC + 'AllowanceCharge'):
+            amount_elem = ac.find(CBC + 'Amount')
+            if amount_elem is None:
+                continue
+            amount, exact = self._amount(amount_elem, at=('lines', line_index))
+            inexact |= not exact
+            if amount == MISSING:
+                continue
+            if (ac.findtext(CBC + 'ChargeIndicator') or '').strip().lower() == 'true':
+                charge += amount
+            else:
+                allowance += amount
+
+        tax_amount = MISSING
+        tax_total = elem.find(CAC + 'TaxTotal')
+        if tax_total is not None:
+            tax_elem = tax_total.find(CBC + 'TaxAmount')
+            if tax_elem is not None:
+                tax_amount, exact = self._amount(tax_elem, at=('lines', line_index))
+                inexact |= not exact
+            for sub in tax_total.iterfind(CAC + 'TaxSubtotal'):
+                self._append_subtotal(self.line_taxes, 'line', line_index, self._subtotal(sub, 'line_taxes'))
+
+        cols['qty'].append(qty)
+        cols['price'].append(price)
+        cols['line_extension'].append(line_ext)
+        cols['allowance'].append(allowance)
+        cols['charge'].append(charge)
+        cols['tax_amount'].append(tax_amount)
+        cols['inexact'].append(inexact)
+
+    def add_file(self, xml_path: str):
+        """Bir fatura dosyasını tek geçişte kolonlara ekle
+
+        Kökün doğrudan çocukları (satırlar, toplamlar) kapandıkça C seviyesinde
+        find() ile okunur ve hemen bırakılır; bellek satır sayısından bağımsızdır.
+        """
+        state = None
+        root = None
+        depth = 0
+        for event, elem in ET.iterparse(xml_path, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = elem
+                    state = self._begin(root.tag, xml_path)
+                    if state is None:
+                        return
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            self._add_child(elem, state)
+            # Belleği sabit tutmak için kökün tamamlanan çocuklarını bırak
+            elem.clear()
+            del root[:]
+        self._finish(state)
+
+    def add_tree(self, root, name: str):
+        """Başka bir okuyucunun zaten kurduğu ağaçtan ekle (dosya tekrar parse edilmez, ağaç değişmez)"""
+        state = self._begin(root.tag, name)
+        if state is None:
+            return
+        for child in root:
+            self._add_child(child, state)
+        self._finish(state)
+
+    def _begin(self, root_tag: str, name: str) -> Optional[Dict[str, Any]]:
+        """Kök etiketinden belge tipi; tutar toplamı olmayan tipler (None) mutabakata girmez"""
+        self._file = name
+        doc_type = lookup_document_type(root_tag)
+        if doc_type is None or not doc_type.has_totals:
+            local = root_tag[root_tag.rfind('}') + 1:]
+            self.errors.append({'file': name, 'check': 'unsupported_root', 'detail': local})
+            return None
+        return {
+            'file': name,
+            'inv_index': len(self.invoice_ids),
+            'line_tag': doc_type.line_tag,
+            'quantity_tag': doc_type.quantity_tag,
+            'type_code_tag': f'{CBC}{doc_type.name}TypeCode',
+            'invoice': {name: MISSING for name in INVOICE_COLUMNS},
+            'inexact': {name: False for name in INVOICE_COLUMNS},
+            'invoice_id': '',
+            'type_code': '',
+        }
+
+    def _add_child(self, elem, state: Dict[str, Any]):
+        """Kökün tamamlanmış bir çocuğunu (satır, toplam, başlık) işle"""
+        tag = elem.tag
+        inv_index = state['inv_index']
+        invoice, invoice_inexact = state['invoice'], state['inexact']
+        if tag == state['line_tag']:
+            self._add_line(elem, inv_index, state['quantity_tag'])
+        elif tag == CBC + 'ID':
+            state['invoice_id'] = (elem.text or '').strip()
+        elif tag == state['type_code_tag']:
+            state['type_code'] = (elem.text or '').strip().upper()
+        elif tag == CAC + 'LegalMonetaryTotal':
+            for child in elem:
+                name = MONETARY_FIELDS.get(child.tag[child.tag.rfind('}') + 1:])
+                if name:
+                    invoice[name], exact = self._amount(child, at=('invoices', inv_index))
+                    invoice_inexact[name] = not exact
+        elif tag == CAC + 'TaxTotal' or tag == CAC + 'WithholdingTaxTotal':
+            name = 'tax_total' if tag == CAC + 'TaxTotal' else 'withholding_total'
+            tax_elem = elem.find(CBC + 'TaxAmount')
+            if tax_elem is not None:
+                value, exact = self._amount(tax_elem, at=('invoices', inv_index))
+                if value != MISSING:
+                    invoice[name] = value if invoice[name] == MISSING else invoice[name] + value
+                invoice_inexact[name] |= not exact
+            if name == 'tax_total':
+                for sub in elem.iterfind(CAC + 'TaxSubtotal'):
+                    self._append_subtotal(self.doc_taxes, 'inv', inv_index, self._subtotal(sub, 'doc_taxes'))
+
+    def _finish(self, state: Dict[str, Any]):
+        """Faturanın başlık kolonlarını ekle"""
+        invoice, invoice_inexact = state['invoice'], state['inexact']
+        self.invoice_ids.append(state['invoice_id'])
+        self.invoice_files.append(state['file'])
+        self.payable_modelled.append(state['type_code'] not in UNMODELLED_PAYABLE_TYPES)
+        for name in INVOICE_COLUMNS:
+            if invoice[name] == MISSING and name in OPTIONAL_MONETARY | {'withholding_total'}:
+                invoice[name] = 0
+            self.invoices[name].append(invoice[name])
+            self.invoice_inexact[name].append(invoice_inexact[name])
+
+    def _append_subtotal(self, table, key, index, subtotal):
+        """Alt toplamı (satır ya da belge) tabloya ekle"""
+        table[key].append(index)
+        table['taxable'].append(subtotal['taxable'])
+        table['tax'].append(subtotal['tax'])
+        table['percent'].append(subtotal['percent'])
+        table['code'].append(self._code_id(subtotal['code']))
+        table['inexact'].append(subtotal['inexact'])
+
+    def to_arrays(self) -> Dict[str, Any]:
+        """Kolon listelerini NumPy dizilerine dönüştür"""
+        def table(columns, int_keys):
+            out = {}
+            for name, values in columns.items():
+                if name == 'inexact':
+                    out[name] = np.array(values, dtype=bool)
+                elif name in int_keys:
+                    out[name] = np.array(values, dtype=np.int32 if name != 'code' else np.int16)
+                else:
+                    out[name] = np.array(values, dtype=np.int64)
+            return out
+
+        invoices = {name: np.array(values, dtype=np.int64) for name, values in self.invoices.items()}
+        for name, values in self.invoice_inexact.items():
+            invoices[f'{name}_inexact'] = np.array(values, dtype=bool)
+        invoices['payable_modelled'] = np.array(self.payable_modelled, dtype=bool)
+        return {
+            'invoice_ids': self.invoice_ids,
+            'invoice_files': self.invoice_files,
+            'line_ids': self.line_ids,
+            'codes': sorted(self.codes, key=self.codes.get),
+            'invoices': invoices,
+            'lines': table(self.lines, {'inv'}),
+            'line_taxes': table(self.line_taxes, {'line', 'code'}),
+            'doc_taxes': table(self.doc_taxes, {'inv', 'code'}),
+            'rounding': self.rounding,
+            'errors': self.errors,
+        }
+
+
+def _load_chunk(paths: List[str]) -> Dict[str, Any]:
+    """Worker: dosya grubunu kolonlara yükle"""
+    builder = _ColumnBuilder()
+    for path in paths:
+        try:
+            builder.add_file(path)
+        except ET.ParseError as e:
+            builder.errors.append({'file': path, 'check': 'parse', 'detail': str(e)})
+    return builder.to_arrays()
+
+
+def _merge_chunks(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Worker çıktılarını indeksleri kaydırarak birleştir"""
+    codes: Dict[str, int] = {}
+    merged = {'invoice_ids': [], 'invoice_files': [], 'line_ids': [], 'errors': [],
+              'invoices': [], 'lines': [], 'line_taxes': [], 'doc_taxes': [],
+              'rounding': {name: {} for name in ROUNDING_TABLES}}
+    inv_offset = line_offset = 0
+    offsets = dict.fromkeys(ROUNDING_TABLES, 0)
+    for chunk in chunks:
+        sizes = {'invoices': len(chunk['invoice_ids']), 'lines': len(chunk['line_ids']),
+                 'line_taxes': len(chunk['line_taxes']['tax']), 'doc_taxes': len(chunk['doc_taxes']['tax'])}
+        for name in ROUNDING_TABLES:
+            merged['rounding'][name].update(
+                (offsets[name] + index, text) for index, text in chunk['rounding'][name].items())
+            offsets[name] += sizes[name]
+        remap = np.array([codes.setdefault(c, len(codes)) for c in chunk['codes']] or [0], dtype=np.int16)
+        lines = dict(chunk['lines'], inv=chunk['lines']['inv'] + inv_offset)
+        line_taxes = dict(chunk['line_taxes'], line=chunk['line_taxes']['line'] + line_offset,
+                          code=remap[chunk['line_taxes']['code']])
+        doc_taxes = dict(chunk['doc_taxes'], inv=chunk['doc_taxes']['inv'] + inv_offset,
+                         code=remap[chunk['doc_taxes']['code']])
+        for key in ('invoice_ids', 'invoice_files', 'line_ids', 'errors'):
+            merged[key].extend(chunk[key])
+        merged['invoices'].append(chunk['invoices'])
+        merged['lines'].append(lines)
+        merged['line_taxes'].append(line_taxes)
+        merged['doc_taxes'].append(doc_taxes)
+        inv_offset += len(chunk['invoice_ids'])
+        line_offset += len(chunk['line_ids'])
+    for key in ('invoices', 'lines', 'line_taxes', 'doc_taxes'):
+        tables = merged[key]
+        merged[key] = {name: np.concatenate([t[name] for t in tables]) for name in tables[0]}
+    merged['codes'] = sorted(codes, key=codes.get)
+    return merged
+
+
+def load_invoices(paths: Iterable[str], workers: int = 1, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """Fatura dosyalarını kolon dizilerine yükle (opsiyonel process havuzu ile)"""
+    paths = [str(p) for p in paths]
+    if workers <= 1 or len(paths) < 2:
+        return _load_chunk(paths)
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(paths) // (workers * 4)))
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _merge_chunks(list(pool.map(_load_chunk, chunks)))
+
+
+def _segment_sum(keys: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    """int64 değerleri anahtar bazında tam (exact) topla"""
+    out = np.zeros(size, dtype=np.int64)
+    if len(keys):
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        out[sorted_keys[starts]] = np.add.reduceat(values[order], starts)
+    return out
+
+
+def reconcile(data: Dict[str, Any], tolerance: int = 1) -> List[Dict[str, Any]]:
+    """Tüm değişmezleri (invariant) vektörel kontrol et; her uyumsuzluğu listele
+
+    tolerance: kuruş cinsinden izin verilen fark. Toplam kontrollerinde 2 haneden
+    fazla ondalık içeren her katkı için yarım kuruş ek pay tanınır.
+    """
+    inv = data['invoices']
+    lines = data['lines']
+    ltax = data['line_taxes']
+    dtax = data['doc_taxes']
+    n_inv = len(data['invoice_ids'])
+    n_lines = len(data['line_ids'])
+    mismatches: List[Dict[str, Any]] = list(data.get('errors', []))
+    percent_div = 100 * 10 ** PERCENT_DIGITS
+    qty_price_div = 10 ** (QTY_DIGITS + PRICE_DIGITS - AMOUNT_DIGITS)
+
+    def report(check, mask, expected, actual, inv_index, line_index=None, details=None):
+        for i in np.flatnonzero(mask):
+            invoice = int(inv_index[i])
+            entry = {
+                'file': data['invoice_files'][invoice],
+                'invoice': data['invoice_ids'][invoice],
+                'line': data['line_ids'][int(line_index[i])] if line_index is not None else None,
+                'check': check,
+                'expected': int(expected[i]) if expected is not None else None,
+                'actual': int(actual[i]) if actual is not None else None,
+            }
+            if details is not None:
+                entry['detail'] = details.get(int(i), '')
+            mismatches.append(entry)
+
+    def differs(expected, actual, slack=0):
+        both = (expected != MISSING) & (actual != MISSING)
+        return both & (np.abs(expected - actual) > tolerance + slack)
+
+    def half_kurus(count):
+        return (count + 1) // 2
+
+    # ============ 1. SATIR VERGİSİ (Matrah × Oran) ============
+    ok = (ltax['taxable'] != MISSING) & (ltax['percent'] != MISSING)
+    expected = np.full(len(ltax['tax']), MISSING, dtype=np.int64)
+    expected[ok] = mul_round(ltax['taxable'][ok], ltax['percent'][ok], percent_div)
+    line_of_tax = ltax['line'].astype(np.int64)
+    report('line_tax_rate', differs(expected, ltax['tax'], half_kurus(ltax['inexact'].astype(np.int64))),
+           expected, ltax['tax'], lines['inv'][line_of_tax], line_of_tax)
+
+    # ============ 2. SATIR TaxTotal = Σ TaxSubtotal (tevkifat düşülür) ============
+    withholding = np.array([code in WITHHOLDING_CODES for code in data['codes']] or [False], dtype=bool)
+    valid_tax = np.where(ltax['tax'] == MISSING, 0, ltax['tax'])
+    signed_tax = np.where(withholding[ltax['code']], -valid_tax, valid_tax)
+    line_tax_sum = _segment_sum(line_of_tax, signed_tax, n_lines)
+    line_inexact = _segment_sum(line_of_tax, ltax['inexact'].astype(np.int64), n_lines)
+    line_index = np.arange(n_lines)
+    report('line_tax_total', differs(line_tax_sum, lines['tax_amount'], half_kurus(line_inexact)),
+           line_tax_sum, lines['tax_amount'], lines['inv'], line_index)
+
+    # ============ 3. SATIR TUTARI (Miktar × Fiyat - İskonto + Artırım) ============
+    ok = (lines['qty'] != MISSING) & (lines['price'] != MISSING)
+    expected = np.full(n_lines, MISSING, dtype=np.int64)
+    expected[ok] = (mul_round(lines['qty'][ok], lines['price'][ok], qty_price_div)
+                    - lines['allowance'][ok] + lines['charge'][ok])
+    report('line_extension', differs(expected, lines['line_extension'], lines['inexact'].astype(np.int64)),
+           expected, lines['line_extension'], lines['inv'], line_index)
+
+    # ============ 4. BELGE TaxSubtotal = Σ satır (vergi kodu, oran) ============
+    # Tevkifat alt toplamları belge seviyesinde farklı oranları birleştirir; yalnızca koda göre grupla
+    percents = np.concatenate([np.where(withholding[ltax['code']], MISSING, ltax['percent']),
+                               np.where(withholding[dtax['code']], MISSING, dtax['percent'])])
+    _, pct_ids = np.unique(percents, return_inverse=True)
+    pct_ids = pct_ids.astype(np.int64)
+    line_keys = ((lines['inv'][line_of_tax].astype(np.int64) << 40)
+                 | (ltax['code'].astype(np.int64) << 24) | pct_ids[:len(ltax['percent'])])
+    doc_keys = ((dtax['inv'].astype(np.int64) << 40)
+                | (dtax['code'].astype(np.int64) << 24) | pct_ids[len(ltax['percent']):])
+    all_keys, key_ids = np.unique(np.concatenate([line_keys, doc_keys]), return_inverse=True)
+    line_key_ids = key_ids[:len(line_keys)]
+    doc_key_ids = key_ids[len(line_keys):]
+    n_keys = len(all_keys)
+    taxable_sum = _segment_sum(line_key_ids, np.where(ltax['taxable'] == MISSING, 0, ltax['taxable']), n_keys)
+    tax_sum = _segment_sum(line_key_ids, valid_tax, n_keys)
+    group_inexact = _segment_sum(line_key_ids, ltax['inexact'].astype(np.int64), n_keys)
+    has_lines = np.zeros(n_keys, dtype=bool)
+    has_lines[line_key_ids] = True
+    slack = half_kurus(group_inexact[doc_key_ids])
+    covered = has_lines[doc_key_ids]
+    report('subtotal_taxable', covered & differs(taxable_sum[doc_key_ids], dtax['taxable'], slack),
+           taxable_sum[doc_key_ids], dtax['taxable'], dtax['inv'])
+    report('subtotal_tax', covered & differs(tax_sum[doc_key_ids], dtax['tax'], slack),
+           tax_sum[doc_key_ids], dtax['tax'], dtax['inv'])
+    ok = (dtax['taxable'] != MISSING) & (dtax['percent'] != MISSING) & ~withholding[dtax['code']]
+    expected = np.full(len(dtax['tax']), MISSING, dtype=np.int64)
+    expected[ok] = mul_round(dtax['taxable'][ok], dtax['percent'][ok], percent_div)
+    report('subtotal_rate', differs(expected, dtax['tax'], half_kurus(dtax['inexact'].astype(np.int64))),
+           expected, dtax['tax'], dtax['inv'])
+    # Belge seviyesinde karşılığı olmayan satır vergi grupları
+    has_doc = np.zeros(n_keys, dtype=bool)
+    has_doc[doc_key_ids] = True
+    orphan_rows = np.flatnonzero(~has_doc[line_key_ids])
+    _, first = np.unique(line_key_ids[orphan_rows], return_index=True)
+    first_orphan = np.zeros(len(line_key_ids), dtype=bool)
+    first_orphan[orphan_rows[first]] = True
+    report('subtotal_missing', first_orphan, tax_sum[line_key_ids], None,
+           lines['inv'][line_of_tax], line_of_tax)
+
+    # ============ 5. TaxTotal = Σ TaxSubtotal ============
+    doc_tax = np.where(dtax['tax'] == MISSING, 0, dtax['tax'])
+    doc_tax = np.where(withholding[dtax['code']], -doc_tax, doc_tax)
+    doc_tax_sum = _segment_sum(dtax['inv'].astype(np.int64), doc_tax, n_inv)
+    doc_inexact = _segment_sum(dtax['inv'].astype(np.int64), dtax['inexact'].astype(np.int64), n_inv)
+    inv_index = np.arange(n_inv)
+    report('tax_total', differs(doc_tax_sum, inv['tax_total'], half_kurus(doc_inexact)),
+           doc_tax_sum, inv['tax_total'], inv_index)
+
+    # ============ 6. LegalMonetaryTotal ============
+    line_ext = np.where(lines['line_extension'] == MISSING, 0, lines['line_extension'])
+    line_ext_sum = _segment_sum(lines['inv'].astype(np.int64), line_ext, n_inv)
+    lines_inexact = _segment_sum(lines['inv'].astype(np.int64), lines['inexact'].astype(np.int64), n_inv)
+    report('line_extension_total', differs(line_ext_sum, inv['line_extension'], half_kurus(lines_inexact)),
+           line_ext_sum, inv['line_extension'], inv_index)
+
+    def combine(*terms):
+        """Eksik alan içeren toplamları MISSING olarak işaretle"""
+        missing = np.zeros(n_inv, dtype=bool)
+        total = np.zeros(n_inv, dtype=np.int64)
+        for sign, column in terms:
+            missing |= column == MISSING
+            total += sign * np.where(column == MISSING, 0, column)
+        return np.where(missing, MISSING, total)
+
+    expected = combine((1, inv['line_extension']), (-1, inv['allowance_total']), (1, inv['charge_total']))
+    report('tax_exclusive', differs(expected, inv['tax_exclusive']), expected, inv['tax_exclusive'], inv_index)
+    expected = combine((1, inv['tax_exclusive']), (1, inv['tax_total']))
+    report('tax_inclusive', differs(expected, inv['tax_inclusive']), expected, inv['tax_inclusive'], inv_index)
+    expected = combine((1, inv['tax_inclusive']), (-1, inv['withholding_total']),
+                       (-1, inv['prepaid']), (1, inv['payable_rounding']))
+    report('payable', differs(expected, inv['payable']) & inv['payable_modelled'],
+           expected, inv['payable'], inv_index)
+
+    for name in ('line_extension', 'tax_exclusive', 'tax_inclusive', 'payable'):
+        report(f'missing_{name}', inv[name] == MISSING, None, None, inv_index)
+
+    # ============ 7. YUVARLAMA (2 haneden fazla ondalık) ============
+    rounding = data.get('rounding') or {name: {} for name in ROUNDING_TABLES}
+    report('rounding', lines['inexact'], None, None, lines['inv'], line_index, rounding['lines'])
+    report('rounding', ltax['inexact'] & ~lines['inexact'][line_of_tax], None, None,
+           lines['inv'][line_of_tax], line_of_tax, rounding['line_taxes'])
+    inexact_doc = np.zeros(n_inv, dtype=bool)
+    for name in INVOICE_COLUMNS:
+        inexact_doc |= inv[f'{name}_inexact']
+    inexact_doc |= doc_inexact > 0
+    doc_details = dict(rounding['invoices'])
+    for index, text in sorted(rounding['doc_taxes'].items()):
+        doc_details.setdefault(int(dtax['inv'][index]), text)
+    report('rounding', inexact_doc, None, None, inv_index, details=doc_details)
+
+    return mismatches
+
+
+def reconcile_files(paths: Iterable[str], tolerance: int = 1, workers: int = 1) -> Dict[str, Any]:
+    """Dosyaları yükle ve mutabakat raporu üret"""
+    return _summary(load_invoices(paths, workers=workers), tolerance)
+
+
+def reconcile_tree(root, name: str, tolerance: int = 1) -> Dict[str, Any]:
+    """Zaten parse edilmiş tek faturanın ağacından mutabakat raporu (ikinci okuma yok)"""
+    builder = _ColumnBuilder()
+    builder.add_tree(root, name)
+    return _summary(builder.to_arrays(), tolerance)
+
+
+def _summary(data: Dict[str, Any], tolerance: int) -> Dict[str, Any]:
+    return {
+        'invoice_count': len(data['invoice_ids']),
+        'line_count': len(data['line_ids']),
+        'payable_skipped': int((~data['invoices']['payable_modelled']).sum()),
+        'mismatches': reconcile(data, tolerance=tolerance),
+    }
+
+
+def format_kurus(value: Optional[int]) -> str:
+    """Kuruş tamsayıyı Türkçe TL metnine çevir (eksikse '-')"""
+    if value is None or value == MISSING:
+        return '-'
+    return format_minor(value, AMOUNT_DIGITS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='UBL fatura tutar mutabakatı')
+    parser.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml'])
+    parser.add_argument('--tolerance', type=int, default=1, help='İzin verilen fark (kuruş)')
+    parser.add_argument('--workers', type=int, default=1, help='Paralel yükleme process sayısı')
+    args = parser.parse_args()
+
+    print(f"🔍 {len(args.files)} fatura yükleniyor...")
+    result = reconcile_files(args.files, tolerance=args.tolerance, workers=args.workers)
+    print(f"✅ {result['invoice_count']} fatura, {result['line_count']} satır kontrol edildi")
+    if result['payable_skipped']:
+        print(f"ℹ️ {result['payable_skipped']} makbuzda ödenecek tutar kontrolü atlandı (kesintiler modellenmiyor)")
+
+    mismatches = result['mismatches']
+    if not mismatches:
+        print("✅ Tüm tutarlar tutarlı!")
+        return
+
+    print(f"\n⚠️ {len(mismatches)} uyumsuzluk bulundu:")
+    print("-" * 80)
+    for m in mismatches:
+        where = f"{m.get('invoice', '')} satır {m['line']}" if m.get('line') else m.get('invoice', m['file'])
+        detail = m.get('detail') or f"beklenen {format_kurus(m.get('expected'))} / bulunan {format_kurus(m.get('actual'))}"
+        print(f"  [{m['check']}] {where}: {detail}")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Fatura -> HTML Render (Gömülü XSLT ile)
+Faturayı alıcının gördüğü şekilde, kendi içindeki görselleştirme XSLT'si ile
+offline olarak HTML'e çevirir. XSLT içerik hash'i ile ubl_xslt_store deposuna
+alınır ve her benzersiz hash için yalnızca bir kez derlenir (LRU); aynı şablonu
+kullanan sonraki faturalarda derleme adımı tamamen atlanır. Klasör render'ı
+process havuzu ile yapılabilir (her process kendi önbelleğini tutar).
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ubl_xslt_store import CBC_NS, XSLT_EXTENSIONS, AttachmentStore
+
+try:
+    from lxml import etree
+except ImportError:  # lxml kurulu değilse render modu kullanılamaz
+    etree = None
+
+
+def _safe_parser():
+    """Gönderenden gelen XML / XSLT için entity çözümlemesiz, ağ erişimsiz parser"""
+    return etree.XMLParser(resolve_entities=False, no_network=True)
+
+
+def compile_template(data: bytes):
+    """XSLT'yi dosya / ağ erişimi kapalı olarak derle (exsl:document, document() engellenir)"""
+    return etree.XSLT(etree.fromstring(data, _safe_parser()),
+                      access_control=etree.XSLTAccessControl.DENY_ALL)
+
+
+class XsltCache:
+    """İçerik hash'i anahtarlı derlenmiş XSLT LRU önbelleği"""
+
+    def __init__(self, store: AttachmentStore, maxsize: int = 32):
+        self.store = store
+        self.maxsize = maxsize
+        self._compiled: 'OrderedDict[str, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, content_hash: str):
+        transform = self._compiled.get(content_hash)
+        if transform is not None:
+            self._compiled.move_to_end(content_hash)
+            self.hits += 1
+            return transform
+        self.misses += 1
+        transform = compile_template(self.store.read(content_hash))
+        self._compiled[content_hash] = transform
+        while len(self._compiled) > self.maxsize:
+            self._compiled.popitem(last=False)
+        return transform
+
+
+def find_template(doc, store: AttachmentStore) -> Optional[str]:
+    """Faturadaki ilk gömülü XSLT'yi depoya al; içerik hash'ini döndür"""
+    for elem in doc.iter(f'{{{CBC_NS}}}EmbeddedDocumentBinaryObject'):
+        filename = elem.get('filename', '')
+        if filename.lower().endswith(XSLT_EXTENSIONS):
+            return store.add_text(elem.text or '', filename, elem.get('mimeCode', ''))
+    return None
+
+
+def render_invoice(path: str, store: AttachmentStore, cache: XsltCache, output_dir: str) -> Dict[str, Any]:
+    """Tek faturayı HTML'e çevir; sonuç özeti döndür"""
+    result = {'file': str(path), 'html': '', 'template': None, 'compiled': False}
+    try:
+        doc = etree.parse(str(path), _safe_parser())
+        content_hash = find_template(doc, store)
+        if content_hash is None:
+            result['error'] = 'Gömülü XSLT bulunamadı'
+            return result
+        result['template'] = content_hash
+        misses = cache.misses
+        transform = cache.get(content_hash)
+        result['compiled'] = cache.misses != misses
+        html = bytes(transform(doc))
+    except (etree.XMLSyntaxError, etree.XSLTError, OSError) as e:
+        result['error'] = str(e)
+        return result
+
+    html_path = os.path.join(output_dir, Path(path).stem + '.html')
+    with open(html_path, 'wb') as f:
+        f.write(html)
+    result['html'] = html_path
+    return result
+
+
+# ============ PROCESS HAVUZU ============
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(store_root: str, output_dir: str, cache_size: int):
+    store = AttachmentStore(store_root)
+    _worker.update(store=store, cache=XsltCache(store, cache_size), output_dir=output_dir)
+
+
+def _render_chunk(paths: List[str]) -> Tuple[List[Dict[str, Any]], Dict[str, str], Dict[str, Dict[str, Any]]]:
+    store = _worker['store']
+    results = [render_invoice(p, store, _worker['cache'], _worker['output_dir']) for p in paths]
+    return results, store.aliases, store.objects
+
+
+def render_files(paths: List[str], store_root: str, output_dir: str,
+                 workers: int = 1, cache_size: int = 32) -> List[Dict[str, Any]]:
+    """Faturaları render et (opsiyonel process havuzu ile); depo indeksini günceller"""
+    if etree is None:
+        raise RuntimeError("HTML render için lxml gerekli: pip install lxml")
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [str(p) for p in paths]
+    if workers <= 1 or len(paths) < 2:
+        _init_worker(store_root, output_dir, cache_size)
+        results, _, _ = _render_chunk(paths)
+        _worker['store'].save()
+        return results
+
+    chunk_size = max(1, -(-len(paths) // (workers * 4)))
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    store = AttachmentStore(store_root)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(store_root, output_dir, cache_size)) as pool:
+        for chunk_results, aliases, objects in pool.map(_render_chunk, chunks):
+            results.extend(chunk_results)
+            store.merge(aliases, objects)
+    store.save()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Faturaları gömülü XSLT ile HTML\'e çevir (offline)')
+    parser.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml'])
+    parser.add_argument('--store', default='scripts/xslt_store', help='XSLT deposu klasörü')
+    parser.add_argument('--output-dir', default='scripts/html_output', help='HTML çıktı klasörü')
+    parser.add_argument('--workers', type=int, default=1, help='Paralel process sayısı')
+    parser.add_argument('--cache-size', type=int, default=32, help='Derlenmiş XSLT önbellek boyutu')
+    args = parser.parse_args()
+
+    if etree is None:
+        print("❌ HTML render için lxml gerekli: pip install lxml")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    results = render_files(args.files, args.store, args.output_dir, args.workers, args.cache_size)
+    elapsed = time.perf_counter() - started
+
+    failed = 0
+    for result in results:
+        if result.get('error'):
+            failed += 1
+            print(f"❌ {result['file']}: {result['error']}")
+        else:
+            print(f"✅ {result['file']} -> {result['html']}{' (derlendi)' if result['compiled'] else ''}")
+
+    compiled = sum(1 for r in results if r['compiled'])
+    print(f"\n📊 {len(results) - failed}/{len(results)} render, {compiled} derleme, {elapsed:.3f} sn")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Yerel Fatura Arama İndeksi (SQLite FTS5)
+Destek ekibinin faturaları numara (EAR2026000000888), ETTN, VKN / TCKN ya da
+firma / ürün adı parçasıyla bulabilmesi için: belgeler ubl_documents kaydıyla
+tek geçişte okunur, kimlik alanları kesin eşleşme tablosuna (B-ağacı), firma ve
+kalem adları FTS5 tam metin tablosuna yazılır.
+
+Türkçe büyük / küçük harf katlama: İ -> i, I -> ı kurallarıyla küçültülür, ardından
+ı / ş / ğ / ü / ö / ç temel harflere indirgenir. Böylece 'İSTANBUL', 'istanbul',
+'ISTANBUL' ve 'ıstanbul' aynı terime düşer (Python'un 'İ'.lower() -> 'i̇' hatası da
+oluşmaz). Aynı katlama sorguya da uygulanır.
+
+Sorgu boşluk içermiyorsa önce kesin anahtar tablosuna bakılır; bulunamazsa tam
+metin araması kademeli yapılır (tam kelime, son kelime önek, tüm kelimeler önek)
+ve sonuçlar rowid sırasıyla (en yeni önce) döner: bm25 sıralaması sık geçen bir
+kelimede tüm eşleşmeleri puanlamak zorunda kaldığından kullanılmaz.
+
+Eklemeler toplu işlemlerle (varsayılan 1000 belge / transaction) yapılır; dosya
+boyutu ve mtime'ı değişmeyen belgeler atlanır, değişenler yeniden indekslenir.
+
+Kullanım:
+    python scripts/ubl_search_index.py add arsiv/ --db fatura_arama.db --workers 8
+    python scripts/ubl_search_index.py find EAR2026000000888 --db fatura_arama.db
+    python scripts/ubl_search_index.py find "şükür elektronik" --db fatura_arama.db
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ubl_documents import CAC, CBC, lookup_document_type
+from ubl_path_catalog import expand_paths
+
+BATCH_SIZE = 1000
+DEFAULT_LIMIT = 20
+
+# Kesin eşleşme anahtar türleri
+KEY_KINDS = ('number', 'uuid', 'party')
+
+# Taraf elementleri (kökün doğrudan çocuğu) -> rol; tüm PartyIdentification/ID'ler anahtar olur
+PARTY_ROLES = {
+    CAC + 'AccountingSupplierParty': 'supplier',
+    CAC + 'AccountingCustomerParty': 'customer',
+    CAC + 'DespatchSupplierParty': 'supplier',
+    CAC + 'DeliveryCustomerParty': 'customer',
+    CAC + 'SenderParty': 'supplier',
+    CAC + 'ReceiverParty': 'customer',
+}
+_PARTY_ID = f'.//{CAC}PartyIdentification/{CBC}ID'
+# PartyName olmayan şahıs tarafları (TCKN'li alıcı, müstahsil) için ad + soyad
+_PERSON_NAMES = (f'.//{CAC}Person/{CBC}FirstName', f'.//{CAC}Person/{CBC}FamilyName')
+_ITEM_NAME = f'{CAC}Item/{CBC}Name'
+_ITEM_CODE = f'{CAC}Item/{CAC}SellersItemIdentification/{CBC}ID'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    type TEXT,
+    number TEXT,
+    uuid TEXT,
+    issue_date TEXT,
+    supplier_vkn TEXT,
+    supplier_name TEXT,
+    customer_vkn TEXT,
+    customer_name TEXT,
+    line_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS keys (
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    PRIMARY KEY (key, kind, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS keys_doc ON keys (doc);
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    parties, items, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+);
+"""
+
+# ============ TÜRKÇE KATLAMA ============
+_TR_UPPER = str.maketrans({'İ': 'i', 'I': 'ı'})
+_TR_BASE = str.maketrans({'ı': 'i', 'ş': 's', 'ğ': 'g', 'ü': 'u', 'ö': 'o', 'ç': 'c',
+                          'â': 'a', 'î': 'i', 'û': 'u'})
+
+
+def fold(text: str) -> str:
+    """Türkçe kurallarla küçült ve arama anahtarına indirge"""
+    return text.translate(_TR_UPPER).lower().translate(_TR_BASE)
+
+
+def normalize_key(value: str) -> str:
+    """Numara / ETTN / VKN kesin anahtarı (boşluksuz, büyük harf)"""
+    return re.sub(r'\s+', '', value).upper()
+
+
+# ============ BELGE OKUMA ============
+
+def read_fields(path: str) -> Dict[str, Any]:
+    """Tek geçişli iterparse ile aranacak alanları oku (kök çocukları kapandıkça bırakılır)"""
+    header: Dict[str, str] = {}
+    parties: Dict[str, List[str]] = {'supplier': [], 'customer': []}
+    items: List[str] = []
+    doc_type = None
+    root = None
+    depth = 0
+    line_count = 0
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            depth += 1
+            if root is None:
+                root = elem
+                doc_type = lookup_document_type(elem.tag)
+                if doc_type is None:
+                    raise ValueError(f"Desteklenmeyen kök: {elem.tag[elem.tag.rfind('}') + 1:]}")
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        if elem.tag == doc_type.line_tag:
+            line_count += 1
+            for target in (elem.find(_ITEM_NAME), elem.find(_ITEM_CODE)):
+                if target is not None and target.text and target.text.strip():
+                    items.append(target.text.strip())
+        else:
+            doc_type.read_header(elem, header)
+            role = PARTY_ROLES.get(elem.tag)
+            if role is not None:
+                parties[role].extend(t.text.strip() for t in elem.iterfind(_PARTY_ID) if t.text and t.text.strip())
+                if f'{role}_name' not in header:
+                    person = ' '.join(filter(None, ((elem.findtext(path) or '').strip() for path in _PERSON_NAMES)))
+                    if person:
+                        header[f'{role}_name'] = person
+        elem.clear()
+        del root[:]
+    return {'type': doc_type.name, 'header': header, 'parties': parties, 'items': items,
+            'line_count': line_count}
+
+
+def _read(path: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """İşçi: (dosya, alanlar, hata)"""
+    try:
+        return path, read_fields(path), None
+    except (ET.ParseError, ValueError, OSError) as e:
+        return path, None, str(e)
+
+
+# ============ İNDEKS ============
+
+class SearchIndex:
+    """SQLite FTS5 arama indeksi: toplu / artımlı ekleme ve sorgu"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _remove(self, doc_ids: List[int]):
+        rows = [(doc_id,) for doc_id in doc_ids]
+        self.conn.executemany('DELETE FROM keys WHERE doc = ?', rows)
+        self.conn.executemany('DELETE FROM search WHERE rowid = ?', rows)
+        self.conn.executemany('DELETE FROM documents WHERE id = ?', rows)
+
+    def _insert(self, path: str, stat: os.stat_result, fields: Dict[str, Any]):
+        header = fields['header']
+        cursor = self.conn.execute(
+            'INSERT INTO documents (file, size, mtime, type, number, uuid, issue_date, supplier_vkn, '
+            'supplier_name, customer_vkn, customer_name, line_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (path, stat.st_size, stat.st_mtime, fields['type'], header.get('id'), header.get('uuid'),
+             header.get('issue_date'), header.get('supplier_vkn', header.get('sender_vkn')),
+             header.get('supplier_name', header.get('sender_name')),
+             header.get('customer_vkn', header.get('receiver_vkn')),
+             header.get('customer_name', header.get('receiver_name')), fields['line_count']))
+        doc_id = cursor.lastrowid
+        keys = set()
+        if header.get('id'):
+            keys.add((normalize_key(header['id']), 'number'))
+        if header.get('uuid'):
+            keys.add((normalize_key(header['uuid']), 'uuid'))
+        for values in fields['parties'].values():
+            keys.update((normalize_key(value), 'party') for value in values)
+        self.conn.executemany('INSERT OR IGNORE INTO keys (key, kind, doc) VALUES (?, ?, ?)',
+                              [(key, kind, doc_id) for key, kind in keys])
+        names = [header.get(f) for f in ('supplier_name', 'customer_name', 'sender_name', 'receiver_name')]
+        self.conn.execute('INSERT INTO search (rowid, parties, items) VALUES (?, ?, ?)',
+                          (doc_id, fold(' '.join(n for n in names if n)), fold(' '.join(fields['items']))))
+
+    def add(self, files: Iterable[str], workers: int = 1, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+        """Yeni / değişmiş dosyaları toplu transaction'larla indeksle"""
+        known = {file: (doc_id, size, mtime) for doc_id, file, size, mtime
+                 in self.conn.execute('SELECT id, file, size, mtime FROM documents')}
+        stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'errors': 0}
+        pending = []
+        for path in expand_paths(files):
+            path = os.path.abspath(path)
+            stat = os.stat(path)
+            previous = known.get(path)
+            if previous is not None and previous[1] == stat.st_size and previous[2] == stat.st_mtime:
+                stats['unchanged'] += 1
+                continue
+            pending.append(path)
+
+        if workers <= 1 or len(pending) < 2:
+            results: Iterator = map(_read, pending)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(_read, pending, chunksize=max(1, -(-len(pending) // (workers * 4))))
+        try:
+            in_batch = 0
+            self.conn.execute('BEGIN')
+            for path, fields, error in results:
+                if error is not None:
+                    stats['errors'] += 1
+                    print(f"❌ {path}: {error}", file=sys.stderr)
+                    continue
+                previous = known.get(path)
+                if previous is not None:
+                    self._remove([previous[0]])
+                    stats['updated'] += 1
+                else:
+                    stats['added'] += 1
+                self._insert(path, os.stat(path), fields)
+                in_batch += 1
+                if in_batch >= batch_size:
+                    self.conn.execute('COMMIT')
+                    self.conn.execute('BEGIN')
+                    in_batch = 0
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return stats
+
+    def prune(self) -> int:
+        """Diskten silinmiş dosyaların kayıtlarını kaldır"""
+        missing = [doc_id for doc_id, file in self.conn.execute('SELECT id, file FROM documents')
+                   if not os.path.exists(file)]
+        with self.conn:
+            self._remove(missing)
+        return len(missing)
+
+    # ---------- sorgu ----------
+
+    def _documents(self, doc_ids: List[int]) -> List[Dict[str, Any]]:
+        if not doc_ids:
+            return []
+        self.conn.row_factory = sqlite3.Row
+        try:
+            rows = self.conn.execute(
+                f"SELECT * FROM documents WHERE id IN ({','.join('?' * len(doc_ids))})", doc_ids).fetchall()
+        finally:
+            self.conn.row_factory = None
+        by_id = {row['id']: dict(row) for row in rows}
+        return [by_id[doc_id] for doc_id in doc_ids if doc_id in by_id]
+
+    def lookup(self, value: str, kind: Optional[str] = None, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        """Numara / ETTN / VKN kesin eşleşmesi"""
+        key = normalize_key(value)
+        if kind:
+            rows = self.conn.execute('SELECT doc FROM keys WHERE key = ? AND kind = ? LIMIT ?', (key, kind, limit))
+        else:
+            rows = self.conn.execute('SELECT DISTINCT doc FROM keys WHERE key = ? LIMIT ?', (key, limit))
+        return self._documents([doc for doc, in rows])
+
+    def search(self, text: str, column: Optional[str] = None, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        """Firma / kalem adı parçası (tüm kelimeler, AND); en yeni kayıtlar önce
+
+        Kademeli: önce tüm kelimeler tam, sonra son kelime önek (yazarken arama),
+        yalnızca bunlar boş dönerse tüm kelimeler önek olarak aranır. Sık geçen bir
+        kelimenin önek taraması yüz binlerce doclist'i birleştirdiğinden ucuz
+        kademeler limit dolduğunda sonrakiler çalıştırılmaz.
+        """
+        terms = re.findall(r'\w+', fold(text))
+        if not terms:
+            return []
+        stages = [[f'"{term}"' for term in terms],
+                  [f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'],
+                  [f'"{term}"*' for term in terms]]
+        found: List[int] = []
+        seen = set()
+        for stage, parts in enumerate(stages):
+            if len(found) >= limit or (stage == 2 and found):
+                break
+            match = ' AND '.join(parts)
+            if column:
+                match = f'{column} : ({match})'
+            for doc, in self.conn.execute('SELECT rowid FROM search WHERE search MATCH ? ORDER BY rowid DESC LIMIT ?',
+                                          (match, limit + len(found))):
+                if doc not in seen and len(found) < limit:
+                    seen.add(doc)
+                    found.append(doc)
+        return self._documents(found)
+
+    def find(self, query: str, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+        """Önce kesin anahtar, bulunamazsa tam metin araması"""
+        if not re.search(r'\s', query.strip()):
+            hits = self.lookup(query, limit=limit)
+            if hits:
+                return hits
+        return self.search(query, limit=limit)
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fatura numarası / ETTN / VKN / ad ile yerel arama indeksi')
+    parser.add_argument('--db', default='invoice_search.db', help='SQLite veritabanı')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    add = sub.add_parser('add', help='Dosyaları indeksle (artımlı)')
+    add.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml',
+                                                  'scripts/invoice_skr2026000000187.xml'])
+    add.add_argument('--workers', type=int, default=1)
+    add.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Transaction başına belge')
+    add.add_argument('--prune', action='store_true', help='Silinmiş dosyaların kayıtlarını da kaldır')
+
+    find = sub.add_parser('find', help='Ara (numara / ETTN / VKN ya da ad parçası)')
+    find.add_argument('query')
+    find.add_argument('--kind', choices=KEY_KINDS, help='Yalnızca bu anahtar türünde kesin ara')
+    find.add_argument('--in', dest='column', choices=('parties', 'items'), help='Yalnızca bu metin alanında ara')
+    find.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    with SearchIndex(args.db) as index:
+        started = time.perf_counter()
+        if args.command == 'add':
+            stats = index.add(args.files, args.workers, args.batch_size)
+            pruned = index.prune() if args.prune else 0
+            print(f"📥 {stats['added']:,} eklendi, {stats['updated']:,} güncellendi, {stats['unchanged']:,} değişmemiş, "
+                  f"{pruned:,} silindi, {stats['errors']} hata ({time.perf_counter() - started:.2f} sn)")
+            print(f"📚 {index.count():,} belge: {args.db}")
+            return
+
+        if args.kind:
+            hits = index.lookup(args.query, args.kind, args.limit)
+        elif args.column:
+            hits = index.search(args.query, args.column, args.limit)
+        else:
+            hits = index.find(args.query, args.limit)
+        elapsed = time.perf_counter() - started
+        print(f"🔎 '{args.query}': {len(hits)} sonuç ({elapsed * 1000:.2f} ms)")
+        for doc in hits:
+            print(f"  {doc['type']} {doc['number'] or '-'} {doc['issue_date'] or ''} ETTN {doc['uuid'] or '-'}")
+            print(f"      {doc['supplier_vkn'] or ''} {doc['supplier_name'] or ''} -> "
+                  f"{doc['customer_vkn'] or ''} {doc['customer_name'] or ''}")
+            print(f"      {doc['file']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+XMLDSig / XAdES İmza Bilgisi Çıkarıcı
+ds:Signature ve xades:SignedProperties bloklarını, faturanın geri kalanını
+okuyan aynı iterparse geçişinde namespace URI'sine göre (prefix'ten bağımsız)
+toplar; belge metni üzerinde ikinci bir regex taraması yapılmaz.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Optional
+
+DS_NS = 'http://www.w3.org/2000/09/xmldsig#'
+# XAdES 1.3.2 ve 1.4.1 aynı kök altında
+XADES_NS_PREFIX = 'http://uri.etsi.org/01903/'
+
+# Metni doğrudan sonuca yazılan ds elementleri
+DS_TEXT_FIELDS = {
+    'SignatureValue': 'signature_value',
+    'X509SubjectName': 'certificate_subject',
+    'X509IssuerName': 'certificate_issuer',
+    'X509SerialNumber': 'certificate_serial',
+}
+
+
+def split_tag(tag: str):
+    """'{uri}Local' -> ('uri', 'Local')"""
+    if tag[:1] == '{':
+        uri, _, local = tag[1:].partition('}')
+        return uri, local
+    return '', tag
+
+
+def _compact(text: Optional[str]) -> str:
+    """Base64 / sayı metinlerindeki satır sonu ve boşlukları at"""
+    return ''.join((text or '').split())
+
+
+class SignatureExtractor:
+    """iterparse start/end olaylarından ilk ds:Signature bloğunun bilgilerini topla"""
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.done = False
+        self._depth = 0
+        self._reference: Optional[Dict[str, Any]] = None
+        self._cert_digest: Optional[Dict[str, str]] = None
+
+    def start(self, elem):
+        if self.done:
+            return
+        uri, local = split_tag(elem.tag)
+        if not self._depth:
+            if uri == DS_NS and local == 'Signature':
+                self._depth = 1
+                self.data['ds_signature_id'] = elem.get('Id', '')
+                self.data['references'] = []
+                self.data['digest_values'] = []
+            return
+        self._depth += 1
+
+        if uri == DS_NS:
+            if local == 'CanonicalizationMethod':
+                self.data['canonicalization_algorithm'] = elem.get('Algorithm', '')
+            elif local == 'SignatureMethod':
+                self.data['algorithm'] = elem.get('Algorithm', '')
+            elif local == 'Reference' and self._cert_digest is None:
+                self._reference = {
+                    'id': elem.get('Id', ''),
+                    'uri': elem.get('URI', ''),
+                    'type': elem.get('Type', ''),
+                    'transforms': [],
+                    'digest_algorithm': '',
+                    'digest_value': '',
+                }
+            elif local == 'Transform' and self._reference is not None:
+                self._reference['transforms'].append(elem.get('Algorithm', ''))
+            elif local == 'DigestMethod':
+                target = self._cert_digest if self._cert_digest is not None else self._reference
+                if target is not None:
+                    target['digest_algorithm'] = elem.get('Algorithm', '')
+        elif uri.startswith(XADES_NS_PREFIX):
+            if local == 'SignedProperties':
+                self.data['signed_properties_id'] = elem.get('Id', '')
+            elif local == 'CertDigest':
+                self._cert_digest = {'digest_algorithm': '', 'digest_value': ''}
+
+    def end(self, elem):
+        if not self._depth:
+            return
+        self._depth -= 1
+        uri, local = split_tag(elem.tag)
+
+        if uri == DS_NS:
+            if local == 'DigestValue':
+                value = _compact(elem.text)
+                self.data['digest_values'].append(value)
+                target = self._cert_digest if self._cert_digest is not None else self._reference
+                if target is not None:
+                    target['digest_value'] = value
+            elif local == 'Reference' and self._reference is not None:
+                self.data['references'].append(self._reference)
+                self._reference = None
+            elif local == 'X509Certificate':
+                self.data.setdefault('certificate', _compact(elem.text))
+            elif local in DS_TEXT_FIELDS:
+                text = (elem.text or '').strip()
+                if local == 'SignatureValue':
+                    text = _compact(text)
+                self.data.setdefault(DS_TEXT_FIELDS[local], text)
+            elif local == 'Signature' and not self._depth:
+                self.done = True
+        elif uri.startswith(XADES_NS_PREFIX):
+            if local == 'SigningTime':
+                self.data['signing_time'] = (elem.text or '').strip()
+            elif local == 'CertDigest':
+                self.data.setdefault('certificate_digest', self._cert_digest)
+                self._cert_digest = None
+
+
+def extract_signature(source) -> Dict[str, Any]:
+    """Sadece imza bloğunu oku; ds:Signature kapanınca okumayı bırakır
+
+    UBL'de imza UBLExtensions içinde, satırlardan önce geldiği için büyük
+    faturalarda dosyanın yalnızca başı okunur.
+    """
+    extractor = SignatureExtractor()
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            extractor.start(elem)
+        else:
+            extractor.end(elem)
+            if extractor.done:
+                break
+    return extractor.data
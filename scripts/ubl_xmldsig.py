@@ -0,0 +1,614 @@
+#!/usr/bin/env python3
+"""
+XMLDSig Özet (Digest) Doğrulayıcı
+İlk ds:Signature bloğundaki ds:Reference özetlerini ağ erişimi olmadan yerelde
+doğrular. Referans verilen düğüm kümeleri (URI="" + enveloped-signature ile tüm
+fatura, "#Id" ile xades:SignedProperties) tek bir expat geçişinde
+kanonikleştirilir; kanonik çıktı tek bir büyük string oluşturulmadan parça parça
+hashlib'e akıtılır.
+
+Desteklenen dönüşümler: C14N 1.0 / 1.1 (inclusive), Exclusive C14N (PrefixList
+dahil), enveloped-signature ve not(ancestor-or-self::ds:Signature) XPath filtresi.
+SignatureValue kriptografik olarak doğrulanmaz; yalnızca referans özetleri
+kontrol edilir.
+"""
+
+import argparse
+import base64
+import hashlib
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+from xml.parsers import expat
+
+DS_NS = 'http://www.w3.org/2000/09/xmldsig#'
+EXC_C14N_NS = 'http://www.w3.org/2001/10/xml-exc-c14n#'
+XML_NS = 'http://www.w3.org/XML/1998/namespace'
+
+# Özet algoritması URI -> hashlib adı
+DIGEST_ALGORITHMS = {
+    'http://www.w3.org/2000/09/xmldsig#sha1': 'sha1',
+    'http://www.w3.org/2001/04/xmldsig-more#sha224': 'sha224',
+    'http://www.w3.org/2001/04/xmlenc#sha256': 'sha256',
+    'http://www.w3.org/2001/04/xmldsig-more#sha256': 'sha256',
+    'http://www.w3.org/2001/04/xmldsig-more#sha384': 'sha384',
+    'http://www.w3.org/2001/04/xmlenc#sha384': 'sha384',
+    'http://www.w3.org/2001/04/xmlenc#sha512': 'sha512',
+    'http://www.w3.org/2001/04/xmldsig-more#sha512': 'sha512',
+}
+
+# Kanonikleme algoritmaları (yorumlar aynı belge referanslarında zaten dışarıda kalır)
+C14N_10 = {
+    'http://www.w3.org/TR/2001/REC-xml-c14n-20010315',
+    'http://www.w3.org/TR/2001/REC-xml-c14n-20010315#WithComments',
+}
+C14N_11 = {
+    'http://www.w3.org/2006/12/xml-c14n11',
+    'http://www.w3.org/2006/12/xml-c14n11#WithComments',
+}
+C14N_EXCLUSIVE = {EXC_C14N_NS, EXC_C14N_NS + 'WithComments'}
+
+TRANSFORM_ENVELOPED = DS_NS + 'enveloped-signature'
+TRANSFORM_XPATH = 'http://www.w3.org/TR/1999/REC-xpath-19991116'
+
+# ds:Signature işaretleri (start olayı ile taşınır)
+MARK_SIGNATURE = 1     # herhangi bir ds:Signature
+MARK_OWN = 2           # doğrulanan (ilk) ds:Signature
+
+# Kanonik parçalar bu sayıya ulaşınca hash'e aktarılır
+FLUSH_PARTS = 4096
+# İmza bu kadar olaydan sonra gelirse kayıt bırakılır, ikinci geçiş yapılır
+RECORD_LIMIT = 200000
+
+
+def _escape_text(s: str) -> str:
+    if '&' in s:
+        s = s.replace('&', '&amp;')
+    if '<' in s:
+        s = s.replace('<', '&lt;')
+    if '>' in s:
+        s = s.replace('>', '&gt;')
+    if '\r' in s:
+        s = s.replace('\r', '&#xD;')
+    return s
+
+
+def _escape_attr(s: str) -> str:
+    if '&' in s:
+        s = s.replace('&', '&amp;')
+    if '<' in s:
+        s = s.replace('<', '&lt;')
+    if '"' in s:
+        s = s.replace('"', '&quot;')
+    if '\t' in s:
+        s = s.replace('\t', '&#x9;')
+    if '\n' in s:
+        s = s.replace('\n', '&#xA;')
+    if '\r' in s:
+        s = s.replace('\r', '&#xD;')
+    return s
+
+
+def _resolve(qname: str, ns: Dict[str, str]):
+    """'ds:Reference' -> (namespace URI, 'Reference')"""
+    prefix, _, local = qname.rpartition(':')
+    return ns.get(prefix, ''), local
+
+
+class _CanonicalWriter:
+    """Bir referansın düğüm kümesini kanonikleştirip hash nesnesine akıtır"""
+
+    def __init__(self, hasher, exclusive: bool = False, prefixes: Iterable[str] = (),
+                 target_id: Optional[str] = None, exclude: int = 0, inherit_xml: bool = True):
+        self.hasher = hasher
+        self.exclusive = exclusive
+        self.prefixes = tuple(prefixes)
+        self.target_id = target_id          # None: tüm belge
+        self.exclude = exclude              # 0 / MARK_OWN / MARK_SIGNATURE
+        self.inherit_xml = inherit_xml and not exclusive
+        self.active = target_id is None
+        self.found = self.active
+        self.after_root = False
+        self.skip = 0
+        # (in-scope namespace map, yazılmış namespace'ler) yığını
+        self.stack = [(None, {})]
+        self.parts: List[str] = []
+
+    def flush(self):
+        if self.parts:
+            self.hasher.update(''.join(self.parts).encode('utf-8'))
+            self.parts.clear()
+
+    def start(self, qname, attrs, ns, xml_attrs, mark):
+        if self.skip:
+            self.skip += 1
+            return
+        apex = False
+        if not self.active:
+            if self.found or not attrs or self.target_id not in (
+                    attrs.get('Id'), attrs.get('ID'), attrs.get('id')):
+                return
+            self.active = self.found = apex = True
+        if self.exclude and mark >= self.exclude:
+            self.skip = 1
+            return
+
+        parent_ns, rendered = self.stack[-1]
+        decls = None
+        if self.exclusive:
+            used = [qname.rpartition(':')[0]]
+            for name in attrs:
+                if ':' in name:
+                    prefix = name.partition(':')[0]
+                    if prefix != 'xml' and prefix not in used:
+                        used.append(prefix)
+            for prefix in self.prefixes:
+                if prefix not in used and (prefix == '' or prefix in ns):
+                    used.append(prefix)
+            for prefix in used:
+                uri = ns.get(prefix, '')
+                if rendered.get(prefix, '') != uri:
+                    decls = decls or []
+                    decls.append((prefix, uri))
+        elif ns is not parent_ns:
+            for prefix, uri in ns.items():
+                if rendered.get(prefix, '') != uri:
+                    decls = decls or []
+                    decls.append((prefix, uri))
+            if '' not in ns and rendered.get('', ''):
+                decls = decls or []
+                decls.append(('', ''))
+
+        if decls:
+            rendered = dict(rendered)
+            rendered.update(decls)
+        self.stack.append((ns, rendered))
+
+        if not (decls or attrs or (apex and self.inherit_xml and xml_attrs)):
+            self.parts.append('<' + qname + '>')
+            return
+
+        text = '<' + qname
+        if decls:
+            decls.sort()
+            for prefix, uri in decls:
+                text += (f' xmlns:{prefix}="' if prefix else ' xmlns="') + _escape_attr(uri) + '"'
+        if attrs or (apex and self.inherit_xml and xml_attrs):
+            items = []
+            for name, value in attrs.items():
+                if ':' in name:
+                    prefix, _, local = name.partition(':')
+                    items.append(((XML_NS if prefix == 'xml' else ns.get(prefix, ''), local), name, value))
+                else:
+                    items.append((('', name), name, value))
+            if apex and self.inherit_xml:
+                for name, value in xml_attrs.items():
+                    if name not in attrs:
+                        items.append(((XML_NS, name[4:]), name, value))
+            items.sort()
+            for _, name, value in items:
+                text += f' {name}="' + _escape_attr(value) + '"'
+        self.parts.append(text + '>')
+        if len(self.parts) >= FLUSH_PARTS:
+            self.flush()
+
+    def end(self, qname):
+        if self.skip:
+            self.skip -= 1
+            return
+        if not self.active:
+            return
+        self.parts.append('</' + qname + '>')
+        self.stack.pop()
+        if len(self.stack) == 1:
+            if self.target_id is None:
+                self.after_root = True
+            else:
+                self.active = False
+
+    def text(self, data):
+        if self.active and not self.skip and len(self.stack) > 1:
+            self.parts.append(_escape_text(data))
+
+    def pi(self, target, data):
+        if not self.active or self.skip:
+            return
+        text = f'<?{target} {data}?>' if data else f'<?{target}?>'
+        if len(self.stack) > 1:
+            self.parts.append(text)
+        elif self.target_id is None:
+            # Belge elementi dışındaki PI'lar satır sonu ile ayrılır
+            self.parts.append('\n' + text if self.after_root else text + '\n')
+
+
+class _Reference:
+    """SignedInfo içindeki bir ds:Reference ve doğrulama durumu"""
+
+    def __init__(self, uri: str, ref_id: str):
+        self.uri = uri
+        self.id = ref_id
+        self.transforms: List[List[Any]] = []   # [algorithm, prefix_list, xpath]
+        self.digest_algorithm = ''
+        self.digest_value = ''
+        self.writer: Optional[_CanonicalWriter] = None
+        self.status = ''
+        self.detail = ''
+
+    def make_writer(self) -> Optional[_CanonicalWriter]:
+        """Dönüşüm zincirine göre kanonik yazıcıyı kur; desteklenmiyorsa None"""
+        hash_name = DIGEST_ALGORITHMS.get(self.digest_algorithm)
+        if hash_name is None:
+            return self._unsupported(f"özet algoritması: {self.digest_algorithm}")
+
+        exclusive, prefixes, exclude, inherit_xml = False, (), 0, True
+        for algorithm, prefix_list, xpath in self.transforms:
+            if algorithm == TRANSFORM_ENVELOPED:
+                exclude = exclude or MARK_OWN
+            elif algorithm == TRANSFORM_XPATH and xpath and \
+                    'ancestor-or-self::' in xpath and 'Signature' in xpath and 'not(' in xpath:
+                exclude = MARK_SIGNATURE
+            elif algorithm in C14N_10 or algorithm in C14N_11:
+                exclusive, inherit_xml = False, algorithm in C14N_10
+            elif algorithm in C14N_EXCLUSIVE:
+                exclusive = True
+                prefixes = tuple('' if p == '#default' else p for p in (prefix_list or '').split())
+            else:
+                return self._unsupported(f"dönüşüm: {algorithm}")
+
+        uri = self.uri
+        if uri == '':
+            target_id = None
+        elif uri.startswith("#xpointer(id(") and uri.endswith('))'):
+            target_id = uri[13:-2].strip('\'"')
+        elif uri.startswith('#') and '(' not in uri:
+            target_id = uri[1:]
+        else:
+            return self._unsupported(f"harici/desteklenmeyen URI: {uri}")
+
+        self.writer = _CanonicalWriter(hashlib.new(hash_name), exclusive, prefixes,
+                                       target_id, exclude, inherit_xml)
+        return self.writer
+
+    def _unsupported(self, detail: str):
+        self.status = 'unsupported'
+        self.detail = detail
+        return None
+
+    def finish(self):
+        if self.writer is None:
+            return
+        self.writer.flush()
+        if not self.writer.found:
+            self.status = 'not_found'
+            self.detail = f"Id bulunamadı: {self.writer.target_id}"
+            return
+        computed = base64.b64encode(self.writer.hasher.digest()).decode('ascii')
+        self.detail = computed
+        self.status = 'ok' if computed == self.digest_value else 'mismatch'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'uri': self.uri,
+            'digest_algorithm': self.digest_algorithm,
+            'expected': self.digest_value,
+            'computed': self.detail if self.status in ('ok', 'mismatch') else '',
+            'status': self.status,
+            'detail': '' if self.status in ('ok', 'mismatch') else self.detail,
+        }
+
+
+class _Pass:
+    """Tek expat geçişi: imza bloğunu okur, referans yazıcılarını besler"""
+
+    def __init__(self, references: Optional[List[_Reference]] = None):
+        self.ns_stack: List[Dict[str, str]] = [{}]
+        self.xml_stack: List[Dict[str, str]] = [{}]
+        self.signature_state = 0        # 0: görülmedi, 1: içinde, 2: kapandı
+        self.signature_depth = 0
+        self.signature_id = ''
+        self.writers: List[_CanonicalWriter] = []
+        self.collect = references is None
+        self.references: List[_Reference] = references or []
+        self.recording: Optional[List[tuple]] = [] if self.collect else None
+        self.need_second_pass = False
+        # SignedInfo okuma durumu
+        self._in_signed_info = False
+        self._reference: Optional[_Reference] = None
+        self._capture: Optional[List[str]] = None
+        self._parser = None
+        if not self.collect:
+            self._start_writers()
+
+    def _make_parser(self):
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        parser.buffer_size = 1 << 16
+        parser.StartElementHandler = self._start
+        parser.EndElementHandler = self._end
+        parser.CharacterDataHandler = self._text
+        parser.ProcessingInstructionHandler = self._pi
+        return parser
+
+    def run(self, stream):
+        self._make_parser().ParseFile(stream)
+
+    def feed(self, data: bytes, final: bool = False):
+        """Başka bir okuyucunun okuduğu baytları parça parça işle"""
+        if self._parser is None:
+            self._parser = self._make_parser()
+        self._parser.Parse(data, final)
+
+    def _start_writers(self):
+        for ref in self.references:
+            writer = ref.make_writer()
+            if writer is not None:
+                self.writers.append(writer)
+
+    def _signed_info_done(self):
+        if self.recording is None:
+            # İmza çok geç geldi; referanslar biliniyor, ikinci geçişte hesaplanacak
+            self.need_second_pass = True
+            return
+        self._start_writers()
+        events, self.recording = self.recording, None
+        for writer in self.writers:
+            for event in events:
+                kind = event[0]
+                if kind == 0:
+                    writer.start(*event[1:])
+                elif kind == 1:
+                    writer.end(event[1])
+                elif kind == 2:
+                    writer.text(event[1])
+                else:
+                    writer.pi(event[1], event[2])
+
+    def _start(self, qname, attrs):
+        ns = self.ns_stack[-1]
+        xml_attrs = self.xml_stack[-1]
+        if attrs:
+            for name in attrs:
+                if name[:5] == 'xmlns' or name[:4] == 'xml:':
+                    break
+            else:
+                name = None
+            if name is not None:
+                plain = {}
+                for name, value in attrs.items():
+                    if name == 'xmlns' or name[:6] == 'xmlns:':
+                        if ns is self.ns_stack[-1]:
+                            ns = dict(ns)
+                        ns[name[6:]] = value
+                    else:
+                        plain[name] = value
+                        if name[:4] == 'xml:':
+                            if xml_attrs is self.xml_stack[-1]:
+                                xml_attrs = dict(xml_attrs)
+                            xml_attrs[name] = value
+                attrs = plain
+
+        mark = 0
+        if qname[-9:] == 'Signature' and (len(qname) == 9 or qname[-10] == ':'):
+            if ns.get(qname[:-10], '') == DS_NS:
+                mark = MARK_SIGNATURE
+                if not self.signature_state:
+                    mark = MARK_OWN
+                    self.signature_state = 1
+                    self.signature_depth = len(self.ns_stack)
+                    self.signature_id = attrs.get('Id', '')
+
+        if self.signature_state == 1 and self.collect:
+            self._collect_start(qname, attrs, ns)
+
+        if self.recording is not None:
+            self.recording.append((0, qname, attrs, ns, xml_attrs, mark))
+            if len(self.recording) > RECORD_LIMIT:
+                self.recording = None
+        for writer in self.writers:
+            writer.start(qname, attrs, ns, xml_attrs, mark)
+
+        self.ns_stack.append(ns)
+        self.xml_stack.append(xml_attrs)
+
+    def _end(self, qname):
+        ns = self.ns_stack.pop()
+        self.xml_stack.pop()
+        if self.recording is not None:
+            self.recording.append((1, qname))
+        for writer in self.writers:
+            writer.end(qname)
+        if self.signature_state == 1:
+            if self.collect:
+                self._collect_end(qname, ns)
+            if len(self.ns_stack) == self.signature_depth:
+                self.signature_state = 2
+
+    def _text(self, data):
+        if self._capture is not None:
+            self._capture.append(data)
+        if self.recording is not None:
+            self.recording.append((2, data))
+        for writer in self.writers:
+            writer.text(data)
+
+    def _pi(self, target, data):
+        if self.recording is not None:
+            self.recording.append((3, target, data))
+        for writer in self.writers:
+            writer.pi(target, data)
+
+    # ============ SIGNEDINFO OKUMA ============
+    def _collect_start(self, qname, attrs, ns):
+        uri, local = _resolve(qname, ns)
+        if uri == DS_NS:
+            if local == 'SignedInfo' and not self.references:
+                self._in_signed_info = True
+            elif not self._in_signed_info:
+                return
+            elif local == 'Reference':
+                self._reference = _Reference(attrs.get('URI', ''), attrs.get('Id', ''))
+            elif self._reference is None:
+                return
+            elif local == 'Transform':
+                self._reference.transforms.append([attrs.get('Algorithm', ''), None, None])
+            elif local == 'DigestMethod':
+                self._reference.digest_algorithm = attrs.get('Algorithm', '')
+            elif local in ('DigestValue', 'XPath'):
+                self._capture = []
+        elif uri == EXC_C14N_NS and local == 'InclusiveNamespaces':
+            if self._reference is not None and self._reference.transforms:
+                self._reference.transforms[-1][1] = attrs.get('PrefixList', '')
+
+    def _collect_end(self, qname, ns):
+        if not self._in_signed_info:
+            return
+        uri, local = _resolve(qname, ns)
+        if uri != DS_NS:
+            return
+        if local == 'DigestValue' and self._reference is not None:
+            self._reference.digest_value = ''.join(''.join(self._capture or ()).split())
+            self._capture = None
+        elif local == 'XPath' and self._reference is not None and self._reference.transforms:
+            self._reference.transforms[-1][2] = ''.join(self._capture or ()).strip()
+            self._capture = None
+        elif local == 'Reference' and self._reference is not None:
+            self.references.append(self._reference)
+            self._reference = None
+        elif local == 'SignedInfo':
+            self._in_signed_info = False
+            self._signed_info_done()
+
+
+def verify_digests(path: str) -> Dict[str, Any]:
+    """Dosyadaki ilk ds:Signature'ın tüm referans özetlerini doğrula"""
+    first = _Pass()
+    try:
+        with open(path, 'rb') as f:
+            first.run(f)
+    except (expat.ExpatError, OSError) as e:
+        return _result(path, first, str(e))
+    return _result(path, first)
+
+
+class DigestVerifier:
+    """Dosyayı okuyan başka bir parser'ın baytlarıyla beslenen doğrulayıcı
+
+    tee() ile sarılan akıştan okunan her parça aynı anda expat'e de verilir;
+    böylece ET ağacı ve özet doğrulaması dosyanın tek okumasından çıkar. İmza
+    RECORD_LIMIT olaydan sonra gelirse (nadir) close() dosyayı bir kez daha okur.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pass = _Pass()
+        self._error: Optional[str] = None
+
+    def feed(self, data: bytes):
+        if self._error is None and data:
+            try:
+                self._pass.feed(data)
+            except expat.ExpatError as e:
+                self._error = str(e)
+
+    def tee(self, stream) -> '_TeeReader':
+        """read() ile okunan baytları doğrulayıcıya da aktaran sarmalayıcı"""
+        return _TeeReader(stream, self.feed)
+
+    def close(self) -> Dict[str, Any]:
+        """Beslemeyi bitir ve verify_digests ile aynı biçimde sonuç döndür"""
+        if self._error is None:
+            try:
+                self._pass.feed(b'', final=True)
+            except expat.ExpatError as e:
+                self._error = str(e)
+        return _result(self.path, self._pass, self._error)
+
+
+class _TeeReader:
+    def __init__(self, stream, sink):
+        self._stream = stream
+        self._sink = sink
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._sink(data)
+        return data
+
+
+def _result(path: str, first: _Pass, error: Optional[str] = None) -> Dict[str, Any]:
+    """İlk geçişten (gerekirse ikinci geçişle) sonuç sözlüğü"""
+    result = {'file': str(path), 'signed': False, 'signature_id': '', 'valid': False, 'references': []}
+    current = first
+    if error is None and first.need_second_pass:
+        current = _Pass(first.references)
+        try:
+            with open(path, 'rb') as f:
+                current.run(f)
+        except (expat.ExpatError, OSError) as e:
+            error = str(e)
+    if error is not None:
+        result['error'] = error
+        return result
+
+    references = current.references
+    for ref in references:
+        ref.finish()
+    result['signed'] = bool(first.signature_state)
+    result['signature_id'] = first.signature_id
+    result['references'] = [ref.to_dict() for ref in references]
+    result['valid'] = bool(references) and all(ref.status == 'ok' for ref in references)
+    return result
+
+
+def _verify_chunk(paths: List[str]) -> List[Dict[str, Any]]:
+    return [verify_digests(p) for p in paths]
+
+
+def verify_files(paths: Iterable[str], workers: int = 1) -> List[Dict[str, Any]]:
+    """Birden çok dosyayı doğrula (opsiyonel process havuzu ile)"""
+    paths = [str(p) for p in paths]
+    if workers <= 1 or len(paths) < 2:
+        return _verify_chunk(paths)
+    chunk_size = max(1, -(-len(paths) // (workers * 4)))
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [r for chunk in pool.map(_verify_chunk, chunks) for r in chunk]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='XMLDSig referans özeti doğrulama (offline)')
+    parser.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml'])
+    parser.add_argument('--workers', type=int, default=1, help='Paralel process sayısı')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = verify_files(args.files, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    failed = 0
+    for result in results:
+        if result.get('error'):
+            failed += 1
+            print(f"❌ {result['file']}: {result['error']}")
+            continue
+        if not result['signed']:
+            print(f"⚪ {result['file']}: imza yok")
+            continue
+        if not result['valid']:
+            failed += 1
+        print(f"{'✅' if result['valid'] else '❌'} {result['file']} ({result['signature_id']})")
+        for ref in result['references']:
+            mark = {'ok': '✓', 'mismatch': '✗'}.get(ref['status'], '?')
+            print(f"   {mark} URI=\"{ref['uri']}\" {ref['digest_algorithm'].rsplit('#', 1)[-1]}"
+                  f" {ref['status']} {ref['detail']}".rstrip())
+
+    rate = len(results) / elapsed if elapsed else 0
+    print(f"\n📊 {len(results)} dosya, {elapsed:.3f} sn ({rate:.0f} dosya/sn)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
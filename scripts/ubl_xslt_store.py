@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Gömülü XSLT / Ek Dosya Deposu (İçerik Adresli)
+cbc:EmbeddedDocumentBinaryObject içindeki base64 içeriği (görselleştirme
+XSLT'si vb.) akış halinde okur ve SHA-256 ile adreslenen bir depoya bir kez
+yazar. Fatura kaydında yalnızca hash referansı tutulur.
+
+Base64 metni önce (boşluklar atılarak) hash'lenir; aynı metin daha önce
+görüldüyse içerik hiç çözülmez. Yeni metinler parça parça (4 karakter
+hizalı) çözülüp doğrudan depoya akıtılır.
+"""
+
+import argparse
+import binascii
+import hashlib
+import io
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+from xml.parsers import expat
+
+CBC_NS = 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2'
+BINARY_OBJECT = CBC_NS + ' EmbeddedDocumentBinaryObject'
+
+# XSLT olarak kabul edilen dosya uzantıları
+XSLT_EXTENSIONS = ('.xslt', '.xsl')
+
+# Çözme blok boyutu (4'ün katı olmalı)
+DECODE_BLOCK = 1 << 16
+# Bu boyutu aşan base64 metin geçici dosyaya taşar
+SPOOL_LIMIT = 4 << 20
+
+
+class AttachmentStore:
+    """SHA-256 adresli nesne deposu + base64 metin hash -> içerik hash takma adları"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.index_path = os.path.join(root, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.aliases: Dict[str, str] = {}
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.aliases = index.get('aliases', {})
+            self.objects = index.get('objects', {})
+        self.decoded = 0
+        self.reused = 0
+
+    def path(self, content_hash: str) -> str:
+        return os.path.join(self.objects_dir, content_hash[:2], content_hash)
+
+    def exists(self, content_hash: str) -> bool:
+        return content_hash in self.objects and os.path.exists(self.path(content_hash))
+
+    def read(self, content_hash: str) -> bytes:
+        with open(self.path(content_hash), 'rb') as f:
+            return f.read()
+
+    def add_base64(self, spool, text_hash: str, filename: str = '', mime_code: str = '') -> Optional[str]:
+        """Boşluksuz base64 içeren dosya nesnesini depoya ekle; içerik hash'ini döndür"""
+        content_hash = self.aliases.get(text_hash)
+        if content_hash is not None and self.exists(content_hash):
+            self.reused += 1
+            return content_hash
+
+        spool.seek(0)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    block = spool.read(DECODE_BLOCK)
+                    if not block:
+                        break
+                    data = binascii.a2b_base64(block)
+                    hasher.update(data)
+                    out.write(data)
+                    size += len(data)
+            content_hash = hasher.hexdigest()
+            target = self.path(content_hash)
+            if os.path.exists(target):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+        except binascii.Error:
+            os.remove(tmp_path)
+            return None
+
+        self.decoded += 1
+        self.aliases[text_hash] = content_hash
+        self.objects.setdefault(content_hash, {'size': size, 'filename': filename, 'mime_code': mime_code})
+        return content_hash
+
+    def add_text(self, text: str, filename: str = '', mime_code: str = '') -> Optional[str]:
+        """Bellekteki base64 metni (ör. ağaçtan okunan element metni) depoya ekle"""
+        try:
+            compact = ''.join(text.split()).encode('ascii')
+        except UnicodeEncodeError:
+            # base64 dışı (ASCII olmayan) karakter: binascii.Error gibi geçersiz ek
+            return None
+        return self.add_base64(io.BytesIO(compact), hashlib.sha256(compact).hexdigest(), filename, mime_code)
+
+    def merge(self, aliases: Dict[str, str], objects: Dict[str, Dict[str, Any]]):
+        """Başka bir süreçte eklenen takma ad / nesne kayıtlarını birleştir"""
+        self.aliases.update(aliases)
+        for content_hash, info in objects.items():
+            self.objects.setdefault(content_hash, info)
+
+    def save(self):
+        """Takma ad ve nesne indeksini diske yaz"""
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'aliases': self.aliases, 'objects': self.objects}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+
+class _AttachmentReader:
+    """expat olaylarından EmbeddedDocumentBinaryObject metnini akış halinde depoya yaz"""
+
+    def __init__(self, store: AttachmentStore):
+        self.store = store
+        self.records: List[Dict[str, Any]] = []
+        self._spool = None
+        self._text_hasher = None
+        self._attrs: Dict[str, str] = {}
+        self._invalid = False
+
+    def start(self, name, attrs):
+        if name == BINARY_OBJECT:
+            self._spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT)
+            self._text_hasher = hashlib.sha256()
+            self._attrs = attrs
+            self._invalid = False
+
+    def text(self, data):
+        if self._spool is not None and not self._invalid:
+            try:
+                chunk = ''.join(data.split()).encode('ascii')
+            except UnicodeEncodeError:
+                # ASCII olmayan karakter base64 olamaz; ek geçersiz sayılır (sha256 = None)
+                self._invalid = True
+                return
+            self._text_hasher.update(chunk)
+            self._spool.write(chunk)
+
+    def end(self, name):
+        if name != BINARY_OBJECT or self._spool is None:
+            return
+        filename = self._attrs.get('filename', '')
+        mime_code = self._attrs.get('mimeCode', '')
+        with self._spool:
+            encoded_size = self._spool.tell()
+            content_hash = None if self._invalid else self.store.add_base64(
+                self._spool, self._text_hasher.hexdigest(), filename, mime_code)
+        self._spool = None
+        info = self.store.objects.get(content_hash, {}) if content_hash else {}
+        self.records.append({
+            'filename': filename,
+            'mime_code': mime_code,
+            'is_xslt': filename.lower().endswith(XSLT_EXTENSIONS),
+            'sha256': content_hash,
+            'size': info.get('size', 0),
+            'encoded_size': encoded_size,
+        })
+
+
+def extract_attachments(path: str, store: AttachmentStore) -> List[Dict[str, Any]]:
+    """Faturadaki gömülü ekleri depoya aktar; kayıtlar yalnızca hash referansı içerir"""
+    reader = _AttachmentReader(store)
+    parser = expat.ParserCreate(namespace_separator=' ')
+    parser.StartElementHandler = reader.start
+    parser.EndElementHandler = reader.end
+    parser.CharacterDataHandler = reader.text
+    with open(path, 'rb') as f:
+        parser.ParseFile(f)
+    return reader.records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gömülü XSLT/ekleri içerik adresli depoya aktar')
+    parser.add_argument('files', nargs='*', default=['scripts/invoice_esg2026000000115.xml'])
+    parser.add_argument('--store', default='scripts/xslt_store', help='Depo klasörü')
+    parser.add_argument('--output', default='scripts/xslt_store/records.json', help='Fatura kayıtları (JSON)')
+    args = parser.parse_args()
+
+    store = AttachmentStore(args.store)
+    records = {}
+    encoded_total = 0
+    for path in args.files:
+        try:
+            records[path] = extract_attachments(path, store)
+        except expat.ExpatError as e:
+            print(f"❌ {path}: {e}")
+            continue
+        encoded_total += sum(r['encoded_size'] for r in records[path])
+    store.save()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+
+    unique = {r['sha256'] for rs in records.values() for r in rs if r['sha256']}
+    stored = sum(store.objects[h]['size'] for h in unique)
+    print(f"✅ {len(records)} fatura, {sum(len(r) for r in records.values())} ek, {len(unique)} benzersiz içerik")
+    print(f"📦 Base64 toplam: {encoded_total:,} bayt -> depoda: {stored:,} bayt")
+    print(f"🔁 Çözülen: {store.decoded}, tekrar kullanılan: {store.reused}")
+    print(f"💾 Kayıtlar: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,11 +6,80 @@ XML Mapping Rehberi - Tüm verileri mapping için hazır format
 import xml.etree.ElementTree as ET
 import json
 
+from ubl_documents import CAC, CBC, INVOICE, LineStream, lookup_document_type
+from ubl_money import DEFAULT_CURRENCY, Money
+
 NAMESPACES = {
     'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
     'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
 }
 
+# Veritabanına eşlenen alanlar: (alan, xpath) - extract_header_data / line_mapping ile aynı
+# xpath'ler ('[n]' kalem indisi olmadan); '/@ad' ile biten yollar attribute alanlarıdır
+_SUPPLIER = './/cac:AccountingSupplierParty/cac:Party'
+_CUSTOMER = './/cac:AccountingCustomerParty/cac:Party'
+_LINE = './/cac:InvoiceLine'
+
+MAPPING_SPEC = [
+    ('invoice_basic.id', './/cbc:ID'),
+    ('invoice_basic.uuid', './/cbc:UUID'),
+    ('invoice_basic.invoice_number', './/cbc:InvoiceNumber'),
+    ('invoice_basic.issue_date', './/cbc:IssueDate'),
+    ('invoice_basic.issue_time', './/cbc:IssueTime'),
+    ('invoice_basic.invoice_type_code', './/cbc:InvoiceTypeCode'),
+    ('invoice_basic.profile_id', './/cbc:ProfileID'),
+    ('invoice_basic.document_currency_code', './/cbc:DocumentCurrencyCode'),
+    ('invoice_basic.ubl_version', './/cbc:UBLVersionID'),
+    ('invoice_basic.customization_id', './/cbc:CustomizationID'),
+    ('supplier.identifications', f'{_SUPPLIER}/cac:PartyIdentification/cbc:ID'),
+    ('supplier.identifications.scheme_id', f'{_SUPPLIER}/cac:PartyIdentification/cbc:ID/@schemeID'),
+    ('supplier.party_name', f'{_SUPPLIER}/cac:PartyName/cbc:Name'),
+    ('supplier.address.street_name', f'{_SUPPLIER}/cac:PostalAddress/cbc:StreetName'),
+    ('supplier.address.building_number', f'{_SUPPLIER}/cac:PostalAddress/cbc:BuildingNumber'),
+    ('supplier.address.city_subdivision', f'{_SUPPLIER}/cac:PostalAddress/cbc:CitySubdivisionName'),
+    ('supplier.address.city_name', f'{_SUPPLIER}/cac:PostalAddress/cbc:CityName'),
+    ('supplier.address.postal_zone', f'{_SUPPLIER}/cac:PostalAddress/cbc:PostalZone'),
+    ('supplier.address.country_name', f'{_SUPPLIER}/cac:PostalAddress/cac:Country/cbc:Name'),
+    ('supplier.tax_scheme.company_id', f'{_SUPPLIER}/cac:PartyTaxScheme/cbc:CompanyID'),
+    ('supplier.tax_scheme.tax_scheme_name', f'{_SUPPLIER}/cac:PartyTaxScheme/cac:TaxScheme/cbc:Name'),
+    ('supplier.tax_scheme.tax_scheme_id', f'{_SUPPLIER}/cac:PartyTaxScheme/cac:TaxScheme/cbc:TaxSchemeID'),
+    ('supplier.contact.telephone', f'{_SUPPLIER}/cac:Contact/cbc:Telephone'),
+    ('supplier.contact.email', f'{_SUPPLIER}/cac:Contact/cbc:ElectronicMail'),
+    ('supplier.contact.fax', f'{_SUPPLIER}/cac:Contact/cbc:Fax'),
+    ('supplier.person.first_name', f'{_SUPPLIER}/cac:Person/cbc:FirstName'),
+    ('supplier.person.family_name', f'{_SUPPLIER}/cac:Person/cbc:FamilyName'),
+    ('supplier.person.title', f'{_SUPPLIER}/cac:Person/cbc:Title'),
+    ('customer.identifications', f'{_CUSTOMER}/cac:PartyIdentification/cbc:ID'),
+    ('customer.identifications.scheme_id', f'{_CUSTOMER}/cac:PartyIdentification/cbc:ID/@schemeID'),
+    ('customer.party_name', f'{_CUSTOMER}/cac:PartyName/cbc:Name'),
+    ('customer.address.street_name', f'{_CUSTOMER}/cac:PostalAddress/cbc:StreetName'),
+    ('customer.address.city_name', f'{_CUSTOMER}/cac:PostalAddress/cbc:CityName'),
+    ('customer.address.country_name', f'{_CUSTOMER}/cac:PostalAddress/cac:Country/cbc:Name'),
+    ('customer.tax_scheme.tax_scheme_name', f'{_CUSTOMER}/cac:PartyTaxScheme/cac:TaxScheme/cbc:Name'),
+    ('customer.contact.email', f'{_CUSTOMER}/cac:Contact/cbc:ElectronicMail'),
+] + [
+    (f'financial.{key}{suffix}', f'.//cac:LegalMonetaryTotal/cbc:{tag}{attr}')
+    for key, tag in (('line_extension_amount', 'LineExtensionAmount'),
+                     ('tax_exclusive_amount', 'TaxExclusiveAmount'),
+                     ('tax_inclusive_amount', 'TaxInclusiveAmount'),
+                     ('payable_amount', 'PayableAmount'))
+    for suffix, attr in (('', ''), ('.currency', '/@currencyID'))
+] + [
+    ('lines.line_id', f'{_LINE}/cbc:ID'),
+    ('lines.item.name', f'{_LINE}/cac:Item/cbc:Name'),
+    ('lines.item.description', f'{_LINE}/cac:Item/cbc:Description'),
+    ('lines.quantity', f'{_LINE}/cbc:InvoicedQuantity'),
+    ('lines.quantity.unit_code', f'{_LINE}/cbc:InvoicedQuantity/@unitCode'),
+    ('lines.price', f'{_LINE}/cac:Price/cbc:PriceAmount'),
+    ('lines.price.currency', f'{_LINE}/cac:Price/cbc:PriceAmount/@currencyID'),
+    ('lines.line_extension_amount', f'{_LINE}/cbc:LineExtensionAmount'),
+    ('lines.line_extension_amount.currency', f'{_LINE}/cbc:LineExtensionAmount/@currencyID'),
+    ('lines.tax.taxable_amount', f'{_LINE}/cac:TaxTotal/cac:TaxSubtotal/cbc:TaxableAmount'),
+    ('lines.tax.tax_amount', f'{_LINE}/cac:TaxTotal/cbc:TaxAmount'),
+    ('lines.tax.percent', f'{_LINE}/cac:TaxTotal/cac:TaxSubtotal/cbc:Percent'),
+    ('lines.tax.tax_scheme_id', f'{_LINE}/cac:TaxTotal/cac:TaxSubtotal/cac:TaxCategory/cac:TaxScheme/cbc:TaxSchemeID'),
+]
+
 def find_text(root, xpath, default=""):
     """XPath ile text bul"""
     result = root.find(xpath, NAMESPACES)
@@ -20,11 +89,46 @@ def find_all(root, xpath):
     """Tüm elementleri bul"""
     return root.findall(xpath, NAMESPACES)
 
+def amount_info(elem, xpath, description, default_currency=DEFAULT_CURRENCY):
+    """Tutar elementini mapping formatına çevir (ham metin + currencyID + alt birim)"""
+    money = Money.from_element(elem, default_currency)
+    return {
+        'xpath': xpath,
+        'value': elem.text if elem is not None and elem.text else '',
+        'currency': elem.get('currencyID', '') if elem is not None else '',
+        'minor_units': money.minor if money is not None else None,
+        'description': description
+    }
+
 def extract_complete_data(xml_file):
     """Tüm verileri detaylı çıkar"""
     
     tree = ET.parse(xml_file)
     root = tree.getroot()
+    doc_type = lookup_document_type(root.tag)
+    if doc_type is None:
+        raise ValueError(f"Desteklenmeyen kök: {root.tag[root.tag.rfind('}') + 1:]}")
+    data = extract_header_data(root)
+    
+    # ============ FATURA KALEMLERİ ============
+    # Kalem etiketi belge tipinden (InvoiceLine / CreditNoteLine); stream_complete_data ile aynı
+    for line in root.findall(doc_type.line_tag):
+        data['lines'].append(line_mapping(line, doc_type))
+    
+    return data
+
+def stream_complete_data(xml_file):
+    """Başlık/toplam verilerini hemen, kalemleri generator olarak döndür
+
+    Kalemler tek tek mapping formatına çevrilip bırakılır; data['lines'] boş kalır.
+    """
+    stream = LineStream(xml_file)
+    data = extract_header_data(stream.root)
+    data['line_count'] = stream.line_count
+    return data, (line_mapping(line, stream.doc_type) for line in stream)
+
+def extract_header_data(root):
+    """Kalemler dışındaki tüm bölümleri mapping formatında çıkar"""
     
     data = {
         'invoice_basic': {},
@@ -304,123 +408,98 @@ def extract_complete_data(xml_file):
     monetary = root.find('.//cac:LegalMonetaryTotal', NAMESPACES)
     if monetary is not None:
         data['financial'] = {
-            'line_extension_amount': {
-                'xpath': './/cac:LegalMonetaryTotal/cbc:LineExtensionAmount',
-                'value': find_text(monetary, 'cbc:LineExtensionAmount'),
-                'currency': monetary.find('cbc:LineExtensionAmount', NAMESPACES).get('currencyID', '') if monetary.find('cbc:LineExtensionAmount', NAMESPACES) is not None else '',
-                'description': 'KDV Hariç Toplam'
-            },
-            'tax_exclusive_amount': {
-                'xpath': './/cac:LegalMonetaryTotal/cbc:TaxExclusiveAmount',
-                'value': find_text(monetary, 'cbc:TaxExclusiveAmount'),
-                'currency': monetary.find('cbc:TaxExclusiveAmount', NAMESPACES).get('currencyID', '') if monetary.find('cbc:TaxExclusiveAmount', NAMESPACES) is not None else '',
-                'description': 'KDV Hariç Tutar'
-            },
-            'tax_inclusive_amount': {
-                'xpath': './/cac:LegalMonetaryTotal/cbc:TaxInclusiveAmount',
-                'value': find_text(monetary, 'cbc:TaxInclusiveAmount'),
-                'currency': monetary.find('cbc:TaxInclusiveAmount', NAMESPACES).get('currencyID', '') if monetary.find('cbc:TaxInclusiveAmount', NAMESPACES) is not None else '',
-                'description': 'KDV Dahil Tutar'
+            key: amount_info(monetary.find(f'cbc:{tag}', NAMESPACES),
+                             f'.//cac:LegalMonetaryTotal/cbc:{tag}', description)
+            for key, tag, description in (
+                ('line_extension_amount', 'LineExtensionAmount', 'KDV Hariç Toplam'),
+                ('tax_exclusive_amount', 'TaxExclusiveAmount', 'KDV Hariç Tutar'),
+                ('tax_inclusive_amount', 'TaxInclusiveAmount', 'KDV Dahil Tutar'),
+                ('payable_amount', 'PayableAmount', 'Ödenecek Tutar'),
+            )
+        }
+    
+    return data
+
+def line_mapping(line, doc_type=INVOICE):
+    """Tek fatura kalemini mapping formatına çevir (kalem / miktar etiketi belge tipinden)"""
+    line_id = find_text(line, 'cbc:ID')
+    line_path = f'.//cac:{doc_type.line_tag[len(CAC):]}[{line_id}]'
+    
+    # Item Description
+    item = line.find('.//cac:Item', NAMESPACES)
+    item_desc = {}
+    if item is not None:
+        item_desc = {
+            'name': {
+                'xpath': f'{line_path}/cac:Item/cbc:Name',
+                'value': find_text(item, 'cbc:Name'),
+                'description': 'Ürün/Hizmet Adı'
             },
-            'payable_amount': {
-                'xpath': './/cac:LegalMonetaryTotal/cbc:PayableAmount',
-                'value': find_text(monetary, 'cbc:PayableAmount'),
-                'currency': monetary.find('cbc:PayableAmount', NAMESPACES).get('currencyID', '') if monetary.find('cbc:PayableAmount', NAMESPACES) is not None else '',
-                'description': 'Ödenecek Tutar'
+            'description': {
+                'xpath': f'{line_path}/cac:Item/cbc:Description',
+                'value': find_text(item, 'cbc:Description'),
+                'description': 'Açıklama'
             }
         }
     
-    # ============ FATURA KALEMLERİ ============
-    for line in find_all(root, './/cac:InvoiceLine'):
-        line_id = find_text(line, 'cbc:ID')
-        
-        # Item Description
-        item = line.find('.//cac:Item', NAMESPACES)
-        item_desc = {}
-        if item is not None:
-            item_desc = {
-                'name': {
-                    'xpath': f'.//cac:InvoiceLine[{line_id}]/cac:Item/cbc:Name',
-                    'value': find_text(item, 'cbc:Name'),
-                    'description': 'Ürün/Hizmet Adı'
+    # Quantity
+    quantity = line.find(doc_type.quantity_tag) if doc_type.quantity_tag else None
+    quantity_data = {}
+    if quantity is not None:
+        quantity_data = {
+            'xpath': f'{line_path}/cbc:{doc_type.quantity_tag[len(CBC):]}',
+            'value': quantity.text,
+            'unit_code': quantity.get('unitCode', ''),
+            'description': 'Miktar'
+        }
+    
+    # Price
+    price = line.find('.//cac:Price', NAMESPACES)
+    price_data = {}
+    if price is not None:
+        price_data = amount_info(price.find('cbc:PriceAmount', NAMESPACES),
+                                 f'{line_path}/cac:Price/cbc:PriceAmount',
+                                 'Birim Fiyat')
+    
+    # Line Extension Amount
+    line_ext = line.find('.//cbc:LineExtensionAmount', NAMESPACES)
+    
+    # Tax
+    tax_total = line.find('.//cac:TaxTotal', NAMESPACES)
+    tax_data = {}
+    if tax_total is not None:
+        tax_subtotal = tax_total.find('.//cac:TaxSubtotal', NAMESPACES)
+        if tax_subtotal is not None:
+            tax_data = {
+                'taxable_amount': amount_info(
+                    tax_subtotal.find('cbc:TaxableAmount', NAMESPACES),
+                    f'{line_path}/cac:TaxTotal/cac:TaxSubtotal/cbc:TaxableAmount',
+                    'KDV Matrahı'),
+                'tax_amount': amount_info(
+                    tax_total.find('cbc:TaxAmount', NAMESPACES),
+                    f'{line_path}/cac:TaxTotal/cbc:TaxAmount',
+                    'KDV Tutarı'),
+                'percent': {
+                    'xpath': f'{line_path}/cac:TaxTotal/cac:TaxSubtotal/cbc:Percent',
+                    'value': find_text(tax_subtotal, 'cbc:Percent'),
+                    'description': 'KDV Oranı (%)'
                 },
-                'description': {
-                    'xpath': f'.//cac:InvoiceLine[{line_id}]/cac:Item/cbc:Description',
-                    'value': find_text(item, 'cbc:Description'),
-                    'description': 'Açıklama'
+                'tax_scheme_id': {
+                    'xpath': f'{line_path}/cac:TaxTotal/cac:TaxSubtotal/cac:TaxCategory/cac:TaxScheme/cbc:TaxSchemeID',
+                    'value': find_text(tax_subtotal, 'cac:TaxCategory/cac:TaxScheme/cbc:TaxSchemeID'),
+                    'description': 'KDV Kategorisi'
                 }
             }
-        
-        # Quantity
-        quantity = line.find('.//cbc:InvoicedQuantity', NAMESPACES)
-        quantity_data = {}
-        if quantity is not None:
-            quantity_data = {
-                'xpath': f'.//cac:InvoiceLine[{line_id}]/cbc:InvoicedQuantity',
-                'value': quantity.text,
-                'unit_code': quantity.get('unitCode', ''),
-                'description': 'Miktar'
-            }
-        
-        # Price
-        price = line.find('.//cac:Price', NAMESPACES)
-        price_data = {}
-        if price is not None:
-            price_amount = price.find('cbc:PriceAmount', NAMESPACES)
-            price_data = {
-                'xpath': f'.//cac:InvoiceLine[{line_id}]/cac:Price/cbc:PriceAmount',
-                'value': price_amount.text if price_amount is not None else '',
-                'currency': price_amount.get('currencyID', '') if price_amount is not None else '',
-                'description': 'Birim Fiyat'
-            }
-        
-        # Line Extension Amount
-        line_ext = line.find('.//cbc:LineExtensionAmount', NAMESPACES)
-        
-        # Tax
-        tax_total = line.find('.//cac:TaxTotal', NAMESPACES)
-        tax_data = {}
-        if tax_total is not None:
-            tax_subtotal = tax_total.find('.//cac:TaxSubtotal', NAMESPACES)
-            if tax_subtotal is not None:
-                tax_data = {
-                    'taxable_amount': {
-                        'xpath': f'.//cac:InvoiceLine[{line_id}]/cac:TaxTotal/cac:TaxSubtotal/cbc:TaxableAmount',
-                        'value': find_text(tax_subtotal, 'cbc:TaxableAmount'),
-                        'description': 'KDV Matrahı'
-                    },
-                    'tax_amount': {
-                        'xpath': f'.//cac:InvoiceLine[{line_id}]/cac:TaxTotal/cbc:TaxAmount',
-                        'value': find_text(tax_total, 'cbc:TaxAmount'),
-                        'description': 'KDV Tutarı'
-                    },
-                    'percent': {
-                        'xpath': f'.//cac:InvoiceLine[{line_id}]/cac:TaxTotal/cac:TaxSubtotal/cbc:Percent',
-                        'value': find_text(tax_subtotal, 'cbc:Percent'),
-                        'description': 'KDV Oranı (%)'
-                    },
-                    'tax_scheme_id': {
-                        'xpath': f'.//cac:InvoiceLine[{line_id}]/cac:TaxTotal/cac:TaxSubtotal/cac:TaxCategory/cac:TaxScheme/cbc:TaxSchemeID',
-                        'value': find_text(tax_subtotal, 'cac:TaxCategory/cac:TaxScheme/cbc:TaxSchemeID'),
-                        'description': 'KDV Kategorisi'
-                    }
-                }
-        
-        data['lines'].append({
-            'line_id': line_id,
-            'item': item_desc,
-            'quantity': quantity_data,
-            'price': price_data,
-            'line_extension_amount': {
-                'xpath': f'.//cac:InvoiceLine[{line_id}]/cbc:LineExtensionAmount',
-                'value': line_ext.text if line_ext is not None else '',
-                'currency': line_ext.get('currencyID', '') if line_ext is not None else '',
-                'description': 'Kalem Tutarı'
-            },
-            'tax': tax_data
-        })
     
-    return data
+    return {
+        'line_id': line_id,
+        'item': item_desc,
+        'quantity': quantity_data,
+        'price': price_data,
+        'line_extension_amount': amount_info(
+            line_ext, f'{line_path}/cbc:LineExtensionAmount', 'Kalem Tutarı'),
+        'tax': tax_data
+    }
 
 def print_mapping_guide(data):
     """Mapping rehberini yazdır"""